@@ -0,0 +1,219 @@
+"""
+SDK benchmark suite.
+
+Runs offline against a local stub of the MSA REST API and writes the
+results as JSON, so they can be compared release to release::
+
+    python benchmarks/bench_sdk.py --output results.json
+    python benchmarks/bench_sdk.py --only device_read --repeat 10
+
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from msa_sdk.stub_server import StubServer  # noqa: E402
+
+BENCHMARKS = {}
+_ES_PATCHES = []
+
+
+def benchmark(number):
+    """Register a benchmark run number times per repeat."""
+    def register(func):
+        BENCHMARKS[func.__name__] = (func, number)
+        return func
+    return register
+
+
+def _measure(func, number, repeat):
+    """Time repeat rounds of number calls, return seconds per call."""
+    setup = func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            setup()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+@benchmark(number=1)
+def import_cold():
+    """Import msa_sdk in a fresh interpreter."""
+    script = ('import time; start = time.perf_counter(); import msa_sdk; '
+              'print(time.perf_counter() - start)')
+
+    def run():
+        # From the repository, msa_sdk may not be installed
+        subprocess.run([sys.executable, '-c', script], check=True,
+                       cwd=REPO_ROOT, stdin=subprocess.DEVNULL,
+                       capture_output=True)
+    return run
+
+
+@benchmark(number=200)
+def call_get():
+    """MSA_API._call_get round trip."""
+    from msa_sdk.msa_api import MSA_API
+    api = MSA_API()
+    api.path = '/orchestration/process/instance/1'
+    return api._call_get
+
+
+@benchmark(number=200)
+def call_post():
+    """MSA_API._call_post round trip with a small body."""
+    from msa_sdk.msa_api import MSA_API
+    api = MSA_API()
+    api.path = '/orchestration/process/instance/1'
+    return lambda: api._call_post({"name": "value"})
+
+
+@benchmark(number=200)
+def device_read():
+    """Device.read and attribute parsing."""
+    from msa_sdk.device import Device
+    device = Device(device_id=21594, lazy=True)
+    return device.read
+
+
+@benchmark(number=200)
+def order_command_execute():
+    """Order.command_execute with a 100 object payload."""
+    from msa_sdk.order import Order
+    order = Order(21594, lazy=True)
+    params = {"simple_firewall": {
+        str(index): {"object_id": str(index), "src_ip": "10.0.0.1",
+                     "dst_port": str(index)}
+        for index in range(100)}}
+    return lambda: order.command_execute('CREATE', params)
+
+
+@benchmark(number=20)
+def codec_round_trip():
+    """Encode and decode a 5000 object payload with the JSON codec."""
+    from msa_sdk import codec
+    params = {"simple_firewall": {
+        str(index): {"object_id": str(index), "src_ip": "10.0.0.1",
+                     "dst_port": str(index)}
+        for index in range(5000)}}
+    return lambda: codec.loads(codec.dumps(params))
+
+
+def _es_handler(**kwargs):
+    """Build an EsHandler sending to a no-op bulk helper."""
+    from msa_sdk.elk import EsHandler
+    if not _ES_PATCHES:
+        _ES_PATCHES.append(patch('msa_sdk.elk.OpenSearch').start())
+        _ES_PATCHES.append(patch(
+            'msa_sdk.elk.eshelpers.bulk',
+            side_effect=lambda client, actions, **kw: list(actions)).start())
+    return EsHandler(**kwargs)
+
+
+def _log_record():
+    return logging.LogRecord('bench', logging.INFO, __file__, 1,
+                             'hello %s', ('world',), None)
+
+
+@benchmark(number=10000)
+def es_emit():
+    """EsHandler.emit on the logging thread."""
+    handler = _es_handler(queue_size=10 ** 6)
+    record = _log_record()
+    return lambda: handler.emit(record)
+
+
+@benchmark(number=5)
+def es_flush_1000():
+    """Emit and flush 1000 records through EsHandler to a no-op bulk."""
+    handler = _es_handler(buffer_size=500)
+    record = _log_record()
+
+    def run():
+        for _ in range(1000):
+            handler.emit(record)
+        handler.flush()
+    return run
+
+
+@benchmark(number=200)
+def util_ip_helpers():
+    """Call the util IP and CIDR helpers."""
+    from msa_sdk import util
+
+    def run():
+        util.get_ip_range('10.0.0.1', '10.0.0.254')
+        util.cidr_to_range('10.0.0.0/24')
+        util.is_overlapping_cidr('10.0.0.0/16', '10.0.128.0/24')
+        util.address_is_in_network('10.0.0.12', '10.0.0.0/24')
+        util.netmask_to_cidr('255.255.255.0')
+        util.cidr_match('10.0.0.12', '10.0.0.0/24')
+        util.cidr_to_subnet_and_subnetmask_address('10.0.0.0/24')
+    return run
+
+
+def _environment():
+    from msa_sdk import __version__
+    return {
+        'sdk_version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def main(argv=None):
+    """Run the benchmarks and print or write the JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--output', help='JSON results file, default stdout')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', action='append', choices=BENCHMARKS,
+                        help='benchmark to run, may be repeated')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added by the stub server per request')
+    args = parser.parse_args(argv)
+
+    server = StubServer(latency=args.latency).start()
+    os.environ.update(server.env())
+
+    results = {'environment': _environment(), 'latency': args.latency,
+               'benchmarks': {}}
+    for name in args.only or BENCHMARKS:
+        func, number = BENCHMARKS[name]
+        timings = _measure(func, number, args.repeat)
+        results['benchmarks'][name] = {
+            'description': func.__doc__,
+            'number': number,
+            'repeat': args.repeat,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings),
+            'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        }
+        print(f"{name:<24}{statistics.median(timings) * 1e6:12.1f} us",
+              file=sys.stderr)
+    server.stop()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as results_file:
+            results_file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
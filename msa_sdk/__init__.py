@@ -6,17 +6,96 @@ __version__ = "3.3.46"
 VERSION = "3.3.46"
 
 import base64
-import datetime
 import logging
 import os
-import socket
 import sys
+import threading
 
 import msa_sdk.constants as constants
-from msa_sdk.elk import EsHandler
 from msa_sdk.variables import Variables
 
-context = Variables.load_context()
+_context_lock = threading.Lock()
+
+
+def __getattr__(name):
+    """Load the task context on first access to msa_sdk.context."""
+    if name == 'context':
+        return _load_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _load_context():
+    """Read the task context once, from the --execute file or stdin."""
+    with _context_lock:
+        if 'context' not in globals():
+            context = Variables.load_context()
+            if '_DEBUG' in context:
+                logger.setLevel(logging.DEBUG)
+            globals()['context'] = context
+    return globals()['context']
+
+
+class _DeferredEsHandler(logging.Handler):
+    """
+    Log handler building the ES handler on the first record.
+
+    Importing opensearchpy, loading the context and resolving the host
+    are only paid by the tasks that actually log something.
+    """
+
+    def __init__(self, **kwargs):
+        """Initialize."""
+        logging.Handler.__init__(self)
+        self._kwargs = kwargs
+        self._handler = None
+        self._building = False
+        self._build_lock = threading.RLock()
+
+    def _get_handler(self):
+        with self._build_lock:
+            if self._handler is None and not self._building:
+                # Records logged while building, e.g. by opensearchpy
+                # itself, are dropped instead of recursing
+                self._building = True
+                try:
+                    from msa_sdk.elk import EsHandler
+                    self._handler = EsHandler(context=_load_context(),
+                                              **self._kwargs)
+                finally:
+                    self._building = False
+            return self._handler
+
+    def handle(self, record):
+        """Filter the record and pass it to the ES handler."""
+        result = self.filter(record)
+        if result:
+            handler = self._get_handler()
+            if handler is not None:
+                handler.handle(record)
+        return result
+
+    def emit(self, record):
+        """Pass the record to the ES handler."""
+        handler = self._get_handler()
+        if handler is not None:
+            handler.emit(record)
+
+    def flush(self):
+        """Flush the ES handler if it was built."""
+        if self._handler is not None:
+            self._handler.flush()
+
+    def raise_errors(self):
+        """Raise the last indexing error of the ES handler, if any."""
+        if self._handler is not None:
+            self._handler.raise_errors()
+
+    def close(self):
+        """Close the ES handler if it was built."""
+        if self._handler is not None:
+            self._handler.close()
+        logging.Handler.close(self)
+
 
 # ES index
 def add_es_handler(logger):
@@ -29,7 +108,7 @@ def add_es_handler(logger):
             arr = base64.b64decode(auth).decode()
             res = arr.split(":", 1)
             auth_details = (res[0], res[1])
-        esh = EsHandler(auth_details=auth_details, hosts=es_server, raise_on_indexing_exceptions=True, context=context)
+        esh = _DeferredEsHandler(auth_details=auth_details, hosts=es_server, raise_on_indexing_exceptions=True)
         logger.addHandler(esh)
 
 def add_std_err(logger):
@@ -43,7 +122,8 @@ logger = logging.getLogger()
 add_std_err(logger)
 add_es_handler(logger)
 
-if ('_DEBUG' in os.environ or '_DEBUG' in context):
+# '_DEBUG' in the context is applied when the context is loaded
+if ('_DEBUG' in os.environ):
     logger.setLevel(logging.DEBUG)
 else:
     logger.setLevel(logging.INFO)
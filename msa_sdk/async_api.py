@@ -0,0 +1,255 @@
+"""Module async_api."""
+import asyncio
+import copy
+
+from msa_sdk.msa_api import MSA_API
+
+
+class AsyncAPIError(RuntimeError):
+    """Class Exception for failed asynchronous API calls."""
+
+    def __init__(self, action, status_code, message):
+        """Init."""
+        RuntimeError.__init__(self, '{}: {} {}'.format(action, status_code,
+                                                       message))
+        self.action = action
+        self.status_code = status_code
+        self.message = message
+
+
+class AsyncMSA_API():  # pylint: disable=invalid-name
+    """
+    Class asyncio MSA API.
+
+    Calls are sent by MSA_API._send in a worker thread, so they go
+    through the same transport, codec, instrumentation and trace headers
+    as synchronous calls, without blocking the event loop. At most
+    max_concurrency calls run at a time. Each call works on its own copy
+    of the API object and results are returned to the caller, so one
+    object can serve many concurrent calls.
+    """
+
+    def __init__(self, max_concurrency=10):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        max_concurrency: Integer
+                Maximum number of requests in flight
+
+        """
+        self._api = MSA_API()
+        self.url = self._api.url
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    # pylint: disable=too-many-arguments
+    def _send(self, action, method, path, data, params, timeout):
+        """Send a call with a copy of the API object, return the copy."""
+        api = copy.copy(self._api)
+        api.action = action
+        api.path = path
+        headers = {
+            'Accept': 'application/json',
+            'Authorization': 'Bearer {}'.format(api.token),
+        }
+        if data is not None:
+            from msa_sdk import codec
+            headers['Content-Type'] = 'application/json'
+            data = codec.dumps(data)
+        api.add_trace_headers(headers)
+        try:
+            api._send(method, headers, data=data, params=params,
+                      timeout=timeout)
+        except ValueError:
+            # An error body that is not JSON, reported by _request
+            if api.response is None or api.response.ok:
+                raise
+        return api
+
+    # pylint: disable=too-many-arguments
+    async def _request(self, action, method, path, data=None, params=None,
+                       timeout=60):
+        """
+        Run one API call.
+
+        Parameters
+        ----------
+        action: String
+                Description used in errors
+        method: String
+                HTTP verb
+        path: String
+                Path below the API url
+        data: dict or list
+                Body sent as JSON
+        params: dict
+                Query parameters
+        timeout: Integer
+                Timeout in seconds
+
+        Returns
+        -------
+        Decoded JSON response, None for an empty body
+
+        """
+        async with self._get_semaphore():
+            api = await asyncio.to_thread(self._send, action, method, path,
+                                          data, params, timeout)
+        response = api.response
+        if not response.ok:
+            try:
+                message = response.json()['message']
+            except Exception:
+                message = response.text
+            raise AsyncAPIError(action, response.status_code, message)
+        if not response.text:
+            return None
+        return api.content_json()
+
+    async def gather(self, coros):
+        """
+        Run coroutines concurrently.
+
+        Parameters
+        ----------
+        coros: Iterable
+                Coroutines of this client
+
+        Returns
+        -------
+        List of results, exceptions are returned in place of results
+
+        """
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+
+class AsyncDevice(AsyncMSA_API):
+    """Class asyncio Device."""
+
+    api_path = "/device"
+
+    async def read(self, device_id, by_ref=False) -> dict:
+        """
+        Read device information.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+        by_ref: String
+                Device external reference used instead of the ID
+
+        Returns
+        -------
+        Dict() with device information
+
+        """
+        if by_ref:
+            path = "{}/reference/{}".format(self.api_path, by_ref)
+        else:
+            path = "{}/v3/{}".format(self.api_path, device_id)
+        return await self._request('Read device', 'GET', path)
+
+    async def read_many(self, device_ids) -> dict:
+        """
+        Read many devices concurrently.
+
+        Parameters
+        ----------
+        device_ids: Iterable
+                Device IDs
+
+        Returns
+        -------
+        Dict() device ID -> device information or exception
+
+        """
+        device_ids = list(device_ids)
+        results = await self.gather(self.read(device_id)
+                                    for device_id in device_ids)
+        return dict(zip(device_ids, results))
+
+
+class AsyncOrchestration(AsyncMSA_API):
+    """Class asyncio Orchestration."""
+
+    api_path = "/orchestration"
+
+    async def get_process_instance(self, process_id) -> dict:
+        """
+        Get process instance.
+
+        Parameters
+        ----------
+        process_id: Integer
+                Process ID
+
+        Returns
+        -------
+        Dict() with process instance
+
+        """
+        path = '{}/process/instance/{}'.format(self.api_path, process_id)
+        return await self._request('Get process instance', 'GET', path)
+
+
+class AsyncOrder(AsyncMSA_API):
+    """Class asyncio Order."""
+
+    api_path = "/ordercommand"
+
+    async def command_execute(self, device_id, command: str, params: dict,
+                              timeout=300):
+        """
+        Command execute.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+        command: String
+                Order command
+                Available values : CREATE, UPDATE, IMPORT, LIST, READ, DELETE
+        params: dict
+                Parameters, see Order.command_execute
+        timeout: Integer
+                Timeout in seconds (300 seconds by default)
+
+        Returns
+        -------
+        Decoded response
+
+        """
+        if not isinstance(params, (dict, list)):
+            raise TypeError('Parameters needs to be a dictionary or a list')
+        path = '{}/execute/{}/{}'.format(self.api_path, device_id, command)
+        return await self._request('Command execute', 'POST', path,
+                                   data=params, timeout=timeout)
+
+
+class AsyncLookup(AsyncMSA_API):
+    """Class asyncio Lookup."""
+
+    api_path = "/lookup"
+
+    async def look_list_device_ids(self) -> list:
+        """
+        Look list devices ids.
+
+        Returns
+        -------
+        List of devices
+
+        """
+        path = '{}/devices'.format(self.api_path)
+        return await self._request('Get device ids', 'GET', path)
@@ -0,0 +1,203 @@
+"""
+Module auth.
+
+Access tokens are cached per process by token_cache. When no valid token
+can be fetched, FALLBACK_TOKEN is returned. It is kept for failure_ttl
+seconds, 10 by default, so that an unreachable auth server is not asked
+again by every call. Before the shared HTTP session, the fallback token
+was never cached. failure_ttl=0 restores that behaviour.
+"""
+import threading
+import time
+
+from msa_sdk import transport
+
+DEFAULT_TOKEN_URL = ("http://msa-auth:8080/auth/realms/msa/protocol/"
+                     "openid-connect/token")
+FALLBACK_TOKEN = "12345qwert"
+
+
+class TokenCache():
+    """
+    Process-wide OAuth access token cache.
+
+    Tokens are keyed on (token URL, client id) and kept until shortly
+    before they expire. Concurrent refreshes of the same key are
+    coalesced into a single request to the auth server.
+    """
+
+    def __init__(self, refresh_margin=30, default_ttl=60, failure_ttl=10,
+                 timeout=5):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        refresh_margin: Integer
+                Seconds before expiry a token is refreshed
+        default_ttl: Integer
+                Lifetime used when the server sends no expires_in
+        failure_ttl: Integer
+                Seconds the fallback token is served after a failed
+                fetch before the auth server is tried again, 0 never
+                caches the fallback token
+        timeout: Float
+                Seconds to wait for the auth server, the request is not
+                retried so an unreachable server falls back quickly
+
+        """
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.failure_ttl = failure_ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._tokens = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key, now):
+        entry = self._tokens.get(key)
+        if entry is not None and now < entry[1]:
+            return entry[0]
+        return None
+
+    def _valid(self, key, now):
+        entry = self._tokens.get(key)
+        if entry is not None and now < entry[2]:
+            return entry[0]
+        return None
+
+    def _fetch(self, url, client_id, client_secret):
+        params = {"client_id": client_id,
+                  "grant_type": "client_credentials",
+                  "client_secret": client_secret}
+        response = transport.session(transport.NO_RETRY).post(
+            url, data=params, timeout=self.timeout)
+        data = response.json()
+        token = data["access_token"]
+        if not isinstance(token, str):
+            raise ValueError("Invalid access token")
+        expires_in = data.get("expires_in") or self.default_ttl
+        return token, float(expires_in)
+
+    def get(self, url, client_id, client_secret):
+        """
+        Get an access token, fetching a new one when needed.
+
+        Parameters
+        ----------
+        url: String
+                Token endpoint
+        client_id: String
+                OAuth client id
+        client_secret: String
+                OAuth client secret
+
+        Returns
+        -------
+        Access token
+
+        """
+        key = (url, client_id)
+        with self._lock:
+            token = self._fresh(key, time.monotonic())
+            if token is not None:
+                self.hits += 1
+                return token
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            now = time.monotonic()
+            with self._lock:
+                token = self._fresh(key, now)
+                if token is not None:
+                    # Another thread refreshed it while we were waiting.
+                    self.hits += 1
+                    return token
+                stale = self._valid(key, now)
+                if stale is None:
+                    self.misses += 1
+                else:
+                    self.refreshes += 1
+            try:
+                token, expires_in = self._fetch(url, client_id, client_secret)
+            except Exception:
+                if stale is not None:
+                    return stale
+                if self.failure_ttl > 0:
+                    retry_at = time.monotonic() + self.failure_ttl
+                    with self._lock:
+                        self._tokens[key] = (FALLBACK_TOKEN, retry_at,
+                                             retry_at)
+                return FALLBACK_TOKEN
+
+            now = time.monotonic()
+            margin = min(self.refresh_margin, expires_in / 2)
+            with self._lock:
+                self._tokens[key] = (token, now + expires_in - margin,
+                                     now + expires_in)
+            return token
+
+    def invalidate(self, url=None, client_id=None, token=None):
+        """
+        Drop cached tokens.
+
+        Parameters
+        ----------
+        url: String
+                Token endpoint, all endpoints if None
+        client_id: String
+                OAuth client id, all clients if None
+        token: String
+                Only drop this token, for instance one rejected by the
+                API, not a newer one fetched meanwhile
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            for key in list(self._tokens):
+                if url is not None and key[0] != url:
+                    continue
+                if client_id is not None and key[1] != client_id:
+                    continue
+                if token is not None and self._tokens[key][0] != token:
+                    continue
+                del self._tokens[key]
+
+    def stats(self) -> dict:
+        """
+        Cache counters.
+
+        Returns
+        -------
+        Dict() with hits, misses, refreshes and cached tokens
+
+        """
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "refreshes": self.refreshes,
+                    "size": len(self._tokens)}
+
+    def clear(self):
+        """
+        Drop all tokens and reset counters.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            self._tokens.clear()
+            self.hits = 0
+            self.misses = 0
+            self.refreshes = 0
+
+
+token_cache = TokenCache()
@@ -0,0 +1,341 @@
+"""
+Module cache.
+
+Read-through cache of API responses, used for the repository resources
+which are read much more often than they change. Entries live ttl
+seconds in an in-memory LRU, and optionally in a directory shared by
+the processes of the node. Stale entries holding an ETag or a
+Last-Modified date are revalidated with a conditional GET instead of
+being fetched again.
+
+The default cache is configured by MSA_SDK_CACHE_TTL (seconds, default
+0), MSA_SDK_CACHE_SIZE (entries, default 256) and MSA_SDK_CACHE_DIR
+(shared directory, default none).
+
+With the default TTL of 0 every read asks the server, conditionally when
+the entry has a validator, so a file written by another process or
+workflow is never served stale. A TTL above 0 saves these requests, but
+a file changed elsewhere is only seen once its entry expires.
+"""
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class CacheEntry():
+    """Cached response body and its validators."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, key, body, etag=None, last_modified=None, tag=None,
+                 stored=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        key: String
+                Client, API URL and path of the request
+        body: String
+                Response body
+        etag: String
+                ETag header of the response
+        last_modified: String
+                Last-Modified header of the response
+        tag: String
+                Resource the entry belongs to, for invalidation
+        stored: Float
+                Time the response was received, default the time it is
+                put in the cache
+
+        """
+        self.key = key
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.tag = tag
+        self.stored = stored
+
+    def validators(self):
+        """
+        Headers of a conditional request revalidating the entry.
+
+        Returns
+        -------
+        Dictionary, empty if the server sent no validator
+
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self):
+        """Entry as a JSON serializable dictionary."""
+        return {'key': self.key, 'body': self.body, 'etag': self.etag,
+                'last_modified': self.last_modified, 'tag': self.tag,
+                'stored': self.stored}
+
+
+class ResponseCache():
+    """TTL and LRU cache of response bodies, optionally on disk."""
+
+    def __init__(self, ttl=None, max_entries=None, directory=None,
+                 clock=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        ttl: Float
+                Seconds an entry is served without asking the server,
+                0 revalidates every read
+                Default: MSA_SDK_CACHE_TTL or 0
+        max_entries: Integer
+                Entries kept in memory, and on disk
+                Default: MSA_SDK_CACHE_SIZE or 256
+        directory: String
+                Directory shared by the processes, default in memory only
+                Default: MSA_SDK_CACHE_DIR
+        clock: Function
+                Wall clock, default time.time
+
+        """
+        if ttl is None:
+            ttl = _env_float('MSA_SDK_CACHE_TTL', 0.0)
+        if max_entries is None:
+            max_entries = _env_int('MSA_SDK_CACHE_SIZE', 256)
+        if directory is None:
+            directory = os.environ.get('MSA_SDK_CACHE_DIR') or None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory
+        self.clock = clock or time.time
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def fresh(self, entry):
+        """
+        Tell if an entry can be served without asking the server.
+
+        Parameters
+        ----------
+        entry: CacheEntry
+                Cached entry
+
+        Returns
+        -------
+        Bool
+
+        """
+        return self.clock() - entry.stored < self.ttl
+
+    def _path(self, key, tag):
+        return os.path.join(self.directory, '{}-{}.json'.format(
+            _digest(tag or ''), _digest(key)))
+
+    def _read(self, key, tag):
+        try:
+            with open(self._path(key, tag)) as entry_file:
+                data = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != key:
+            return None
+        return CacheEntry(**data)
+
+    def _write(self, entry):
+        path = self._path(entry.key, entry.tag)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w') as entry_file:
+                json.dump(entry.to_dict(), entry_file)
+            # Readers see the old or the new entry, never a partial one
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            return
+        self._prune()
+
+    def _prune(self):
+        try:
+            names = [name for name in os.listdir(self.directory)
+                     if name.endswith('.json')]
+            if len(names) <= self.max_entries:
+                return
+            paths = sorted((os.path.join(self.directory, name)
+                            for name in names), key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_entries]:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key, tag=None):
+        """
+        Look up an entry, fresh or stale.
+
+        Parameters
+        ----------
+        key: String
+                Client, API URL and path of the request
+        tag: String
+                Resource of the entry
+
+        Returns
+        -------
+        CacheEntry or None
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if self.directory and (entry is None or not self.fresh(entry)):
+            # Another process may have refreshed it
+            shared = self._read(key, tag)
+            if shared is not None and (entry is None or
+                                       shared.stored > entry.stored):
+                entry = shared
+                self._remember(entry)
+        if entry is not None and self.fresh(entry):
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def _remember(self, entry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, entry):
+        """
+        Store an entry.
+
+        Parameters
+        ----------
+        entry: CacheEntry
+                Entry to store
+
+        Returns
+        -------
+        None
+
+        """
+        if entry.stored is None:
+            entry.stored = self.clock()
+        self._remember(entry)
+        if self.directory:
+            self._write(entry)
+
+    def touch(self, entry):
+        """
+        Mark an entry revalidated by the server as fresh again.
+
+        Parameters
+        ----------
+        entry: CacheEntry
+                Entry to refresh
+
+        Returns
+        -------
+        None
+
+        """
+        entry.stored = self.clock()
+        self.revalidated += 1
+        self.put(entry)
+
+    def invalidate(self, tag):
+        """
+        Drop the entries of a resource.
+
+        Parameters
+        ----------
+        tag: String
+                Resource of the entries, a repository URI
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry.tag == tag]:
+                del self._entries[key]
+        if self.directory:
+            self._remove('{}-'.format(_digest(tag or '')))
+
+    def clear(self):
+        """
+        Drop all the entries.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            self._remove('')
+
+    def _remove(self, prefix):
+        try:
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name.endswith('.json'):
+                    os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+
+repository_cache = ResponseCache()
+
+
+def configure(**kwargs) -> ResponseCache:
+    """
+    Replace the repository cache.
+
+    Parameters
+    ----------
+    kwargs: ResponseCache arguments (ttl, max_entries, directory)
+
+    Returns
+    -------
+    The new repository cache
+
+    """
+    global repository_cache  # pylint: disable=global-statement
+    repository_cache = ResponseCache(**kwargs)
+    return repository_cache
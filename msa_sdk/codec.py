@@ -0,0 +1,179 @@
+"""
+Module codec.
+
+JSON codec of the API request and response bodies. orjson is used when
+it is installed, otherwise the json module of the standard library.
+Setting MSA_SDK_JSON=json forces the standard library, and configure()
+plugs in any other codec::
+
+    codec.configure('json')
+    codec.configure(dumps=ujson.dumps, loads=ujson.loads)
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class Codec():
+    """Pair of JSON encode and decode functions."""
+
+    def __init__(self, name, dumps, loads):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        name: String
+                Name of the codec
+        dumps: Function
+                Encode an object, returns str or UTF-8 bytes
+        loads: Function
+                Decode str or UTF-8 bytes
+
+        """
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj):
+        """
+        Encode an object.
+
+        Parameters
+        ----------
+        obj: Object
+                Object to encode
+
+        Returns
+        -------
+        JSON document, str or UTF-8 bytes
+
+        """
+        return self._dumps(obj)
+
+    def loads(self, data):
+        """
+        Decode a JSON document.
+
+        Parameters
+        ----------
+        data: String or Bytes
+                JSON document
+
+        Returns
+        -------
+        Decoded object
+
+        """
+        return self._loads(data)
+
+
+def _orjson_dumps(obj):
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        pass
+    try:
+        # Non string keys make orjson slower, only allow them on retry
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Types orjson does not know, or integers above 64 bits
+        return json.dumps(obj).encode()
+
+
+STDLIB = Codec('json', json.dumps, json.loads)
+ORJSON = Codec('orjson', _orjson_dumps, orjson.loads) if orjson else None
+
+_codecs = {codec.name: codec for codec in (STDLIB, ORJSON) if codec}
+
+
+def _default():
+    name = os.environ.get('MSA_SDK_JSON', '').lower()
+    if name in _codecs:
+        return _codecs[name]
+    return ORJSON or STDLIB
+
+
+_codec = _default()
+
+
+def get_codec() -> Codec:
+    """
+    Codec in use.
+
+    Returns
+    -------
+    Codec
+
+    """
+    return _codec
+
+
+def configure(name=None, dumps=None, loads=None) -> Codec:
+    """
+    Replace the codec in use.
+
+    Parameters
+    ----------
+    name: String
+            json or orjson, or the name of a custom codec
+            Default: MSA_SDK_JSON, or orjson when installed
+    dumps: Function
+            Encode function of a custom codec
+    loads: Function
+            Decode function of a custom codec
+
+    Returns
+    -------
+    The new codec
+
+    """
+    global _codec  # pylint: disable=global-statement
+    if dumps is not None or loads is not None:
+        _codec = Codec(name or 'custom', dumps or json.dumps,
+                       loads or json.loads)
+    elif name is None:
+        _codec = _default()
+    elif name in _codecs:
+        _codec = _codecs[name]
+    else:
+        raise ValueError('Unknown JSON codec {!r}'.format(name))
+    return _codec
+
+
+def dumps(obj):
+    """
+    Encode an object with the codec in use.
+
+    Parameters
+    ----------
+    obj: Object
+            Object to encode
+
+    Returns
+    -------
+    JSON document, str or UTF-8 bytes
+
+    """
+    return _codec.dumps(obj)
+
+
+def loads(data):
+    """
+    Decode a JSON document with the codec in use.
+
+    Parameters
+    ----------
+    data: String or Bytes
+            JSON document
+
+    Returns
+    -------
+    Decoded object
+
+    """
+    return _codec.loads(data)
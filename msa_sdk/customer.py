@@ -40,7 +40,32 @@ class Customer(MSA_API):
 
         return return_list
 
-    def get_ip_address_list(self, customer_id: int) -> list:
+    def iter_device_list_by_id(self, customer_id: int):
+        """
+
+        Stream device list for the customer.
+
+        The response is parsed as it is received, without buffering the
+        whole list.
+
+        Parameters
+        -------
+        id: Integer
+            MSA ID for customer (subtenant)
+
+        Returns
+        -------
+        Generator of device Id of the customer (subtenant), RuntimeError
+        is raised on an error response
+
+        """
+        self.action = 'Get device list by customer id'
+        self.path = f"/device/v1/customer/{customer_id}/device-features"
+        for device in self._call_get_items():
+            yield device['id']
+
+    def get_ip_address_list(self, customer_id: int,
+                            max_workers=8) -> list:
         """
 
         Get device ip address list for the customer (subtenant).
@@ -49,21 +74,58 @@ class Customer(MSA_API):
         -------
         id: Integer
             MSA ID for customer (subtenant)
+        max_workers: Integer
+            Maximum number of concurrent device reads
 
         Returns
         -------
         return_list: list()
-                     List of device Id of the customer (subtenant)
+                     List of management addresses, in the order of the
+                     customer device list, None for devices that could
+                     not be read
 
         """
-        ip_address_list = []
         devices = self.get_device_list_by_id(customer_id)
-        for device_id in devices:
-            device = Device(device_id=device_id)
-            device.read()
-            ip_address_list.append(device.management_address)
+        addresses = {}
+        for device_id, device, _ in Device.read_many(devices, max_workers):
+            addresses[device_id] = device.management_address \
+                if device else None
 
-        return ip_address_list
+        return [addresses[device_id] for device_id in devices]
+
+    def iter_ip_address_list(self, customer_id: int, max_workers=8,
+                             errors=None):
+        """
+
+        Stream device ip addresses for the customer (subtenant).
+
+        Devices are read concurrently and yielded as each read completes.
+
+        Parameters
+        -------
+        id: Integer
+            MSA ID for customer (subtenant)
+        max_workers: Integer
+            Maximum number of concurrent device reads
+        errors: dict
+            When given, filled with device_id -> exception for the
+            devices that could not be read
+
+        Returns
+        -------
+        Generator of (device_id, management_address) tuples,
+        management_address is None for devices that could not be read
+
+        """
+        devices = self.get_device_list_by_id(customer_id)
+        for device_id, device, error in Device.read_many(devices,
+                                                         max_workers):
+            if error is not None:
+                if errors is not None:
+                    errors[device_id] = error
+                yield device_id, None
+            else:
+                yield device_id, device.management_address
 
     def create_customer_by_prefix(self, prefix: str, name="",
                                   reference="") -> None:
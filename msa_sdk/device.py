@@ -1,5 +1,8 @@
 """Module Device."""
 import json
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 
 from msa_sdk.msa_api import MSA_API
 
@@ -7,6 +10,13 @@ from msa_sdk.msa_api import MSA_API
 class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
     """Class Device."""
 
+    # Attributes filled by read()
+    _READ_FIELDS = ('name', 'manufacturer_id', 'model_id',
+                    'management_address', 'management_interface',
+                    'management_port', 'login', 'password', 'password_admin',
+                    'log_enabled', 'snmp_community', 'device_external',
+                    'hostname')
+
     # pylint: disable=too-many-arguments, too-many-locals
     def __init__(self, customer_id=None, name=None, manufacturer_id=None,
                  model_id=None, login=None, password=None,
@@ -14,7 +24,8 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
                  device_external=None, log_enabled=True,
                  log_more_enabled=True,
                  reporting=False, snmp_community="ubiqube",
-                 device_id=None, management_port=None, hostname=None):
+                 device_id=None, management_port=None, hostname=None,
+                 lazy=False):
         """
         Initialize.
 
@@ -50,6 +61,11 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
                  Hostname
         fail: Bool
               Fail creating the device
+        lazy: Bool
+              Do not read the device now, device attributes are read on
+              first access instead. If that read fails, the access
+              raises RuntimeError with the API message, and the failed
+              response is kept in response and content
 
 
         Returns
@@ -79,9 +95,50 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
         self.management_port = management_port
         self.hostname=hostname
         self.fail = None
+        self._lazy_pending = False
+        self._lazy_error = None
 
         if device_id:
-            self.read()
+            if lazy:
+                self._lazy_pending = True
+                for field in self._READ_FIELDS:
+                    del self.__dict__[field]
+            else:
+                self.read()
+
+    def __getattr__(self, name):
+        """Read the device on first access to a lazy attribute."""
+        if name in Device._READ_FIELDS:
+            if self.__dict__.get('_lazy_pending'):
+                self._lazy_read()
+                return getattr(self, name)
+            if self.__dict__.get('_lazy_error') is not None:
+                raise self._lazy_error
+        raise AttributeError(name)
+
+    def _lazy_read(self):
+        self._lazy_pending = False
+        # Values assigned before the first access win over the read ones
+        assigned = {field: self.__dict__[field]
+                    for field in self._READ_FIELDS if field in self.__dict__}
+        state = (self.path, self.action, self.response, self._content)
+        # Subclasses such as Order replace api_path, the device is always
+        # read from the device API
+        try:
+            read = self._read_path('/device/v3/{}'.format(self.device_id))
+        except Exception:
+            # Network error, read again on the next access
+            self._lazy_pending = True
+            raise
+        if not read:
+            # The failed read is kept in response and content
+            self._lazy_error = RuntimeError(
+                json.loads(self.content)['wo_newparams'])
+            raise self._lazy_error
+        self.path, self.action, self.response, self._content = state
+        for field in self._READ_FIELDS:
+            self.__dict__.setdefault(field, None)
+        self.__dict__.update(assigned)
 
     def _format_path_ref_id(self, by_ref, path):
         del_by = "reference/" + by_ref \
@@ -190,6 +247,7 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
         None
 
         """
+        self.action = 'Activate device'
         self.path = "{}/activate/{}".format(self.api_path, self.device_id)
         self._call_post()
 
@@ -250,13 +308,16 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
         Json formated string
 
         """
-        self.action = 'Read device'
-
         if by_ref:
-            self.path = "{}/{}".format(self.api_path,
-                                       "reference/{}".format(by_ref))
+            path = "{}/{}".format(self.api_path, "reference/{}".format(by_ref))
         else:
-            self.path = '{}/v3/{}'.format(self.api_path, self.device_id)
+            path = '{}/v3/{}'.format(self.api_path, self.device_id)
+        return self._read_path(path)
+
+    def _read_path(self, path):
+        """Read the device attributes from path, False on failure."""
+        self.action = 'Read device'
+        self.path = path
 
         self._call_get()
         if not self.response.ok:
@@ -281,6 +342,59 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
 
         return self.content
 
+    @staticmethod
+    def read_many(device_ids, max_workers=8):
+        """
+        Read many devices over a bounded worker pool.
+
+        Each device is read once, duplicated IDs are skipped. Results are
+        yielded as soon as each read completes, a failed read does not
+        stop the others.
+
+        Parameters
+        ----------
+        device_ids: Iterable
+            Device IDs
+        max_workers: Integer
+            Maximum number of concurrent reads
+
+        Returns
+        --------
+        Generator of (device_id, Device, error) tuples, Device is None
+        and error holds the exception when the read failed
+
+        """
+        def read_one(device_id):
+            device = Device()
+            device.device_id = device_id
+            if device.read() is False:
+                raise RuntimeError(json.loads(device.content)['wo_newparams'])
+            return device
+
+        seen = set()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for device_id in device_ids:
+                if device_id in seen:
+                    continue
+                seen.add(device_id)
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield Device._read_result(pending.pop(future), future)
+                pending[executor.submit(read_one, device_id)] = device_id
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield Device._read_result(pending.pop(future), future)
+
+    @staticmethod
+    def _read_result(device_id, future):
+        error = future.exception()
+        if error is not None:
+            return device_id, None, error
+        return device_id, future.result(), None
+
     def status(self):
         """
         Get device status.
@@ -586,6 +700,9 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
         """
         Get all sorted list of manufacturers with manufacturer Id and name and models with model Id and names.
 
+        The list is shared by the processes of the node when
+        MSA_SDK_SHARED_CACHE_DIR is set.
+
         Parameters
         ----------
         None
@@ -596,7 +713,7 @@ class Device(MSA_API):  # pylint: disable=too-many-instance-attributes
 
         """
         self.path = '/device/v1/manufacturers'
-        self._call_get()
+        self._call_get_shared('manufacturers')
 
         return json.loads(self.content)
 
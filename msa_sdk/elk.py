@@ -1,15 +1,139 @@
 """Elastic search loggin module."""
+import atexit
 import datetime
+import json
 import logging
+import os
+import queue
 import socket
 import sys
+import time
 from enum import Enum
+from threading import Event
 from threading import Lock
-from threading import Timer
+from threading import Thread
 
+from opensearchpy import ConnectionError as EsConnectionError
 from opensearchpy import OpenSearch
+from opensearchpy import TransportError
 from opensearchpy import helpers as eshelpers
 
+RETRYABLE_STATUS = (429, 502, 503, 504)
+
+_LOGGER = logging.getLogger(__name__)
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+def _is_outage(exception):
+    """Return True when an indexing error means ES is unreachable."""
+    if isinstance(exception, EsConnectionError):
+        return True
+    return isinstance(exception, TransportError) and \
+        exception.status_code in RETRYABLE_STATUS
+
+
+class EsSpool():
+    """
+    Disk spool of ES bulk actions.
+
+    Actions are appended as NDJSON lines to segment files in a
+    directory. Segments are named after their creation time so several
+    processes can share the directory, and a segment is claimed by
+    renaming it before it is replayed.
+    """
+
+    SUFFIX = '.ndjson'
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024,
+                 segment_bytes=4 * 1024 * 1024):
+        """
+        Initialize.
+
+        :param directory: directory of the segment files, created if needed
+        :param max_bytes: the oldest segments are dropped above this size
+        :param segment_bytes: a new segment is started above this size
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.dropped = 0
+        self.failed = 0
+        self._segment = None
+
+    def segments(self):
+        """
+        Spooled segments, oldest first.
+
+        :return: A list of segment paths
+        """
+        return [os.path.join(self.directory, name)
+                for name in sorted(os.listdir(self.directory))
+                if name.endswith(EsSpool.SUFFIX)]
+
+    def append(self, actions):
+        """
+        Append bulk actions to the current segment.
+
+        :param actions: A list of bulk actions
+        :return: None
+        """
+        data = ''.join(json.dumps(action, default=str) + '\n'
+                       for action in actions).encode()
+        if self._segment is None or not os.path.exists(self._segment) or \
+                os.path.getsize(self._segment) >= self.segment_bytes:
+            self._segment = os.path.join(
+                self.directory,
+                '{0:020d}-{1}{2}'.format(time.time_ns(), os.getpid(),
+                                         EsSpool.SUFFIX))
+        with open(self._segment, 'ab') as segment:
+            segment.write(data)
+        self.__enforce_cap()
+
+    def __enforce_cap(self):
+        segments = self.segments()
+        sizes = {path: os.path.getsize(path) for path in segments}
+        total = sum(sizes.values())
+        for path in segments:
+            if total <= self.max_bytes or path == self._segment:
+                break
+            with open(path, 'rb') as segment:
+                self.dropped += segment.read().count(b'\n')
+            os.remove(path)
+            total -= sizes[path]
+
+    def replay(self, send):
+        """
+        Send the spooled segments, oldest first.
+
+        A segment is removed once sent. On an outage the segment is put
+        back and replay stops, so records are sent at least once. A
+        segment rejected for another reason is dropped.
+
+        :param send: function called with an iterable of bulk actions
+        :return: False if the cluster is still unreachable
+        """
+        for path in self.segments():
+            claimed = path + '.replay'
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Claimed by another process
+                continue
+            try:
+                with open(claimed, 'rb') as segment:
+                    send(json.loads(line) for line in segment if line.strip())
+            except Exception as exception:
+                if _is_outage(exception):
+                    os.rename(claimed, path)
+                    return False
+                with open(claimed, 'rb') as segment:
+                    self.failed += segment.read().count(b'\n')
+            os.remove(claimed)
+            if path == self._segment:
+                self._segment = None
+        return True
+
 
 # Have a look at https://github.com/cmanaha/python-elasticsearch-logger
 class EsHandler(logging.Handler):
@@ -30,10 +154,6 @@ class EsHandler(logging.Handler):
         MONTHLY = 2
         YEARLY = 3
 
-    __LOGGING_FILTER_FIELDS = ['msecs',
-                               'relativeCreated',
-                               'levelno',
-                               'created']
     @staticmethod
     def _get_daily_index_name(es_index_name):
         """
@@ -55,6 +175,12 @@ class EsHandler(logging.Handler):
     __DEFAULT_ES_DOC_TYPE = 'process-log'
     __DEFAULT_RAISE_ON_EXCEPTION = False
     __DEFAULT_TIMESTAMP_FIELD_NAME = "timestamp"
+    __DEFAULT_QUEUE_SIZE = 10000
+    __DEFAULT_BLOCK_TIMEOUT = 0
+    __DEFAULT_FLUSH_TIMEOUT = 10
+    __DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+    __DEFAULT_SPOOL_SEGMENT_BYTES = 4 * 1024 * 1024
+    __STOP = object()
 
     def __init__(self,
                   hosts=__DEFAULT_ELASTICSEARCH_HOST,
@@ -67,11 +193,35 @@ class EsHandler(logging.Handler):
                  es_additional_fields=__DEFAULT_ADDITIONAL_FIELDS,
                  raise_on_indexing_exceptions=__DEFAULT_RAISE_ON_EXCEPTION,
                  default_timestamp_field_name=__DEFAULT_TIMESTAMP_FIELD_NAME,
-                 context= {}):
+                 context= {},
+                 queue_size=__DEFAULT_QUEUE_SIZE,
+                 block_timeout=__DEFAULT_BLOCK_TIMEOUT,
+                 flush_timeout=__DEFAULT_FLUSH_TIMEOUT,
+                 spool_dir=None,
+                 spool_max_bytes=__DEFAULT_SPOOL_MAX_BYTES,
+                 spool_segment_bytes=__DEFAULT_SPOOL_SEGMENT_BYTES,
+                 es_record_fields=()):
         """
         Initialize a constructor.
-        
-        A constructor.
+
+        Records are queued by emit and indexed by a single flusher thread,
+        in batches of buffer_size records or every flush_frequency_in_sec
+        seconds, whichever comes first.
+
+        :param queue_size: maximum number of records waiting to be indexed
+        :param block_timeout: seconds emit waits for room in a full queue
+            before dropping the record, 0 drops right away
+        :param flush_timeout: seconds flush and close wait for the flusher
+        :param spool_dir: directory where batches are spooled while ES is
+            unreachable, default $MSA_SDK_ES_SPOOL_DIR, None disables it
+        :param spool_max_bytes: maximum size of the spool
+        :param spool_segment_bytes: size of a spool segment file
+        :param raise_on_indexing_exceptions: kept for compatibility,
+            indexing errors are counted and logged, never raised by flush
+            or close, call raise_errors to raise them
+        :param es_record_fields: names of extra LogRecord attributes to
+            index, the message, exception text, level, logger name, time
+            and thread are always indexed
         """
         logging.Handler.__init__(self)
         self.context = context
@@ -84,7 +234,6 @@ class EsHandler(logging.Handler):
         self.es_doc_type = es_doc_type
         self.es_additional_fields = es_additional_fields.copy()
         self.es_additional_fields.update({'host': socket.gethostname(),
-                                         'host_ip': socket.gethostbyname(socket.gethostname()),
                                          'service_id': context['SERVICEINSTANCEID'] if "SERVICEINSTANCEID" in context else "",
                                          'process_id': context['PROCESSINSTANCEID'] if "PROCESSINSTANCEID" in context else "empty",
                                          'trace_id': context['TRACEID'] if "TRACEID" in context else "",
@@ -92,24 +241,156 @@ class EsHandler(logging.Handler):
                                          'task_id': sys.argv[0]
                                          })
         self.raise_on_indexing_exceptions = raise_on_indexing_exceptions
+        self.es_record_fields = tuple(es_record_fields)
         self.default_timestamp_field_name = default_timestamp_field_name
+        self.block_timeout = block_timeout
+        self.flush_timeout = flush_timeout
+        self.dropped = 0
+        self.failed = 0
+        self.spooled = 0
+        self._error = None
+        if spool_dir is None:
+            spool_dir = os.environ.get('MSA_SDK_ES_SPOOL_DIR')
+        self._spool = None
+        if spool_dir:
+            self._spool = EsSpool(spool_dir, spool_max_bytes,
+                                  spool_segment_bytes)
         self._client = None
-        self._buffer = []
-        self._buffer_lock = Lock()
+        self._client_lock = Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
         self._index_name_func = EsHandler._get_daily_index_name
-        self._timer = None
-
-    def __schedule_flush(self):
-        if self._timer is None:
-            self._timer = Timer(self.flush_frequency_in_sec, self.flush)
-            self._timer.setDaemon(True)
-            self._timer.start()
+        self._thread = None
+        self._thread_lock = Lock()
+        self._second = None
+        self._second_str = ''
 
     def __get_es_client(self):
-         return OpenSearch(hosts=self.hosts,
-                                     http_auth=self.auth_details,
-                                     use_ssl=False,
-                                     verify_certs=False)
+        with self._client_lock:
+            if self._client is None:
+                self._client = OpenSearch(hosts=self.hosts,
+                                          http_auth=self.auth_details,
+                                          use_ssl=False,
+                                          verify_certs=False)
+            return self._client
+
+    def __start_flusher(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = Thread(target=self.__run, daemon=True,
+                                      name='EsHandler-flusher')
+                self._thread.start()
+                atexit.register(self.close)
+
+    def __resolve_host_ip(self):
+        """Resolve the host address, a DNS lookup kept off __init__."""
+        try:
+            host_ip = socket.gethostbyname(self.es_additional_fields['host'])
+        except OSError:
+            host_ip = ''
+        self.es_additional_fields['host_ip'] = host_ip
+
+    def __run(self):
+        """Collect queued records into batches and index them."""
+        self.__resolve_host_ip()
+        batch = []
+        deadline = None
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, tuple):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_frequency_in_sec
+                if len(batch) < self.buffer_size:
+                    continue
+            self.__send(batch)
+            batch = []
+            deadline = None
+            if isinstance(item, Event):
+                item.set()
+            elif item is EsHandler.__STOP:
+                return
+
+    def __prepare(self, record):
+        """
+        Capture the indexed fields of a record, on the logging thread.
+
+        Only the message and the exception text are rendered now, so
+        arguments mutated after the call and the state of the exception
+        are logged as they were at call time. The document is built by
+        the flusher thread.
+        """
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        return (record.getMessage(), exc_text, record.levelname,
+                record.name, record.created, record.thread,
+                tuple(getattr(record, name, None)
+                      for name in self.es_record_fields))
+
+    def __serialize(self, fields):
+        """Build the ES document of captured fields, on the flusher thread."""
+        message, exc_text, levelname, name, created, thread, extras = fields
+        rec = self.es_additional_fields.copy()
+        rec.update(zip(self.es_record_fields, extras))
+        rec.update({'message': message, 'exc_text': exc_text or "",
+                    'levelname': levelname, 'name': name, 'thread': thread,
+                    self.default_timestamp_field_name:
+                        self.__get_es_datetime_str(created)})
+        return rec
+
+    def __bulk(self, actions):
+        eshelpers.bulk(
+            client=self.__get_es_client(),
+            actions=actions,
+            stats_only=True
+        )
+
+    def __send(self, batch):
+        if not batch:
+            return
+        index_name = self._index_name_func(self.es_index_name)
+        actions = [
+            {
+                '_index': index_name,
+                '_source': self.__serialize(fields)
+            }
+            for fields in batch
+        ]
+        spool = self._spool
+        try:
+            # Older records first, skip the request if ES is still down
+            if spool is None or spool.replay(self.__bulk):
+                self.__bulk(actions)
+                self._error = None
+                return
+        except Exception as exception:
+            # Logged once until indexing works again, raised only by
+            # raise_errors
+            if self._error is None:
+                _LOGGER.warning('Cannot index log records: %s', exception)
+            self._error = exception
+            if spool is None or not _is_outage(exception):
+                self.failed += len(batch)
+                return
+        try:
+            spool.append(actions)
+            self.spooled += len(batch)
+        except OSError:
+            self.failed += len(batch)
+
+    def __signal(self, item):
+        """Queue a control item for the flusher, False if it is stuck."""
+        try:
+            self._queue.put(item, timeout=self.flush_timeout)
+        except queue.Full:
+            return False
+        return True
     def test_es_source(self):
         """
         Returns True if the handler can ping the Elasticsearch servers.
@@ -121,80 +402,107 @@ class EsHandler(logging.Handler):
         """
         return self.__get_es_client().ping()
 
-    @staticmethod
-    def __get_es_datetime_str(timestamp):
+    def __get_es_datetime_str(self, timestamp):
         """
         Return elasticsearch utc formatted time for an epoch timestamp.
 
+        The date part is formatted once per second, records logged within
+        the same second only add their milliseconds.
+
         :param timestamp: epoch, including milliseconds
         :return: A string valid for elasticsearch time record
         """
-        current_date = datetime.datetime.utcfromtimestamp(timestamp)
-        return "{0!s}.{1:03d}Z".format(current_date.strftime('%Y-%m-%dT%H:%M:%S'), int(current_date.microsecond / 1000))
+        second = int(timestamp)
+        if second != self._second:
+            self._second_str = time.strftime('%Y-%m-%dT%H:%M:%S',
+                                             time.gmtime(second))
+            self._second = second
+        return "{0!s}.{1:03d}Z".format(self._second_str,
+                                      int((timestamp - second) * 1000))
     
     def flush(self):
         """
-        Flushes the buffer into ES.
+        Wait until the records queued so far are sent to ES.
+
+        Indexing errors are never raised here, see raise_errors.
+
+        :return: None
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            done = Event()
+            if self.__signal(done):
+                done.wait(self.flush_timeout)
+
+    def raise_errors(self):
+        """
+        Flush, then raise the indexing error if the last indexing failed.
+
+        Indexing errors are otherwise only counted and logged. The error
+        is cleared once raised.
 
         :return: None
         """
-        if self._timer is not None and self._timer.is_alive():
-            self._timer.cancel()
-        self._timer = None
+        self.flush()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
 
-        if self._buffer:
-            try:
-                with self._buffer_lock:
-                    logs_buffer = self._buffer
-                    self._buffer = []
-                actions = (
-                    {
-                        '_index': self._index_name_func(self.es_index_name),
-                        '_source': log_record
-                    }
-                    for log_record in logs_buffer
-                )
-                eshelpers.bulk(
-                    client=self.__get_es_client(),
-                    actions=actions,
-                    stats_only=True
-                )
-            except Exception as exception:
-                if self.raise_on_indexing_exceptions:
-                    # Do nothing.
-                    return
     def close(self):
         """
-        Flushes the buffer and release any outstanding resource.
+        Flushes the queue and stops the flusher thread.
 
         :return: None
         """
-        if self._timer is not None:
-            self.flush()
-        self._timer = None
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            if self.__signal(EsHandler.__STOP):
+                thread.join(self.flush_timeout)
+        atexit.unregister(self.close)
+        logging.Handler.close(self)
+
+    def handle(self, record):
+        """
+        Filter and emit a record without taking the handler lock.
+
+        emit only queues the record, which is already thread safe.
+
+        :param record: A class of type ```logging.LogRecord```
+        :return: The filter result
+        """
+        if record.name == __name__:
+            # Indexing errors of this handler, not indexed
+            return False
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):
+            record = result
+        if result:
+            self.emit(record)
+        return result
 
     def emit(self, record):
         """
         Emit overrides the abstract logging.Handler logRecord emit method.
 
-        Format and records the log
+        The fields of the record are captured here, then queued for the
+        flusher thread which builds the ES documents and sends them.
 
         :param record: A class of type ```logging.LogRecord```
         :return: None
         """
-        self.format(record)
-
-        rec = self.es_additional_fields.copy()
-        for key, value in record.__dict__.items():
-            if key not in EsHandler.__LOGGING_FILTER_FIELDS:
-                if key == "args":
-                    value = tuple(str(arg) for arg in value)
-                rec[key] = "" if value is None else value
-        rec[self.default_timestamp_field_name] = self.__get_es_datetime_str(record.created)
-        with self._buffer_lock:
-            self._buffer.append(rec)
-
-        if len(self._buffer) >= self.buffer_size:
-            self.flush()
-        else:
-            self.__schedule_flush()
+        if self._thread is None:
+            self.__start_flusher()
+        try:
+            fields = self.__prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            if self.block_timeout:
+                self._queue.put(fields, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
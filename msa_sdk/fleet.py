@@ -0,0 +1,266 @@
+"""
+Module fleet.
+
+Synchronization of many devices at once. Synchronizations are started
+with Order.command_synchronize_async, at most max_in_flight devices at a
+time, and their status is polled by a single scheduler until it is
+final. Failed synchronizations are started again up to retries times,
+and each device yields one event when it is done. A device whose
+synchronization timed out stays in flight and is polled until that
+synchronization ends, it is never started twice at once.
+"""
+import heapq
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from msa_sdk import constants
+from msa_sdk.order import Order
+from msa_sdk.polling import Backoff
+from msa_sdk.polling import PollScheduler
+from msa_sdk.polling import RateLimiter
+
+OK = 'OK'
+TIMEOUT = 'TIMEOUT'
+
+_START = 'start'
+_POLL = 'poll'
+
+
+class SyncEvent():
+    """Outcome of the synchronization of one device."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, device_id, status, attempts, elapsed, error=None,
+                 response=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+        status: String
+                OK, FAIL or TIMEOUT
+        attempts: Integer
+                Number of synchronizations started
+        elapsed: Float
+                Seconds from the first start to the end
+        error: String
+                Error of the last attempt
+        response: Dictionary
+                Last synchronization status read
+
+        """
+        self.device_id = device_id
+        self.status = status
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.error = error
+        self.response = response
+
+    @property
+    def ok(self):
+        """Tell if the device is synchronized."""
+        return self.status == OK
+
+    def to_dict(self):
+        """Return the event as a dictionary."""
+        return {'device_id': self.device_id, 'status': self.status,
+                'attempts': self.attempts, 'elapsed': self.elapsed,
+                'error': self.error}
+
+
+# pylint: disable=too-many-instance-attributes
+class FleetSynchronizer():
+    """Synchronize many devices with a bounded number in flight."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_in_flight=50, max_workers=8, timeout=900,
+                 interval=10, retries=2, retry_delay=30, max_rate=None,
+                 clock=None, sleep=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        max_in_flight: Integer
+                Maximum number of devices synchronizing at a time
+        max_workers: Integer
+                Maximum number of concurrent requests, starts and status
+                polls together
+        timeout: Float
+                Seconds to wait for one synchronization of a device
+        interval: Float
+                Maximum interval between two polls of a device
+        retries: Integer
+                Number of times a failed synchronization is started again
+        retry_delay: Float
+                Seconds before starting a failed synchronization again
+        max_rate: Float
+                Maximum number of status polls per second, no limit if
+                None
+        clock: Function
+                Monotonic clock, default time.monotonic
+        sleep: Function
+                Sleep function, default time.sleep
+
+        """
+        self.max_in_flight = max_in_flight
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.interval = interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_rate = max_rate
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+
+    @staticmethod
+    def _start(device_id):
+        order = Order(device_id, lazy=True)
+        order.command_synchronize_async()
+        if not order.response.ok:
+            raise RuntimeError(json.loads(order.content)['wo_newparams'])
+
+    @staticmethod
+    def _status(device_id):
+        order = Order(device_id, lazy=True)
+        try:
+            response = order.get_synchronize_status()
+        except Exception:
+            # Network error or garbage, try again on the next poll
+            return None
+        return response if order.response.ok else None
+
+    @staticmethod
+    def _final(response):
+        return isinstance(response, dict) and \
+            response.get('status') not in (None, constants.RUNNING)
+
+    @staticmethod
+    def _succeeded(response):
+        return response.get('status') in (constants.ENDED, OK)
+
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+    def run(self, device_ids):
+        """
+        Synchronize devices.
+
+        Parameters
+        ----------
+        device_ids: Iterable
+                Device IDs, read as room frees up in the window, duplicated
+                IDs are skipped
+
+        Returns
+        -------
+        Generator of SyncEvent in completion order
+
+        """
+        device_ids = iter(device_ids)
+        rate_limiter = RateLimiter(self.max_rate) if self.max_rate else None
+        scheduler = PollScheduler(self._status, self._final, self.timeout,
+                                  Backoff(max_interval=self.interval),
+                                  clock=self.clock, sleep=self.sleep,
+                                  rate_limiter=rate_limiter)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        running = {}
+        # Devices in flight: [attempts, start time, last error]
+        flight = {}
+        # Devices timed out, polled until their synchronization ends
+        draining = set()
+        seen = set()
+        delayed = []
+        exhausted = False
+
+        def start(device_id):
+            running[executor.submit(self._start, device_id)] = \
+                (_START, device_id)
+
+        def failed(device_id, status, error, response=None):
+            """Start again or return the final event of a failure."""
+            state = flight[device_id]
+            state[2] = error
+            if state[0] <= self.retries:
+                state[0] += 1
+                heapq.heappush(delayed, (self.clock() + self.retry_delay,
+                                         device_id))
+                return None
+            del flight[device_id]
+            return SyncEvent(device_id, status, state[0],
+                             self.clock() - state[1], error, response)
+
+        try:
+            while True:
+                now = self.clock()
+                while delayed and delayed[0][0] <= now:
+                    start(heapq.heappop(delayed)[1])
+                while not exhausted and len(flight) < self.max_in_flight:
+                    device_id = next(device_ids, None)
+                    if device_id is None:
+                        exhausted = True
+                    elif device_id not in seen:
+                        seen.add(device_id)
+                        flight[device_id] = [1, now, None]
+                        start(device_id)
+
+                for device_id in scheduler.pop_due(block=False):
+                    running[executor.submit(scheduler.poll_key,
+                                            device_id)] = (_POLL, device_id)
+                dues = [due for due in (scheduler.next_due(),
+                                        delayed[0][0] if delayed else None)
+                        if due is not None]
+                if not running and not dues:
+                    break
+                timeout = max(0, min(dues) - self.clock()) if dues else None
+                if not running:
+                    self.sleep(timeout)
+                    continue
+
+                done, _ = wait(running, timeout=timeout,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, device_id = running.pop(future)
+                    event = None
+                    if kind == _START:
+                        error = future.exception()
+                        if error is None:
+                            scheduler.add(device_id)
+                        else:
+                            event = failed(device_id, constants.FAILED,
+                                           str(error))
+                    else:
+                        response = future.result()
+                        final = scheduler.settle(device_id, response)
+                        if final is None:
+                            continue
+                        if not final and device_id not in draining and \
+                                flight[device_id][0] <= self.retries:
+                            # Still running on the device, wait for it to
+                            # end before starting again
+                            draining.add(device_id)
+                            scheduler.add(device_id)
+                            continue
+                        draining.discard(device_id)
+                        if not final:
+                            state = flight.pop(device_id)
+                            event = SyncEvent(device_id, TIMEOUT, state[0],
+                                              self.clock() - state[1],
+                                              'Synchronization timed out',
+                                              response)
+                        elif self._succeeded(response):
+                            state = flight.pop(device_id)
+                            event = SyncEvent(device_id, OK, state[0],
+                                              self.clock() - state[1],
+                                              response=response)
+                        else:
+                            event = failed(device_id, constants.FAILED,
+                                           response.get('message') or
+                                           response['status'], response)
+                    if event is not None:
+                        yield event
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
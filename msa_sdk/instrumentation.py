@@ -0,0 +1,491 @@
+"""
+Module instrumentation.
+
+Hooks called around every API request made by MSA_API, and an
+aggregator of per-endpoint latencies::
+
+    aggregator = instrumentation.Aggregator().install()
+    ...
+    aggregator.print_summary()
+
+Setting MSA_SDK_INSTRUMENTATION=1 installs an aggregator logging its
+summary in the process log at exit.
+"""
+import atexit
+import bisect
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger("msa-sdk")
+
+_before_hooks = []
+_after_hooks = []
+_hooks_lock = threading.Lock()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+_ID_RE = re.compile(r'/\d+(?=/|$)')
+
+
+class RequestRecord():
+    """One API request, filled before and after it is sent."""
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, method, path, action, headers, data=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        method: String
+                HTTP method
+        path: String
+                Path below the API URL, with its query string
+        action: String
+                Action of the MSA_API object making the request
+        headers: Dictionary
+                Request headers, hooks may change them
+        data: String
+                Request body
+
+        """
+        self.method = method
+        self.path = path
+        self.action = action
+        self.headers = headers
+        self.bytes_sent = _size(data)
+        self.bytes_received = 0
+        self.status_code = None
+        self.retries = 0
+        self.error = None
+        self.trace_id, self.span_id = _parse_traceparent(
+            headers.get('traceparent'))
+        if self.span_id is None:
+            self.span_id = new_span_id()
+        self.parent_span_id = headers.get('X-B3-ParentSpanId')
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.elapsed = None
+
+    @property
+    def endpoint(self):
+        """Method and path, without query string and with ids replaced."""
+        return '{} {}'.format(self.method,
+                              _ID_RE.sub('/{id}', self.path.split('?')[0]))
+
+    @property
+    def ok(self):
+        """True if the request got a non error response."""
+        return self.error is None and self.status_code is not None and \
+            self.status_code < 400
+
+    def finish(self, response=None, error=None):
+        """
+        Record the outcome of the request.
+
+        Parameters
+        ----------
+        response: requests.Response
+                Response, None if the request raised
+        error: Exception
+                Exception raised by the request
+
+        Returns
+        -------
+        None
+
+        """
+        self.elapsed = time.perf_counter() - self._start
+        self.error = error
+        if response is not None:
+            self.status_code = response.status_code
+            self.bytes_received = _received(response)
+            self.retries = _retries(response)
+
+    def to_span(self):
+        """
+        Request as an OpenTelemetry style span.
+
+        The trace and span ids are the ones of the traceparent header
+        sent with the request.
+
+        Returns
+        -------
+        Dictionary
+
+        """
+        start = int(self.start_time * 1e9)
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id,
+            'name': str(self.action),
+            'kind': 'SPAN_KIND_CLIENT',
+            'startTimeUnixNano': start,
+            'endTimeUnixNano': start + int((self.elapsed or 0) * 1e9),
+            'attributes': {
+                'http.method': self.method,
+                'http.target': self.path,
+                'http.route': self.endpoint.split(' ', 1)[1],
+                'http.status_code': self.status_code,
+                'http.request_content_length': self.bytes_sent,
+                'http.response_content_length': self.bytes_received,
+                'http.retry_count': self.retries,
+            },
+            'status': {'code': 'STATUS_CODE_OK' if self.ok
+                       else 'STATUS_CODE_ERROR'},
+        }
+
+
+def new_span_id():
+    """
+    Random W3C span id.
+
+    Returns
+    -------
+    16 hexadecimal digits
+
+    """
+    return '%016x' % random.getrandbits(64)
+
+
+def _size(data):
+    if isinstance(data, (str, bytes, bytearray)):
+        return len(data)
+    return 0
+
+
+def _received(response):
+    """Body size, without reading the body of a streamed response."""
+    # requests keeps the body in _content once read, False before
+    content = getattr(response, '_content', None)
+    if isinstance(content, bytes):
+        return len(content)
+    length = getattr(response, 'headers', {}).get('Content-Length')
+    return int(length) if isinstance(length, str) and length.isdigit() \
+        else 0
+
+
+def _retries(response):
+    """Retries made by urllib3 before the response, 0 if unknown."""
+    history = getattr(getattr(getattr(response, 'raw', None), 'retries',
+                              None), 'history', None)
+    return len(history) if isinstance(history, tuple) else 0
+
+
+def _parse_traceparent(traceparent):
+    parts = traceparent.split('-') if isinstance(traceparent, str) else []
+    if len(parts) == 4:
+        return parts[1], parts[2]
+    return None, None
+
+
+def add_hooks(before=None, after=None):
+    """
+    Register hooks called around every API request.
+
+    Parameters
+    ----------
+    before: Function
+            Called with the RequestRecord before the request is sent
+    after: Function
+            Called with the finished RequestRecord
+
+    Returns
+    -------
+    None
+
+    """
+    with _hooks_lock:
+        if before is not None:
+            _before_hooks.append(before)
+        if after is not None:
+            _after_hooks.append(after)
+
+
+def remove_hooks(before=None, after=None):
+    """
+    Unregister hooks added by add_hooks.
+
+    Parameters
+    ----------
+    before: Function
+            Hook to remove
+    after: Function
+            Hook to remove
+
+    Returns
+    -------
+    None
+
+    """
+    with _hooks_lock:
+        if before in _before_hooks:
+            _before_hooks.remove(before)
+        if after in _after_hooks:
+            _after_hooks.remove(after)
+
+
+def start(method, path, action, headers, data=None):
+    """
+    Open a record for a request, None when no hook is registered.
+
+    Parameters
+    ----------
+    method: String
+            HTTP method
+    path: String
+            Path below the API URL
+    action: String
+            Action of the MSA_API object
+    headers: Dictionary
+            Request headers
+    data: String
+            Request body
+
+    Returns
+    -------
+    RequestRecord or None
+
+    """
+    if not _before_hooks and not _after_hooks:
+        return None
+    record = RequestRecord(method, path, action, headers, data)
+    for hook in list(_before_hooks):
+        _call_hook(hook, record)
+    return record
+
+
+def finish(record, response=None, error=None):
+    """
+    Close a record opened by start and call the after hooks.
+
+    Parameters
+    ----------
+    record: RequestRecord
+            Record returned by start, may be None
+    response: requests.Response
+            Response, None if the request raised
+    error: Exception
+            Exception raised by the request
+
+    Returns
+    -------
+    None
+
+    """
+    if record is None:
+        return
+    record.finish(response, error)
+    for hook in list(_after_hooks):
+        _call_hook(hook, record)
+
+
+def _call_hook(hook, record):
+    try:
+        hook(record)
+    except Exception:  # pylint: disable=broad-except
+        # A broken hook must not break the API call
+        logger.exception('Instrumentation hook %r failed', hook)
+
+
+class Aggregator():
+    """Collect request records and summarize them per endpoint."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, keep_records=True):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        buckets: Tuple
+                Upper bounds in seconds of the histogram buckets
+        keep_records: Bool
+                Keep every record, needed to export spans
+
+        """
+        self.buckets = tuple(buckets)
+        self.keep_records = keep_records
+        self.records = []
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        """Add a finished record, usable as an after hook."""
+        with self._lock:
+            if self.keep_records:
+                self.records.append(record)
+            stats = self._endpoints.get(record.endpoint)
+            if stats is None:
+                stats = self._endpoints[record.endpoint] = {
+                    'count': 0, 'errors': 0, 'retries': 0,
+                    'bytes_sent': 0, 'bytes_received': 0,
+                    'elapsed': [],
+                    'histogram': [0] * (len(self.buckets) + 1),
+                }
+            stats['count'] += 1
+            stats['errors'] += 0 if record.ok else 1
+            stats['retries'] += record.retries
+            stats['bytes_sent'] += record.bytes_sent
+            stats['bytes_received'] += record.bytes_received
+            stats['elapsed'].append(record.elapsed)
+            stats['histogram'][bisect.bisect_left(self.buckets,
+                                                  record.elapsed)] += 1
+
+    def install(self, at_exit=False):
+        """
+        Register the aggregator as an after hook.
+
+        Parameters
+        ----------
+        at_exit: Bool
+                Also log the summary when the process exits
+
+        Returns
+        -------
+        The aggregator
+
+        """
+        add_hooks(after=self)
+        if at_exit:
+            atexit.register(self.log_summary)
+        return self
+
+    def uninstall(self):
+        """
+        Unregister the aggregator.
+
+        Returns
+        -------
+        None
+
+        """
+        remove_hooks(after=self)
+        atexit.unregister(self.log_summary)
+
+    def summary(self):
+        """
+        Statistics per endpoint.
+
+        Returns
+        -------
+        Dictionary endpoint -> count, errors, retries, bytes_sent,
+        bytes_received, total, mean, p50, p95, max and histogram, a list
+        of (upper bound in seconds or None, count)
+
+        """
+        with self._lock:
+            summary = {}
+            for endpoint, stats in sorted(self._endpoints.items()):
+                elapsed = sorted(stats['elapsed'])
+                total = sum(elapsed)
+                summary[endpoint] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'bytes_sent': stats['bytes_sent'],
+                    'bytes_received': stats['bytes_received'],
+                    'total': total,
+                    'mean': total / len(elapsed),
+                    'p50': _percentile(elapsed, 0.5),
+                    'p95': _percentile(elapsed, 0.95),
+                    'max': elapsed[-1],
+                    'histogram': list(zip(self.buckets + (None,),
+                                          stats['histogram'])),
+                }
+            return summary
+
+    def format_summary(self):
+        """
+        Summary as text, one histogram per endpoint.
+
+        Returns
+        -------
+        String
+
+        """
+        lines = []
+        for endpoint, stats in self.summary().items():
+            lines.append(
+                '{} count={} errors={} retries={} mean={:.1f}ms '
+                'p50={:.1f}ms p95={:.1f}ms max={:.1f}ms in={}B out={}B'
+                .format(endpoint, stats['count'], stats['errors'],
+                        stats['retries'], stats['mean'] * 1000,
+                        stats['p50'] * 1000, stats['p95'] * 1000,
+                        stats['max'] * 1000, stats['bytes_received'],
+                        stats['bytes_sent']))
+            width = max(count for _, count in stats['histogram'])
+            for bound, count in stats['histogram']:
+                if not count:
+                    continue
+                label = '<= {:g}ms'.format(bound * 1000) if bound else \
+                    '>  {:g}ms'.format(self.buckets[-1] * 1000)
+                lines.append('  {:>12} {:>6} {}'.format(
+                    label, count, '#' * max(1, round(40 * count / width))))
+        return '\n'.join(lines)
+
+    def print_summary(self, file=None):
+        """
+        Print the summary, on stderr by default.
+
+        Parameters
+        ----------
+        file: File
+                Output file
+
+        Returns
+        -------
+        None
+
+        """
+        print(self.format_summary(), file=file or sys.stderr)
+
+    def log_summary(self):
+        """
+        Write the summary in the process log.
+
+        Returns
+        -------
+        None
+
+        """
+        if self._endpoints:
+            logger.info('API requests:\n%s', self.format_summary())
+
+    def spans(self):
+        """
+        Export the recorded requests as OpenTelemetry style spans.
+
+        Returns
+        -------
+        List of dictionaries
+
+        """
+        with self._lock:
+            return [record.to_span() for record in self.records]
+
+
+def _percentile(values, fraction):
+    """Nearest rank percentile of sorted values."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def install_from_env():
+    """
+    Install a summary logged at exit if MSA_SDK_INSTRUMENTATION is set.
+
+    Returns
+    -------
+    The aggregator or None
+
+    """
+    if os.environ.get('MSA_SDK_INSTRUMENTATION', '') in ('', '0', 'false'):
+        return None
+    return Aggregator(keep_records=False).install(at_exit=True)
@@ -0,0 +1,379 @@
+"""
+Module inventory.
+
+Snapshot of the devices held locally, so finding a device by management
+address, hostname, model or tag does not read every device again. The
+devices are read once over a worker pool, then looked up in indexes
+kept in memory. The snapshot can be refreshed for some devices only,
+synchronized with the device list of a customer, and saved to a file.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from msa_sdk import codec
+from msa_sdk.customer import Customer
+from msa_sdk.device import Device
+
+INDEXES = ('external_reference', 'management_address', 'hostname',
+           'customer_id', 'manufacturer_id', 'model_id', 'tags')
+
+
+def _parse_tags(content):
+    """Tag names of a labels response, a list of names or of objects."""
+    try:
+        labels = json.loads(content)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(labels, list):
+        return []
+    tags = []
+    for label in labels:
+        if isinstance(label, dict):
+            label = label.get('value', label.get('name'))
+        if label is not None:
+            tags.append(str(label))
+    return tags
+
+
+class Inventory():
+    """Devices indexed by id, reference, address, customer, model and tag."""
+
+    def __init__(self, records=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        records: Iterable
+                Device records, as returned by get
+
+        """
+        self._records = {}
+        self._indexes = {name: {} for name in INDEXES}
+        for record in records or ():
+            self.add(record)
+
+    def __len__(self):
+        """Count the devices."""
+        return len(self._records)
+
+    def __contains__(self, device_id):
+        """Tell if a device is in the inventory."""
+        return device_id in self._records
+
+    def __iter__(self):
+        """Iterate over the records, ordered by device ID."""
+        return iter([self._records[device_id]
+                     for device_id in sorted(self._records)])
+
+    @staticmethod
+    def record(device, customer_id=None, tags=None):
+        """
+        Record of a device read from the API.
+
+        Parameters
+        ----------
+        device: Device
+                Device read with Device.read
+        customer_id: Integer
+                Customer of the device, if known
+        tags: List
+                Tags of the device
+
+        Returns
+        -------
+        Dictionary, without the credentials of the device
+
+        """
+        return {
+            'id': device.device_id,
+            'name': device.name,
+            'external_reference': device.device_external,
+            'management_address': device.management_address,
+            'management_port': device.management_port,
+            'hostname': device.hostname,
+            'manufacturer_id': device.manufacturer_id,
+            'model_id': device.model_id,
+            'customer_id': customer_id,
+            'tags': list(tags or []),
+        }
+
+    def add(self, record):
+        """
+        Add or replace the record of a device.
+
+        Parameters
+        ----------
+        record: Dictionary
+                Device record
+
+        Returns
+        -------
+        None
+
+        """
+        self.remove(record['id'])
+        self._records[record['id']] = record
+        for name in INDEXES:
+            values = record.get(name)
+            if name != 'tags':
+                values = [values]
+            for value in values or ():
+                if value is not None:
+                    self._indexes[name].setdefault(value, set()).add(
+                        record['id'])
+
+    def remove(self, device_id):
+        """
+        Remove a device.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+
+        Returns
+        -------
+        The removed record, None if the device was not in the inventory
+
+        """
+        record = self._records.pop(device_id, None)
+        if record is None:
+            return None
+        for name in INDEXES:
+            values = record.get(name)
+            if name != 'tags':
+                values = [values]
+            index = self._indexes[name]
+            for value in values or ():
+                ids = index.get(value)
+                if ids is not None:
+                    ids.discard(device_id)
+                    if not ids:
+                        del index[value]
+        return record
+
+    def get(self, device_id):
+        """
+        Get the record of a device.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+
+        Returns
+        -------
+        Dictionary, None if the device is not in the inventory
+
+        """
+        return self._records.get(device_id)
+
+    def find(self, **criteria):
+        """
+        Find the devices matching all the criteria.
+
+        Parameters
+        ----------
+        criteria: Index names and values, for instance
+                management_address='10.0.0.1' or tags='core'
+
+        Returns
+        -------
+        List of records, ordered by device ID
+
+        """
+        ids = None
+        for name, value in criteria.items():
+            if name not in self._indexes:
+                raise ValueError('Unknown index {}, expected one of {}'.format(
+                    name, ', '.join(INDEXES)))
+            matches = self._indexes[name].get(value, set())
+            ids = set(matches) if ids is None else ids & matches
+            if not ids:
+                return []
+        if ids is None:
+            return list(self)
+        return [self._records[device_id] for device_id in sorted(ids)]
+
+    def values(self, name):
+        """
+        Distinct values of an index.
+
+        Parameters
+        ----------
+        name: String
+                Index name, one of INDEXES
+
+        Returns
+        -------
+        Dictionary of value: number of devices
+
+        """
+        return {value: len(ids) for value, ids in self._indexes[name].items()}
+
+    def load(self, device_ids, customer_id=None, tags=False, max_workers=8):
+        """
+        Read devices and add them, replacing the records already held.
+
+        Parameters
+        ----------
+        device_ids: Iterable
+                Device IDs
+        customer_id: Integer
+                Customer of the devices, if known
+        tags: Bool
+                Also read the tags of each device
+        max_workers: Integer
+                Maximum number of concurrent reads
+
+        Returns
+        -------
+        Dictionary of device_id: error of the devices which could not be
+        read, their previous record is kept
+
+        """
+        errors = {}
+        devices = []
+        for device_id, device, error in Device.read_many(device_ids,
+                                                         max_workers):
+            if error is not None:
+                errors[device_id] = error
+            else:
+                devices.append(device)
+
+        device_tags = {}
+        if tags and devices:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for device, result in zip(devices, executor.map(
+                        self._read_tags, devices)):
+                    if isinstance(result, Exception):
+                        errors[device.device_id] = result
+                    else:
+                        device_tags[device.device_id] = result
+
+        for device in devices:
+            previous = self._records.get(device.device_id, {})
+            if customer_id is None:
+                owner = previous.get('customer_id')
+            else:
+                owner = customer_id
+            self.add(self.record(
+                device, owner,
+                device_tags.get(device.device_id, previous.get('tags'))))
+        return errors
+
+    @staticmethod
+    def _read_tags(device):
+        """Tags of a device, or the error of the read, never raises."""
+        try:
+            device.get_tags()
+            if not device.response.ok:
+                return RuntimeError(
+                    json.loads(device.content)['wo_newparams'])
+            return _parse_tags(device.content)
+        except Exception as error:
+            return error
+
+    def refresh(self, device_ids=None, tags=False, max_workers=8):
+        """
+        Read some devices again.
+
+        Parameters
+        ----------
+        device_ids: Iterable
+                Device IDs, default all the devices of the inventory
+        tags: Bool
+                Also read the tags again
+        max_workers: Integer
+                Maximum number of concurrent reads
+
+        Returns
+        -------
+        Dictionary of device_id: error of the devices which could not be
+        read
+
+        """
+        if device_ids is None:
+            device_ids = sorted(self._records)
+        return self.load(device_ids, tags=tags, max_workers=max_workers)
+
+    def sync_customer(self, customer_id, tags=False, max_workers=8):
+        """
+        Follow the device list of a customer.
+
+        Only the devices added since the last synchronization are read,
+        the devices the customer no longer holds are removed.
+
+        Parameters
+        ----------
+        customer_id: Integer
+                MSA ID for customer (subtenant)
+        tags: Bool
+                Read the tags of the new devices
+        max_workers: Integer
+                Maximum number of concurrent reads
+
+        Returns
+        -------
+        Dictionary of device_id: error of the devices which could not be
+        read
+
+        Raises
+        ------
+        RuntimeError when the device list cannot be read, the inventory
+        is then left unchanged
+
+        """
+        # The whole list is read before anything is removed, a failed
+        # list call must not look like a customer without devices
+        try:
+            listed = set(Customer().iter_device_list_by_id(customer_id))
+        except Exception as error:
+            raise RuntimeError('Cannot list the devices of customer {}: {}'
+                               .format(customer_id, error)) from error
+        for record in self.find(customer_id=customer_id):
+            if record['id'] not in listed:
+                self.remove(record['id'])
+        new_ids = sorted(device_id for device_id in listed
+                         if self._records.get(device_id, {}).get(
+                             'customer_id') != customer_id)
+        return self.load(new_ids, customer_id, tags, max_workers)
+
+    def save(self, path):
+        """
+        Save the inventory to a JSON file.
+
+        Parameters
+        ----------
+        path: String
+                File path
+
+        Returns
+        -------
+        None
+
+        """
+        document = codec.dumps(list(self))
+        if isinstance(document, str):
+            document = document.encode()
+        with open(path, 'wb') as inventory_file:
+            inventory_file.write(document)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Inventory saved by save.
+
+        Parameters
+        ----------
+        path: String
+                File path
+
+        Returns
+        -------
+        Inventory
+
+        """
+        with open(path, 'rb') as inventory_file:
+            return cls(codec.loads(inventory_file.read()))
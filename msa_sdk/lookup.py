@@ -4,7 +4,12 @@ from msa_sdk.msa_api import MSA_API
 
 
 class Lookup(MSA_API):
-    """Class Lookup."""
+    """
+    Class Lookup.
+
+    The customer, manager and sec node lists go through the shared
+    lookup cache, see msa_sdk.shared_cache.
+    """
 
     def __init__(self):
         """Initialize."""
@@ -24,6 +29,21 @@ class Lookup(MSA_API):
         self.path = '{}/devices'.format(self.api_path)
         self._call_get()
 
+    def iter_device_ids(self):
+        """Stream the device ids list.
+
+        The response is parsed as it is received, without buffering the
+        whole list.
+
+        Returns
+        -------
+        Generator of device dictionaries
+
+        """
+        self.action = 'Get device ids'
+        self.path = '{}/devices'.format(self.api_path)
+        yield from self._call_get_items()
+
     def look_list_customer_ids(self):
         """Look list customer ids.
 
@@ -34,7 +54,7 @@ class Lookup(MSA_API):
         """
         self.action = 'Get customer ids'
         self.path = '{}/customers'.format(self.api_path)
-        self._call_get()
+        self._call_get_shared('customers')
 
     def look_list_manager_ids(self):
         """Look list manager ids.
@@ -46,7 +66,7 @@ class Lookup(MSA_API):
         """
         self.action = 'Get manager ids'
         self.path = '{}/managers'.format(self.api_path)
-        self._call_get()
+        self._call_get_shared('managers')
 
     def look_list_operators_id(self, manager_id):
         """Look list operators id.
@@ -75,7 +95,7 @@ class Lookup(MSA_API):
         """
         self.action = 'Get sec nodes'
         self.path = '{}/sec_nodes'.format(self.api_path)
-        self._call_get()
+        self._call_get_shared('sec_nodes')
 
     def look_list_device_by_customer_ref(self, custom_ref):
         """Look list device by customer reference.
@@ -1,19 +1,43 @@
-"""Module msa_api."""
+"""
+Module msa_api.
+
+requests and the modules of the SDK used to send a request are imported
+by the first request, so a task only pays for what it uses.
+"""
 import json
 import logging
 import os
 import random
 import sys
+import threading
+from typing import TYPE_CHECKING
 from typing import Optional
 
-import requests
-from requests import Response
-
+import msa_sdk
 from msa_sdk import constants
-from msa_sdk import context
+
+if TYPE_CHECKING:
+    from requests import Response
 
 logger = logging.getLogger("msa-sdk")
 
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def _instrumentation():
+    """Instrumentation module, hooks of the environment installed once."""
+    global _hooks_installed  # pylint: disable=global-statement
+    from msa_sdk import instrumentation
+    if not _hooks_installed:
+        with _hooks_lock:
+            if not _hooks_installed:
+                from msa_sdk import tracing
+                instrumentation.install_from_env()
+                tracing.install_from_env()
+                _hooks_installed = True
+    return instrumentation
+
 def host_port() -> tuple[str, str]:
     """
     Hostname and port of the API.
@@ -41,9 +65,10 @@ class MSA_API():  # pylint: disable=invalid-name
         """Initialize."""
         self.url: str = 'http://{}:{}/ubi-api-rest'.format(*host_port())
         self.path: str = ""
-        self.response: Optional[Response] = None
+        self.response: Optional['Response'] = None
         self.log_response: bool = True
-        self._content: str = ""
+        # None until the response text is read
+        self._content: Optional[str] = ""
         self.action = self.__class__
 
     @classmethod
@@ -194,28 +219,58 @@ class MSA_API():  # pylint: disable=invalid-name
         """
         Property API Token.
 
+        Tokens are shared process-wide and only fetched again when they
+        are about to expire.
+
         Returns
         -------
         Token
 
         """
-        try:
-            url = os.environ.get('API_TOKEN_URL') or "http://msa-auth:8080/auth/realms/msa/protocol/openid-connect/token"
-            params = {"client_id": os.environ.get("CLIENT_ID"), "grant_type": "client_credentials", "client_secret" : os.environ.get("CLIENT_SECRET")}
-            response = requests.post(url, data=params)
-            data = response.json()
-            access_token = data["access_token"]
-        except Exception:
-            return "12345qwert"
-        return access_token
+        from msa_sdk import auth
+        url = os.environ.get('API_TOKEN_URL') or auth.DEFAULT_TOKEN_URL
+        return auth.token_cache.get(url, os.environ.get("CLIENT_ID"),
+                                    os.environ.get("CLIENT_SECRET"))
+
+    @staticmethod
+    def _invalidate_token(headers):
+        """Drop the cached token of a request rejected with 401."""
+        from msa_sdk import auth
+        authorization = headers.get('Authorization') or ''
+        if not authorization.startswith('Bearer '):
+            return
+        url = os.environ.get('API_TOKEN_URL') or auth.DEFAULT_TOKEN_URL
+        auth.token_cache.invalidate(url, os.environ.get("CLIENT_ID"),
+                                    authorization[len('Bearer '):])
 
     @property
     def content(self):
         """Content of the response."""
+        if self._content is None:
+            self._content = self.response.text
         if not self._content:
             return '{}'
         return self._content
 
+    def content_json(self):
+        """
+        Content of the response, decoded.
+
+        The body bytes are handed to the JSON codec as received, without
+        decoding them to text first.
+
+        Returns
+        -------
+        Decoded JSON content
+
+        """
+        from msa_sdk import codec
+        if self._content is None:
+            body = getattr(self.response, 'content', None)
+            if isinstance(body, (bytes, str)) and body:
+                return codec.loads(body)
+        return codec.loads(self.content)
+
     def check_response(self):
         """
         Check response of a POST/GET/PUT/DELETE.
@@ -252,39 +307,186 @@ class MSA_API():  # pylint: disable=invalid-name
             data = {}
 
         if isinstance(data, (dict, list)):
-            data = json.dumps(data)
+            from msa_sdk import codec
+            data = codec.dumps(data)
         else:
             raise TypeError('Parameters needs to be a dictionary or a list')
 
-        url = self.url + self.path
-        self.response = requests.post(url, headers=headers, data=data,
-                                      timeout=timeout)
-        self._content = self.response.text
-        self.check_response()
+        self._send('POST', headers, data=data, timeout=timeout)
 
-    def _call_get(self, timeout=60, params={}):
+    def _call_get(self, timeout=60, params={}, headers=None):
         """
         Call -XGET. This is a private method.
 
         This method that should not be used outside this sdk scope.
 
+        Parameters
+        ----------
+        headers: Extra request headers
+
+        Returns
+        --------
+        None
+
+        """
+        request_headers = {
+            'Accept': 'application/json',
+            'Authorization': 'Bearer {}'.format(self.token),
+        }
+        if headers:
+            request_headers.update(headers)
+        self.add_trace_headers(request_headers)
+        self._send('GET', request_headers, timeout=timeout, params=params)
+
+    def _cache_key(self):
+        """Key of the response of self.path in a cache shared by hosts."""
+        # Responses depend on the API and on the user
+        return '{} {}{}'.format(os.environ.get('CLIENT_ID') or '', self.url,
+                                self.path)
+
+    def _call_get_cached(self, response_cache, tag=None):
+        """
+        Call -XGET through a response cache. This is a private method.
+
+        A fresh entry is served without a request, a stale one is
+        revalidated with a conditional request when the server sent an
+        ETag or a Last-Modified date. Only 200 responses are stored.
+
+        Parameters
+        ----------
+        response_cache: cache.ResponseCache
+                Cache of the responses
+        tag: String
+                Resource of the response, to invalidate it on writes
+
+        Returns
+        --------
+        None
+
+        """
+        key = self._cache_key()
+        entry = response_cache.get(key, tag)
+        if entry is not None and response_cache.fresh(entry):
+            self.response = self._cached_response(
+                entry.body, {'ETag': entry.etag,
+                             'Last-Modified': entry.last_modified})
+            self._content = entry.body
+            return
+        validators = entry.validators() if entry is not None else None
+        if validators:
+            self._call_get(headers=validators)
+        else:
+            self._call_get()
+        status_code = getattr(self.response, 'status_code', None)
+        if status_code == 304 and entry is not None:
+            response_cache.touch(entry)
+            self._content = entry.body
+        elif status_code == 200:
+            from msa_sdk import cache
+            headers = self.response.headers
+            response_cache.put(cache.CacheEntry(
+                key, self.content, headers.get('ETag'),
+                headers.get('Last-Modified'), tag))
+
+    def _call_get_shared(self, table):
+        """
+        Call -XGET through the shared cache. This is a private method.
+
+        Without MSA_SDK_SHARED_CACHE_DIR this is _call_get. Otherwise
+        the response body is shared with the other processes of the node
+        for the time to live of the table, see msa_sdk.shared_cache. A
+        cache that cannot be used is logged once and skipped.
+
+        Parameters
+        ----------
+        table: String
+                Lookup table of the response, selects the time to live
+
         Returns
         --------
         None
 
+        """
+        from msa_sdk import shared_cache
+        try:
+            lookup_cache = shared_cache.get_shared_cache()
+        except shared_cache.ERRORS as error:
+            shared_cache.log_error(error)
+            lookup_cache = None
+        if lookup_cache is None:
+            self._call_get()
+            return
+        # The GET is started, then done
+        fetched = []
+
+        def fetch():
+            fetched.append(False)
+            self._call_get()
+            fetched[0] = True
+            if getattr(self.response, 'status_code', None) == 200:
+                return self.content
+            return None
+
+        try:
+            body = lookup_cache.get_or_fetch(self._cache_key(), table,
+                                             fetch)
+        except shared_cache.ERRORS as error:
+            if fetched and not fetched[0]:
+                # The GET itself failed
+                raise
+            # The cache cannot be used, send the request without it
+            shared_cache.log_error(error)
+            if not fetched:
+                self._call_get()
+            return
+        if not fetched and body is not None:
+            self.response = self._cached_response(body)
+            self._content = body
+
+    def _cached_response(self, body, headers=None):
+        """Response rebuilt from a cached body."""
+        from requests import Response
+        response = Response()
+        response.status_code = 200
+        response.url = self.url + self.path
+        response.encoding = 'utf-8'
+        response._content = body.encode()
+        for name, value in (headers or {}).items():
+            if value:
+                response.headers[name] = value
+        return response
+
+    def _call_get_items(self, timeout=60, params={}, chunk_size=None):
+        """
+        Call -XGET and stream the items of the JSON response.
+
+        This is a private method. The body is not buffered, the items
+        of a JSON array, or (key, value) pairs of a JSON object, are
+        decoded as they are received.
+
+        An error response is checked as for _call_get, its error is in
+        self.content, then RuntimeError is raised on the first item so
+        a failure is not mistaken for an empty list.
+
+        Returns
+        --------
+        Generator of items
+
         """
         headers = {
             'Accept': 'application/json',
             'Authorization': 'Bearer {}'.format(self.token),
         }
         self.add_trace_headers(headers)
-        url = self.url + self.path
-        self.response = requests.get(url, headers=headers, timeout=timeout,
-                                     params=params)
-        self._content = self.response.text
-        self.check_response()
-
-    def _call_put(self, data=None) -> None:
+        self._send('GET', headers, timeout=timeout, params=params,
+                   stream=True)
+        if not self.response.ok:
+            raise RuntimeError(json.loads(self.content)['wo_newparams'])
+        from msa_sdk import streaming
+        yield from streaming.iter_response_items(
+            self.response, chunk_size or streaming.DEFAULT_CHUNK_SIZE)
+
+    def _call_put(self, data=None, *, retry=False) -> None:
         """
         Call -XPUT. This is a private method.
 
@@ -292,7 +494,10 @@ class MSA_API():  # pylint: disable=invalid-name
 
         Parameters
         ----------
-        data: Data to send
+        data: Data to send, a dictionary or a list is encoded to JSON
+        retry: Bool
+                Also retry on gateway errors, only for a call that is
+                safe to send twice. Connection errors are always retried.
 
         Returns
         --------
@@ -305,17 +510,23 @@ class MSA_API():  # pylint: disable=invalid-name
             'Authorization': 'Bearer {}'.format(self.token),
         }
         self.add_trace_headers(headers)
-        url = self.url + self.path
-        self.response = requests.put(url, data=data, headers=headers)
-        self._content = self.response.text
-        self.check_response()
+        if isinstance(data, (dict, list)):
+            from msa_sdk import codec
+            data = codec.dumps(data)
+        self._send('PUT', headers, retry=retry, data=data)
 
-    def _call_delete(self) -> None:
+    def _call_delete(self, *, retry=False) -> None:
         """
         Call -XDELETE. This is a private method.
 
         This method that should not be used outside this sdk scope.
 
+        Parameters
+        ----------
+        retry: Bool
+                Also retry on gateway errors, only for a call that is
+                safe to send twice. Connection errors are always retried.
+
         Returns
         --------
         None
@@ -326,23 +537,76 @@ class MSA_API():  # pylint: disable=invalid-name
             'Authorization': 'Bearer {}'.format(self.token),
         }
         self.add_trace_headers(headers)
-        url = self.url + self.path
-        self.response = requests.delete(url, headers=headers)
-        self._content = self.response.text
+        self._send('DELETE', headers, retry=retry)
+
+    def _send(self, method, headers, retry=False, **kwargs):
+        """
+        Send a request through the shared session.
+
+        Instrumentation hooks are called around the request. On a 401
+        response the cached token is dropped, so a revoked token is not
+        sent again.
+
+        Parameters
+        ----------
+        method: String
+                HTTP method
+        headers: Dictionary
+                Request headers
+        retry: Bool
+                Retry PUT and DELETE on the transport status codes too
+        kwargs: Arguments of the requests.Session method
+
+        Returns
+        --------
+        None
+
+        """
+        from msa_sdk import transport
+        instrumentation = _instrumentation()
+        record = instrumentation.start(method, self.path, self.action,
+                                       headers, kwargs.get('data'))
+        kind = transport.IDEMPOTENT if retry else transport.DEFAULT
+        send = getattr(transport.session(kind), method.lower())
+        try:
+            self.response = send(self.url + self.path, headers=headers,
+                                 **kwargs)
+        except Exception as error:
+            instrumentation.finish(record, error=error)
+            raise
+        instrumentation.finish(record, self.response)
+        if getattr(self.response, 'status_code', None) == 401:
+            # Revoked token, the next call fetches a new one
+            self._invalidate_token(headers)
+        if kwargs.get('stream') and self.response.ok:
+            # The caller reads the body
+            self._content = ""
+            return
+        # The text is only decoded if content is read, content_json
+        # decodes the body bytes directly
+        self._content = None
         self.check_response()
 
     def add_trace_headers(self, headers: dict[str, str]):
-        """Add W3C trace headers."""
+        """
+        Add W3C trace headers.
+
+        Each request gets its own child span of the task span, so the
+        backend can tell apart the calls made by a task.
+        """
+        context = msa_sdk.context
         if 'TRACEID' not in context:
             t, s = self.create_trace_id()
             context['TRACEID'] = t
             context['SPANID'] = s
             logger.info("Creating traceId: 00-%s-%s-01", t,s)
+        span_id = _instrumentation().new_span_id()
         # W3C compatible header
-        headers['traceparent'] = '00-{}-{}-01'.format(context['TRACEID'], context['SPANID'])
+        headers['traceparent'] = '00-{}-{}-01'.format(context['TRACEID'], span_id)
         # Old X-B3, to be removed.
         headers['X-B3-TraceId'] = context['TRACEID']
-        headers['X-B3-SpanId'] = context['SPANID']
+        headers['X-B3-SpanId'] = span_id
+        headers['X-B3-ParentSpanId'] = context['SPANID']
 
     def log_to_process_file(self, process_id: str, log_message: str) -> bool:
         """
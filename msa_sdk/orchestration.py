@@ -5,6 +5,11 @@ import time
 
 from msa_sdk import constants
 from msa_sdk.msa_api import MSA_API
+from msa_sdk.pagination import Paginator
+from msa_sdk.polling import Backoff
+from msa_sdk.polling import PollScheduler
+from msa_sdk.polling import RateLimiter
+from msa_sdk.polling import wait_until
 from msa_sdk.variables import Variables
 
 
@@ -43,6 +48,32 @@ class Orchestration(MSA_API):
         self._call_get()
 
 
+    def iter_service_instances(self, service_name=""):
+        """
+        Stream service instances.
+
+        The response is parsed as it is received, without buffering the
+        whole list.
+
+        Parameters
+        ----------
+        service_name: String
+            Service name to filter the instances, default is empty string
+
+        Returns
+        -------
+        Generator of service instance dictionaries
+        """
+        self.action = 'List service instances'
+        base_path = f"{self.api_path}/{self.ubiqube_id}/service/instance"
+
+        if service_name:
+            self.path = f"{base_path}?serviceName={service_name}"
+        else:
+            self.path = base_path
+
+        yield from self._call_get_items()
+
     def get_workflow_details(self, service_name, defined_var_flag, status="",  sort="lastupdated", sort_order="DESC", search_filter="", page=1, page_size=100):
         """
         Get workflow details.
@@ -77,6 +108,56 @@ class Orchestration(MSA_API):
 
         self._call_get()
 
+    # pylint: disable=too-many-arguments
+    def iter_workflow_details(self, service_name, defined_var_flag,
+                              status="", sort="lastupdated",
+                              sort_order="DESC", search_filter="",
+                              page_size=100, prefetch=False):
+        """
+        Iterate over the workflow details of all pages.
+
+        Each page is read by its own Orchestration object, the next page
+        is read while the current one is processed when prefetch is set.
+
+        Parameters
+        ----------
+        service_name: String
+                Service name
+        defined_var_flag: Boolean
+                Flag to get only WF defined Vars or all vars
+        status: String
+                Status of the workflow, default is empty string
+        sort: String
+                Sort by field, default is lastupdated
+        sort_order: String
+                Sort order, default is DESC
+        search_filter: String
+                Search filter, default is empty string
+        page_size: Integer
+                Page size, default is 100
+        prefetch: Bool
+                Read the next page in the background
+
+        Returns
+        -------
+        Generator of workflow details, stops after the first short page
+
+        """
+        def fetch(page, size):
+            orch = Orchestration(self.ubiqube_id)
+            orch.get_workflow_details(service_name, defined_var_flag,
+                                      status, sort, sort_order,
+                                      search_filter, page, size)
+            details = json.loads(orch.content)
+            if not orch.response.ok:
+                raise RuntimeError(details['wo_newparams'])
+            if isinstance(details, dict):
+                # Spring style page
+                details = details.get('content') or []
+            return details
+
+        return iter(Paginator(fetch, page_size, prefetch=prefetch))
+
     def read_service_instance(self, service_id):
         """
         Read service instance.
@@ -377,21 +458,27 @@ class Orchestration(MSA_API):
                        '?serviceName={}&processName={}')
 
 
-        running = True
-        global_timeout  = time.time() + timeout
-        while (running and time.time() <= global_timeout) :
-          try:
-            self.path = format_path.format(external_ref, service_ref, service_name, process_name)
-            self._call_post(data)
-            running = False
-          except TypeError as e:   
-            #Got type error when the process is already running
+        def post():
+            try:
+                self.path = format_path.format(external_ref, service_ref, service_name, process_name)
+                self._call_post(data)
+                return True
+            except TypeError:
+                #Got type error when the process is already running
+                return False
+
+        def waiting(_):
             dev_var              = Variables()
             context              = Variables.task_call(dev_var)
             if context.get('PROCESSINSTANCEID'):
               self.update_asynchronous_task_details(context['PROCESSINSTANCEID'], context['TASKID'], context['EXECNUMBER'], 'Waiting end of previous excecution for WF  '+service_name.rsplit('/', 1)[1]+' with instance ref '+str(service_ref))
-            time.sleep(interval)  
-          
+
+        # The status is updated every interval, not on every poll
+        _, posted = wait_until(post, bool, timeout,
+                               Backoff(max_interval=interval), waiting,
+                               pending_interval=interval)
+        running = not posted
+
         if running:
             dev_var              = Variables()
             context              = Variables.task_call(dev_var)
@@ -430,21 +517,23 @@ class Orchestration(MSA_API):
      
         global_timeout       = time.time() + timeout
         service_instance_id  = int(service_external_ref[6:])
-        status               = None
        
         self.execute_service_by_reference(ubiqube_id, service_external_ref, service_name, process_name, data, timeout, interval)
-         
-        #Wait the end of the new run :
-        if service_instance_id and isinstance(service_instance_id, int) :
-          while time.time() <= global_timeout:
-            status = self.get_service_status_by_id(service_instance_id)
-            if status != constants.RUNNING  :
-                break
+
+        def running(_):
             if context.get('PROCESSINSTANCEID'):
               self.update_asynchronous_task_details(context['PROCESSINSTANCEID'], context['TASKID'], context['EXECNUMBER'], 'Running WF  '+service_name.rsplit('/', 1)[1]+', for instance ref '+str(service_external_ref))
-            time.sleep(interval)
-        
-        if time.time() >= global_timeout:
+
+        #Wait the end of the new run :
+        ended = time.time() < global_timeout
+        if service_instance_id and isinstance(service_instance_id, int) :
+          _, ended = wait_until(
+              lambda: self.get_service_status_by_id(service_instance_id),
+              lambda status: status != constants.RUNNING,
+              global_timeout - time.time(), Backoff(max_interval=interval),
+              running, pending_interval=interval)
+
+        if not ended:
           MSA_API.task_error('Timeout, WF  '+service_name.rsplit('/', 1)[1]+' is still running with instance ref '+str(service_external_ref), context, True) 
         
         response = json.loads(self.content)
@@ -461,6 +550,9 @@ class Orchestration(MSA_API):
 
         Wait that wf instance has finish and return the final dict result (where the status value is ENDED or FAILED).
 
+        The process is polled often at first, then less and less often
+        up to one poll every interval seconds.
+
         Parameters
         ----------
         process_id: Integer
@@ -474,20 +566,83 @@ class Orchestration(MSA_API):
         response
 
         """
-        response = {}
-        global_timeout = time.time() + timeout
-        while time.time() < global_timeout:
-            #get service instance execution status.
+        def get_process_instance():
             self.get_process_instance(process_id)
-            response = json.loads(self.content)
-            status = response.get('status').get('status')
-            if status != constants.RUNNING:
-                break
-            time.sleep(interval)
+            return json.loads(self.content)
+
+        response, _ = wait_until(
+            get_process_instance,
+            lambda response: response.get('status').get('status') != constants.RUNNING,
+            timeout, Backoff(max_interval=interval))
 
+        if response is None:
+            response = {}
         return response
  
 
+    # pylint: disable=too-many-arguments
+    def wait_end_get_process_instances(self, process_ids, timeout=600,
+                                       interval=5, max_workers=8,
+                                       max_rate=None, fail_fast=False):
+        """
+
+        Wait for many wf instances at once, yield each final dict result as soon as it is available.
+
+        The processes are polled concurrently by one scheduler, so the
+        total wait is the one of the longest process.
+
+        Parameters
+        ----------
+        process_ids: Iterable
+                Process IDs
+        timeout: Integer
+                Global timeout in seconds
+        interval: Integer
+                Maximum interval between two polls of a process
+        max_workers: Integer
+                Maximum number of concurrent polls
+        max_rate: Float
+                Maximum number of polls per second, no limit if None
+        fail_fast: Bool
+                Stop waiting after the first FAILED process
+
+        Returns
+        -------
+        Generator of (process_id, response) in completion order. The
+        processes still running at the timeout are yielded last with
+        their last response.
+
+        """
+        def get_process_instance(process_id):
+            orch = Orchestration(self.ubiqube_id)
+            try:
+                orch.get_process_instance(process_id)
+                return json.loads(orch.content)
+            except Exception:
+                # Network error or garbage, try again on the next poll
+                return None
+
+        def status_of(response):
+            return (response.get('status') or {}).get('status')
+
+        def ended(response):
+            return isinstance(response, dict) and \
+                status_of(response) != constants.RUNNING
+
+        rate_limiter = RateLimiter(max_rate) if max_rate else None
+        scheduler = PollScheduler(get_process_instance, ended, timeout,
+                                  Backoff(max_interval=interval),
+                                  max_workers=max_workers,
+                                  rate_limiter=rate_limiter)
+        for process_id in process_ids:
+            scheduler.add(process_id)
+
+        for process_id, response, _ in scheduler.run():
+            yield process_id, response if response is not None else {}
+            if fail_fast and ended(response) and \
+                    status_of(response) == constants.FAILED:
+                return
+
     def resume_failed_or_paused_process_instance(self, process_id):
         """
 
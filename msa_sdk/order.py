@@ -8,9 +8,20 @@ from msa_sdk.device import Device
 class Order(Device):
     """Class Order."""
 
-    def __init__(self, device_id):
-        """Initialize."""
-        Device.__init__(self, device_id=device_id)
+    def __init__(self, device_id, lazy=False):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+        lazy: Bool
+                Read the device attributes on first access only, saves
+                the device GET when only commands are sent
+
+        """
+        Device.__init__(self, device_id=device_id, lazy=lazy)
         self.api_path = '/ordercommand'
 
     def command_execute(self, command: str, params: dict, timeout=300) -> None:
@@ -48,6 +59,33 @@ class Order(Device):
 
         self._call_post(params, timeout)
 
+    def command_execute_json(self, command: str, params: dict,
+                             timeout=300):
+        """
+
+        Command execute, returning the decoded response.
+
+        Same as command_execute, the response body is decoded once by
+        the JSON codec instead of going through self.content.
+
+        Parameters
+        -----------
+        command: String
+                Order command
+                Available values : CREATE, UPDATE, IMPORT, LIST, READ, DELETE
+        params: dict
+                Parameters in a dict format, see command_execute
+        timeout: Integer
+                Timeout in sec (300 secondes by default)
+
+        Returns
+        -------
+        Decoded response, the FAILED process content on an error
+
+        """
+        self.command_execute(command, params, timeout)
+        return self.content_json()
+
     def command_generate_configuration(self, command: str,
                                        params: dict) -> None:
         """
@@ -128,7 +166,7 @@ class Order(Device):
                                                self.device_id)
 
         self._call_get()
-        return json.loads(self.content)
+        return self.content_json()
 
     def command_synchronizeOneOrMoreObjectsFromDevice(self,
                                                       mservice_uris: list,
@@ -184,6 +222,33 @@ class Order(Device):
                                               mode)
         self._call_post(params, timeout)
 
+    def command_call_json(self, command: str, mode: int, params,
+                          timeout=300):
+        """
+
+        Command call, returning the decoded response.
+
+        Parameters
+        -----------
+        command: String
+                CRUID method in microservice to call
+        mode: Integer
+                0 - No application
+                1 - Apply to base
+                2 - Apply to device
+        params: dict
+                Parameters of the microservice call
+        timeout: Integer
+                Timeout in sec (300 secondes by default)
+
+        Returns
+        --------
+        Decoded response, the FAILED process content on an error
+
+        """
+        self.command_call(command, mode, params, timeout)
+        return self.content_json()
+
     def command_objects_all(self) -> None:
         """
 
@@ -198,6 +263,24 @@ class Order(Device):
         self.path = f'{self.api_path}/objects/{self.device_id}'
         self._call_get()
 
+    def iter_objects_all(self):
+        """
+
+        Stream all microservices attached to a device.
+
+        The response is parsed as it is received, without buffering the
+        whole body.
+
+        Returns
+        --------
+        Generator of the items of the response, (name, value) tuples
+        when the response is a JSON object
+
+        """
+        self.action = 'Get Microservices'
+        self.path = f'{self.api_path}/objects/{self.device_id}'
+        yield from self._call_get_items()
+
     def command_objects_instances(self, object_name: str) -> dict:
         """
 
@@ -219,7 +302,7 @@ class Order(Device):
                                               object_name)
         self._call_get()
 
-        return json.loads(self.content)
+        return self.content_json()
 
     def command_objects_instances_by_id(self, object_name: str,
                                         object_id: str) -> dict:
@@ -246,7 +329,7 @@ class Order(Device):
                                                  object_id)
         self._call_get()
 
-        return json.loads(self.content)
+        return self.content_json()
 
     def command_get_deployment_settings_id(self) -> int:
         """
@@ -264,7 +347,7 @@ class Order(Device):
         self._call_get()
 
         config_profile_device = \
-            json.loads(self.content)['ConfigProfileByDevice']
+            self.content_json()['ConfigProfileByDevice']
 
         return int(config_profile_device)
         
@@ -288,12 +371,42 @@ class Order(Device):
                                                       object_name)
         self._call_get()
 
-        return json.loads(self.content)
+        return self.content_json()
+
+    def _existing_object_ids(self, object_name: str) -> set:
+        """
+        Object IDs of the instances of a microservice on the device.
+
+        Parameters
+        -----------
+        object_name: str
+            Name of microservice
+
+        Returns
+        --------
+        Set of object IDs as strings
+
+        """
+        instances = self.command_objects_instances(object_name)
+        if not self.response.ok:
+            if self.response.status_code == 404:
+                # No instance of this microservice yet
+                return set()
+            raise RuntimeError("Error checking object existence: {}".format(
+                instances.get('wo_newparams')))
+        if isinstance(instances, dict):
+            instances = instances.get(object_name, instances)
+        return {str(object_id) for object_id in instances}
 
     def command_call_check_duplicate(self, command: str, mode: int, params, timeout=300) -> None:
         """
         Command call with duplicate check for CREATE.
 
+        The instances of each microservice of params are read once, and
+        every object ID to create is checked against them, so the check
+        costs one request per microservice whatever the number of
+        objects.
+
         Parameters
         -----------
         command: str
@@ -304,52 +417,46 @@ class Order(Device):
             2 - Apply to device
         params: dict
             Parameters for the command.
-            When using CREATE, must contain:
-              - object_name (str): microservice object name
-              - object_id (str): instance ID
+            When using CREATE, objects to create per microservice name:
+              {object_name: {object_id: {...}, ...}, ...}
         timeout: int
             Timeout for the request in seconds (default=300)
 
         Raises
         ------
         ValueError
-            If the object already exists when trying to CREATE
+            If an object already exists when trying to CREATE
         RuntimeError
             If an unexpected error occurs while checking existence
         """
-        self.action = 'Call command'
-
         if command.upper() == "CREATE":
-            object_name = list(params.keys())[0]
-            object_id = list(params.get(object_name).keys())[0]
-
-            if not object_name or not object_id:
-                raise ValueError(f"CREATE requires '{object_name}' and '{object_id}' in params")
-
-            try:
-                # Directly check if object exists
-                self.action = 'Get Microservice Object Details'
-                self.path = '{}/objects/{}/{}/{}'.format(
-                    self.api_path,
-                    self.device_id,
-                    object_name,
-                    object_id
-                )
-                self._call_get()
-
-                # If we got JSON content and it's non-empty → object exists
-                existing = json.loads(self.content)
-                if isinstance(existing, dict) and existing:
-                    raise ValueError(
-                        f"Microservice instance '{object_name}' with ID '{object_id}' already exists"
-                    )
+            if not isinstance(params, dict) or not params:
+                raise ValueError("CREATE requires objects in params")
 
-            except json.JSONDecodeError:
-                # Response was not valid JSON (likely "not found") → treat as non-existent
-                pass
-            except Exception as e:
-                raise RuntimeError(f"Error checking object existence: {e}")
+            duplicates = []
+            for object_name, objects in params.items():
+                if not object_name or not isinstance(objects, dict) or \
+                        not objects:
+                    raise ValueError(
+                        f"CREATE requires object IDs for '{object_name}' in params")
+                try:
+                    existing = self._existing_object_ids(object_name)
+                except json.JSONDecodeError:
+                    # Response was not valid JSON (likely "not found")
+                    existing = set()
+                except RuntimeError:
+                    raise
+                except Exception as e:
+                    raise RuntimeError(f"Error checking object existence: {e}")
+                duplicates.extend(
+                    f"'{object_name}' with ID '{object_id}'"
+                    for object_id in objects if str(object_id) in existing)
+
+            if duplicates:
+                raise ValueError("Microservice instance {} already exists".format(
+                    ', '.join(duplicates)))
 
+        self.action = 'Call command'
         # Build path for the actual command
         self.path = '{}/call/{}/{}/{}'.format(
             self.api_path,
@@ -8,9 +8,20 @@ from msa_sdk.device import Device
 class OrderStack(Device):
     """Class OrderStack."""
 
-    def __init__(self, device_id):
-        """Initialize."""
-        Device.__init__(self, device_id=device_id)
+    def __init__(self, device_id, lazy=False):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        device_id: Integer
+                Device ID
+        lazy: Bool
+                Read the device attributes on first access only, saves
+                the device GET when only commands are sent
+
+        """
+        Device.__init__(self, device_id=device_id, lazy=lazy)
         self.api_path = '/orderstack'
     
 
@@ -0,0 +1,90 @@
+"""Module pagination."""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Paginator():
+    """
+    Iterate over the items of a paged endpoint.
+
+    Pages are fetched one after the other until a page holds less than
+    page_size items. With prefetch, the next page is fetched in a
+    background thread while the caller goes through the current one.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, fetch, page_size=100, first_page=1, prefetch=False,
+                 max_pages=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        fetch: Function
+                Called with (page, page_size), returns the list of items of
+                the page. It must be safe to call from another thread when
+                prefetch is set.
+        page_size: Integer
+                Items per page
+        first_page: Integer
+                Number of the first page
+        prefetch: Bool
+                Fetch the next page while the current one is processed
+        max_pages: Integer
+                Stop after this many pages, default no limit
+
+        """
+        self.fetch = fetch
+        self.page_size = page_size
+        self.first_page = first_page
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+
+    def __iter__(self):
+        """Iterate over the items of all pages."""
+        for items in self.pages():
+            yield from items
+
+    def _is_last(self, page, items):
+        if len(items) < self.page_size:
+            return True
+        return self.max_pages is not None and \
+            page - self.first_page + 1 >= self.max_pages
+
+    def pages(self):
+        """
+        Iterate over the pages.
+
+        Returns
+        -------
+        Generator of non empty lists of items
+
+        """
+        if self.prefetch:
+            yield from self._prefetched_pages()
+            return
+        page = self.first_page
+        while True:
+            items = self.fetch(page, self.page_size)
+            if items:
+                yield items
+            if self._is_last(page, items):
+                return
+            page += 1
+
+    def _prefetched_pages(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            page = self.first_page
+            future = executor.submit(self.fetch, page, self.page_size)
+            while future is not None:
+                items = future.result()
+                future = None
+                if not self._is_last(page, items):
+                    future = executor.submit(self.fetch, page + 1,
+                                             self.page_size)
+                if items:
+                    yield items
+                page += 1
+        finally:
+            # Do not wait for a prefetch nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
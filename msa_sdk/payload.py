@@ -0,0 +1,328 @@
+"""
+Module payload.
+
+Build the parameters of Order commands from the variable definitions
+of a microservice. The definitions are compiled once, then batches of
+objects are validated and serialized locally, so a typo or a bad value
+fails before the command is sent::
+
+    builder = PayloadBuilder.from_repository(
+        'simple_firewall', 'CommandDefinition/LINUX/simple_firewall.xml')
+    params = builder.build([{"object_id": "12", "src_ip": "3.4.5.6"},
+                            {"object_id": "13", "src_ip": "3.4.5.7"}])
+    order.command_execute('CREATE', params)
+"""
+import ipaddress
+
+from msa_sdk.repository import Repository
+
+_TRUE = ('true', '1', 'yes', 'on')
+_FALSE = ('false', '0', 'no', 'off', '')
+
+
+class PayloadValidationError(ValueError):
+    """Class Exception for objects not matching the microservice."""
+
+    def __init__(self, object_name, errors):
+        """Init."""
+        ValueError.__init__(self, '{}: {}'.format(object_name,
+                                                  '; '.join(errors)))
+        self.object_name = object_name
+        self.errors = errors
+
+
+def _string(value):
+    if isinstance(value, (dict, list, tuple, set)):
+        raise ValueError('is not a scalar')
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _integer(value):
+    if isinstance(value, bool):
+        raise ValueError('is not an integer')
+    try:
+        return str(int(str(value).strip()))
+    except ValueError:
+        raise ValueError('is not an integer') from None
+
+
+def _boolean(value):
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return 'true'
+    if text in _FALSE:
+        return 'false'
+    raise ValueError('is not a boolean')
+
+
+def _ip_address(value):
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        raise ValueError('is not an IP address') from None
+
+
+def _ip_mask(value):
+    try:
+        return str(ipaddress.IPv4Network('0.0.0.0/{}'.format(
+            str(value).strip())).netmask)
+    except ValueError:
+        raise ValueError('is not a netmask') from None
+
+
+def _ip_network(value):
+    try:
+        return str(ipaddress.ip_network(str(value).strip(), strict=False))
+    except ValueError:
+        raise ValueError('is not an IP network') from None
+
+
+# Variable types checked locally, the others are sent as strings
+CONVERTERS = {
+    'integer': _integer,
+    'autoincrement': _integer,
+    'boolean': _boolean,
+    'ipaddress': _ip_address,
+    'ipv6address': _ip_address,
+    'ipmask': _ip_mask,
+    'subnet': _ip_network,
+    'ipnetwork': _ip_network,
+}
+
+
+class _Field():
+    """Compiled variable, or array of variables."""
+
+    def __init__(self, name):
+        self.name = name
+        self.convert = _string
+        self.mandatory = False
+        self.default = None
+        self.allowed = None
+        self.children = None
+
+    def define(self, variable):
+        self.convert = CONVERTERS.get(
+            str(variable.get('type') or '').lower(), _string)
+        self.mandatory = bool(variable.get('mandatory'))
+        self.default = variable.get('defaultValue')
+        values = variable.get('values')
+        if values and not variable.get('editable'):
+            self.allowed = frozenset(
+                str(value.get('actualValue')) if isinstance(value, dict)
+                else str(value) for value in values)
+
+
+def _compile(names_variables):
+    """Tree of fields from (name parts, variable) pairs."""
+    fields = {}
+    arrays = {}
+    for parts, variable in names_variables:
+        if len(parts) > 2 and parts[1] == '0':
+            # params.<array>.0.<element field>
+            arrays.setdefault(parts[0], []).append((parts[2:], variable))
+        else:
+            name = '.'.join(parts)
+            fields.setdefault(name, _Field(name)).define(variable)
+    for name, elements in arrays.items():
+        field = fields.setdefault(name, _Field(name))
+        field.children = _compile(elements)
+    return fields
+
+
+class PayloadBuilder():
+    """
+    Compiled variable definitions of one microservice.
+
+    Values are checked against the variable types (Integer, Boolean,
+    IpAddress, IpMask, Subnet), the mandatory flag and the list of
+    values of non editable selectors, and serialized as the strings
+    the API expects.
+    """
+
+    def __init__(self, object_name, variables, strict=True):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        object_name: String
+                Name of the microservice in the Order parameters
+        variables: Dictionary
+                Variable definitions as returned by
+                Repository.get_microservice_variables, or the list of
+                variables
+        strict: Bool
+                Reject fields which are not microservice variables
+
+        """
+        if isinstance(variables, dict):
+            variables = variables.get('variable') or []
+        names_variables = []
+        for variable in variables:
+            name = variable['name']
+            if name.startswith('params.'):
+                name = name[len('params.'):]
+            names_variables.append((name.split('.'), variable))
+        self.object_name = object_name
+        self.strict = strict
+        self.fields = _compile(names_variables)
+        self._object_id = self.fields.setdefault('object_id',
+                                                 _Field('object_id'))
+        self._object_id.mandatory = True
+
+    @classmethod
+    def from_repository(cls, object_name, file_uri, repository=None,
+                        strict=True):
+        """
+        Compile the variables of a microservice of the repository.
+
+        Parameters
+        ----------
+        object_name: String
+                Name of the microservice in the Order parameters
+        file_uri: String
+                File path to microservice in repository
+        repository: Repository
+                Repository object, default a new one
+        strict: Bool
+                Reject fields which are not microservice variables
+
+        Returns
+        -------
+        PayloadBuilder
+
+        """
+        repository = repository or Repository()
+        return cls(object_name,
+                   repository.get_microservice_variables(file_uri), strict)
+
+    # pylint: disable=too-many-arguments
+    def _object(self, fields, values, partial, defaults, path, errors):
+        result = {}
+        if not isinstance(values, dict):
+            errors.append('{}: is not an object'.format(path[:-1] or
+                                                        'object'))
+            return result
+        if self.strict:
+            for name in values:
+                if name not in fields:
+                    errors.append('{}{}: unknown variable'.format(path,
+                                                                  name))
+        for name, field in fields.items():
+            value = values.get(name)
+            if value is None:
+                if defaults and field.default not in (None, ''):
+                    result[name] = str(field.default)
+                elif field.mandatory and (not partial or
+                                          field is self._object_id):
+                    errors.append('{}{}: is mandatory'.format(path, name))
+                continue
+            if field.children is not None:
+                result[name] = self._array(field, value, partial, defaults,
+                                           '{}{}.'.format(path, name),
+                                           errors)
+                continue
+            try:
+                value = field.convert(value)
+            except ValueError as error:
+                errors.append('{}{}: {!r} {}'.format(path, name, value,
+                                                     error))
+                continue
+            if field.allowed is not None and value not in field.allowed:
+                errors.append('{}{}: {!r} is not one of {}'.format(
+                    path, name, value, ', '.join(sorted(field.allowed))))
+                continue
+            result[name] = value
+        return result
+
+    # pylint: disable=too-many-arguments
+    def _array(self, field, value, partial, defaults, path, errors):
+        if isinstance(value, dict):
+            items = sorted(value.items(), key=lambda item: int(item[0])
+                           if str(item[0]).isdigit() else 0)
+            value = [item for _, item in items]
+        if not isinstance(value, (list, tuple)):
+            errors.append('{}: is not an array'.format(path[:-1]))
+            return {}
+        return {str(index): self._object(field.children, item, partial,
+                                         defaults,
+                                         '{}{}.'.format(path, index),
+                                         errors)
+                for index, item in enumerate(value)}
+
+    def validate(self, obj, partial=False, defaults=False):
+        """
+        Check one object.
+
+        Parameters
+        ----------
+        obj: Dictionary
+                Variables of the object, with its object_id
+        partial: Bool
+                Do not require mandatory variables, for UPDATE and DELETE
+        defaults: Bool
+                Fill missing variables with their default value
+
+        Returns
+        -------
+        List of errors, empty if the object is valid
+
+        """
+        errors = []
+        self._object(self.fields, obj, partial, defaults, '', errors)
+        return errors
+
+    def build(self, objects, partial=False, defaults=False):
+        """
+        Validate and serialize a batch of objects.
+
+        All the objects are checked before raising, so the error lists
+        every invalid value of the batch.
+
+        Parameters
+        ----------
+        objects: List or Dictionary
+                Objects to send, a list of dictionaries or a dictionary
+                object_id -> variables
+        partial: Bool
+                Do not require mandatory variables, for UPDATE and DELETE
+        defaults: Bool
+                Fill missing variables with their default value
+
+        Returns
+        -------
+        Dictionary: parameters of Order.command_execute,
+        {object_name: {object_id: {variables}}}
+
+        Raises
+        ------
+        PayloadValidationError
+            If an object does not match the microservice
+
+        """
+        if isinstance(objects, dict):
+            objects = [dict(variables, object_id=object_id)
+                       for object_id, variables in objects.items()]
+        params = {}
+        errors = []
+        for index, obj in enumerate(objects):
+            object_id = obj.get('object_id') if isinstance(obj, dict) \
+                else None
+            prefix = '{} '.format(object_id if object_id is not None
+                                  else '#{}'.format(index))
+            object_errors = []
+            result = self._object(self.fields, obj, partial, defaults, '',
+                                  object_errors)
+            errors.extend(prefix + error for error in object_errors)
+            if object_errors:
+                continue
+            if result['object_id'] in params:
+                errors.append(prefix + 'object_id: duplicate')
+                continue
+            params[result['object_id']] = result
+        if errors:
+            raise PayloadValidationError(self.object_name, errors)
+        return {self.object_name: params}
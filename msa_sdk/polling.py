@@ -0,0 +1,391 @@
+"""Module polling."""
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+class Backoff():
+    """
+    Adaptive polling interval.
+
+    The interval starts small, so short processes are seen as soon as
+    they finish, and grows by factor up to max_interval, so long ones do
+    not flood the API. Each interval is spread by +/- jitter to avoid
+    many waiters polling in lockstep.
+    """
+
+    def __init__(self, initial=1.0, factor=1.5, max_interval=10.0,
+                 jitter=0.1):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        initial: Float
+                First interval in seconds
+        factor: Float
+                Growth factor between two intervals
+        max_interval: Float
+                Upper bound of the interval in seconds
+        jitter: Float
+                Relative spread applied to each interval, 0 to disable
+
+        """
+        self.initial = min(initial, max_interval)
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+    def delays(self):
+        """
+        Intervals between two polls.
+
+        Returns
+        -------
+        Infinite generator of intervals in seconds
+
+        """
+        delay = self.initial
+        while True:
+            if self.jitter:
+                yield delay * (1 + random.uniform(-self.jitter, self.jitter))
+            else:
+                yield delay
+            delay = min(delay * self.factor, self.max_interval)
+
+
+# pylint: disable=too-many-arguments
+def wait_until(poll, done, timeout, backoff=None, on_pending=None,
+               clock=None, sleep=None, pending_interval=0):
+    """
+    Poll until a result is final or the deadline is reached.
+
+    Parameters
+    ----------
+    poll: Function
+            Called without argument, returns the current result
+    done: Function
+            Called with a result, True when the result is final
+    timeout: Float
+            Seconds before giving up
+    backoff: Backoff
+            Polling intervals, default Backoff()
+    on_pending: Function
+            Called with each non final result before sleeping
+    clock: Function
+            Monotonic clock, default time.monotonic
+    sleep: Function
+            Sleep function, default time.sleep
+    pending_interval: Float
+            Minimum seconds between two calls of on_pending, which may
+            be slower than the polls, for instance a status update
+
+    Returns
+    -------
+    Tuple (last result or None, True if the result is final)
+
+    """
+    if backoff is None:
+        backoff = Backoff()
+    clock = clock or time.monotonic
+    sleep = sleep or time.sleep
+    deadline = clock() + timeout
+    delays = backoff.delays()
+    result = None
+    pending_at = None
+    while clock() < deadline:
+        result = poll()
+        if done(result):
+            return result, True
+        if on_pending is not None and (
+                pending_at is None or
+                clock() - pending_at >= pending_interval):
+            pending_at = clock()
+            on_pending(result)
+        sleep(max(0, min(next(delays), deadline - clock())))
+    return result, False
+
+
+class RateLimiter():
+    """
+    Token bucket shared by several threads.
+
+    At most rate acquisitions per second are allowed on average, with
+    bursts of up to burst acquisitions.
+    """
+
+    def __init__(self, rate, burst=None, clock=None, sleep=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        rate: Float
+                Acquisitions per second
+        burst: Integer
+                Bucket size, default max(1, rate)
+        clock: Function
+                Monotonic clock, default time.monotonic
+        sleep: Function
+                Sleep function, default time.sleep
+
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self._tokens = self.burst
+        self._last = self.clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a call is allowed.
+
+        Returns
+        -------
+        None
+
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens +
+                                   (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            self.sleep(delay)
+
+
+class PollScheduler():
+    """
+    Wait on many keys with a single scheduler.
+
+    Each key has its own backoff and deadline. The scheduler always
+    sleeps until the next key is due, polls it and yields keys as soon
+    as their result is final or their deadline is reached. With
+    max_workers above 1, due keys are polled concurrently.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, poll, done, timeout=600, backoff=None,
+                 clock=None, sleep=None, max_workers=1, rate_limiter=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        poll: Function
+                Called with a key, returns its current result
+        done: Function
+                Called with a result, True when the result is final
+        timeout: Float
+                Default seconds before giving up on a key
+        backoff: Backoff
+                Polling intervals, default Backoff()
+        clock: Function
+                Monotonic clock, default time.monotonic
+        sleep: Function
+                Sleep function, default time.sleep
+        max_workers: Integer
+                Maximum number of concurrent polls
+        rate_limiter: RateLimiter
+                Limiter acquired before each poll
+
+        """
+        self.poll = poll
+        self.done = done
+        self.timeout = timeout
+        self.backoff = backoff if backoff is not None else Backoff()
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self._queue = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        """Return the number of keys still waited on."""
+        return len(self._entries)
+
+    def add(self, key, timeout=None):
+        """
+        Start waiting on a key, it is polled right away.
+
+        Parameters
+        ----------
+        key: Hashable
+                Key passed to poll
+        timeout: Float
+                Seconds before giving up on this key
+
+        Returns
+        -------
+        None
+
+        """
+        now = self.clock()
+        if timeout is None:
+            timeout = self.timeout
+        self._entries[key] = (now + timeout, self.backoff.delays())
+        heapq.heappush(self._queue, (now, next(self._counter), key))
+
+    def discard(self, key):
+        """
+        Stop waiting on a key.
+
+        Parameters
+        ----------
+        key: Hashable
+                Key to drop
+
+        Returns
+        -------
+        None
+
+        """
+        self._entries.pop(key, None)
+
+    def next_due(self):
+        """
+        When the next key is due.
+
+        Returns
+        -------
+        Clock time, None if no key is waited on
+
+        """
+        while self._queue and self._queue[0][2] not in self._entries:
+            heapq.heappop(self._queue)
+        if not self._queue:
+            return None
+        return self._queue[0][0]
+
+    def pop_due(self, block=True):
+        """
+        Take the keys due now.
+
+        Each key taken must be polled with poll_key then given back with
+        settle.
+
+        Parameters
+        ----------
+        block: Bool
+                Sleep until the first key is due, instead of returning
+                an empty list
+
+        Returns
+        -------
+        List of keys
+
+        """
+        due = self.next_due()
+        if due is None:
+            return []
+        delay = due - self.clock()
+        if delay > 0:
+            if not block:
+                return []
+            self.sleep(delay)
+        now = self.clock()
+        keys = []
+        while self._queue and self._queue[0][0] <= now:
+            key = heapq.heappop(self._queue)[2]
+            if key in self._entries:
+                keys.append(key)
+        return keys
+
+    def poll_key(self, key):
+        """
+        Poll a key, after the rate limiter allows it.
+
+        Parameters
+        ----------
+        key: Hashable
+                Key taken by pop_due
+
+        Returns
+        -------
+        Result of poll
+
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.poll(key)
+
+    def settle(self, key, result):
+        """
+        Record the result of a poll and schedule the next one.
+
+        Parameters
+        ----------
+        key: Hashable
+                Key taken by pop_due
+        result: Result of poll_key
+
+        Returns
+        -------
+        None while the key is waited on, else True if the result is final
+        and False if the deadline is reached
+
+        """
+        if key not in self._entries:
+            # Discarded while its poll was running
+            return None
+        deadline, delays = self._entries[key]
+        final = bool(self.done(result))
+        now = self.clock()
+        if final or now >= deadline:
+            del self._entries[key]
+            return final
+        due = min(now + next(delays), deadline)
+        heapq.heappush(self._queue, (due, next(self._counter), key))
+        return None
+
+    def run(self):
+        """
+        Poll every key until all are final or timed out.
+
+        Returns
+        -------
+        Generator of (key, last result, True if the result is final)
+        in completion order
+
+        """
+        if self.max_workers > 1:
+            yield from self._run_concurrent()
+            return
+        while self._entries:
+            for key in self.pop_due():
+                result = self.poll_key(key)
+                final = self.settle(key, result)
+                if final is not None:
+                    yield key, result, final
+
+    def _run_concurrent(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while self._entries or running:
+                for key in self.pop_due(block=not running):
+                    running[executor.submit(self.poll_key, key)] = key
+                if not running:
+                    continue
+                due = self.next_due()
+                timeout = None if due is None else max(0, due - self.clock())
+                done, _ = wait(running, timeout=timeout,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    result = future.result()
+                    final = self.settle(key, result)
+                    if final is not None:
+                        yield key, result, final
@@ -0,0 +1,306 @@
+"""
+Module provisioning.
+
+Bulk onboarding of devices. Each device goes through the stages create,
+activate and provision, every stage running on its own worker pool, then
+its provisioning status is polled by a single scheduler shared by all
+the devices until it is final. Devices are taken from the input as
+room frees up in the stages, so the input may be a generator.
+"""
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from msa_sdk import constants
+from msa_sdk.device import Device
+from msa_sdk.polling import Backoff
+from msa_sdk.polling import PollScheduler
+from msa_sdk.polling import RateLimiter
+
+CREATE = 'create'
+ACTIVATE = 'activate'
+PROVISION = 'provision'
+WAIT = 'wait'
+
+STAGES = (CREATE, ACTIVATE, PROVISION, WAIT)
+
+OK = 'OK'
+TIMEOUT = 'TIMEOUT'
+
+
+def _raise_for_response(device):
+    if not device.response.ok:
+        raise RuntimeError(json.loads(device.content)['wo_newparams'])
+
+
+class DeviceResult():
+    """Outcome of the onboarding of one device."""
+
+    def __init__(self, spec):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        spec: Dictionary or Device
+                Device specification given to the pipeline
+
+        """
+        self.spec = spec
+        self.device_id = None
+        self.started = None
+        self.status = None
+        self.stage = None
+        self.error = None
+        self.provision_status = None
+        self.timings = {}
+
+    @property
+    def name(self):
+        """Name of the device."""
+        if isinstance(self.spec, Device):
+            return self.spec.name
+        return self.spec.get('name')
+
+    @property
+    def ok(self):
+        """Tell if the device is provisioned."""
+        return self.status == OK
+
+    def to_dict(self):
+        """Return the result as a dictionary, without credentials."""
+        return {'name': self.name, 'device_id': self.device_id,
+                'status': self.status, 'stage': self.stage,
+                'error': self.error, 'timings': dict(self.timings)}
+
+
+# pylint: disable=too-many-instance-attributes
+class ProvisioningPipeline():
+    """Create, activate and provision many devices concurrently."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, create_workers=4, activate_workers=4,
+                 provision_workers=4, poll_workers=4, timeout=1800,
+                 interval=10, max_rate=None, clock=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        create_workers: Integer
+                Maximum number of concurrent device creations
+        activate_workers: Integer
+                Maximum number of concurrent activations
+        provision_workers: Integer
+                Maximum number of concurrent provisioning requests
+        poll_workers: Integer
+                Maximum number of concurrent provisioning status polls
+        timeout: Float
+                Seconds to wait for the provisioning of a device
+        interval: Float
+                Maximum interval between two polls of a device
+        max_rate: Float
+                Maximum number of status polls per second, no limit if
+                None
+        clock: Function
+                Monotonic clock, default time.monotonic
+
+        """
+        self.workers = {CREATE: create_workers, ACTIVATE: activate_workers,
+                        PROVISION: provision_workers, WAIT: poll_workers}
+        self.timeout = timeout
+        self.interval = interval
+        self.max_rate = max_rate
+        self.clock = clock or time.monotonic
+
+    def _timed(self, result, stage, call, *args):
+        """Run a stage of a device in a worker, recording its duration."""
+        start = self.clock()
+        try:
+            return call(*args)
+        finally:
+            result.timings[stage] = self.clock() - start
+
+    @staticmethod
+    def _create(result):
+        spec = result.spec
+        device = spec if isinstance(spec, Device) else Device(**spec)
+        device.create()
+        if device.fail:
+            raise RuntimeError(json.loads(device.content)['wo_newparams'])
+        return device
+
+    @staticmethod
+    def _activate(device):
+        device.activate()
+        _raise_for_response(device)
+        return device
+
+    @staticmethod
+    def _provision(device):
+        device.provision()
+        _raise_for_response(device)
+        return device
+
+    @staticmethod
+    def _provision_status(device_id):
+        device = Device()
+        device.device_id = device_id
+        try:
+            return device.provision_status()
+        except Exception:
+            # Network error or garbage, try again on the next poll
+            return None
+
+    @staticmethod
+    def _final(response):
+        # An error response has no status and fails the stage at once
+        return isinstance(response, dict) and \
+            response.get('status') != constants.RUNNING
+
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+    def run(self, specs):
+        """
+        Onboard devices.
+
+        Parameters
+        ----------
+        specs: Iterable
+                Device specifications, dictionaries of Device arguments
+                (customer_id, name, manufacturer_id, model_id, ...) or
+                Device objects not created yet
+
+        Returns
+        -------
+        Generator of DeviceResult in completion order. The status of a
+        result is OK, the final provisioning status of the device, FAIL
+        when a stage failed, or TIMEOUT.
+
+        """
+        specs = iter(specs)
+        rate_limiter = RateLimiter(self.max_rate) if self.max_rate else None
+        scheduler = PollScheduler(self._provision_status, self._final,
+                                  self.timeout,
+                                  Backoff(max_interval=self.interval),
+                                  clock=self.clock,
+                                  rate_limiter=rate_limiter)
+        executors = {stage: ThreadPoolExecutor(max_workers=workers)
+                     for stage, workers in self.workers.items()}
+        # Devices taken from the input before the wait stage
+        room = sum(self.workers[stage]
+                   for stage in (CREATE, ACTIVATE, PROVISION))
+        running = {}
+        waiting = {}
+        staged = 0
+        exhausted = False
+
+        def submit(stage, result, call, *args):
+            result.stage = stage
+            running[executors[stage].submit(
+                self._timed, result, stage, call, *args)] = (stage, result)
+
+        try:
+            while True:
+                while not exhausted and staged < room:
+                    spec = next(specs, None)
+                    if spec is None:
+                        exhausted = True
+                        break
+                    result = DeviceResult(spec)
+                    result.started = self.clock()
+                    staged += 1
+                    submit(CREATE, result, self._create, result)
+
+                polls = scheduler.pop_due(block=not running)
+                if not running and not polls:
+                    break
+                for device_id in polls:
+                    running[executors[WAIT].submit(
+                        scheduler.poll_key, device_id)] = (WAIT, device_id)
+
+                due = scheduler.next_due()
+                done, _ = wait(running, return_when=FIRST_COMPLETED,
+                               timeout=None if due is None
+                               else max(0, due - self.clock()))
+                for future in done:
+                    stage, result = running.pop(future)
+                    if stage == WAIT:
+                        final = scheduler.settle(result, future.result())
+                        if final is not None:
+                            yield self._finish(*waiting.pop(result),
+                                               future.result(), final)
+                        continue
+                    error = future.exception()
+                    if error is not None:
+                        staged -= 1
+                        yield self._fail(result, error)
+                    elif stage == CREATE:
+                        result.device_id = future.result().device_id
+                        submit(ACTIVATE, result, self._activate,
+                               future.result())
+                    elif stage == ACTIVATE:
+                        submit(PROVISION, result, self._provision,
+                               future.result())
+                    else:
+                        staged -= 1
+                        result.stage = WAIT
+                        waiting[result.device_id] = (result, self.clock())
+                        scheduler.add(result.device_id)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _fail(self, result, error):
+        result.status = constants.FAILED
+        result.error = str(error)
+        result.timings['total'] = self.clock() - result.started
+        return result
+
+    # pylint: disable=too-many-arguments
+    def _finish(self, result, wait_start, response, final):
+        now = self.clock()
+        result.timings[WAIT] = now - wait_start
+        result.timings['total'] = now - result.started
+        result.provision_status = response
+        if not final:
+            result.status = TIMEOUT
+        else:
+            result.status = response.get('status', constants.FAILED)
+            if result.status != OK:
+                result.error = response.get('errorMsg') or \
+                    response.get('wo_newparams') or None
+        return result
+
+
+def summarize(results):
+    """
+    Summary of a pipeline run.
+
+    Parameters
+    ----------
+    results: Iterable
+            DeviceResult objects
+
+    Returns
+    -------
+    Dictionary with the number of devices per status, the number of
+    failures per stage, and the mean and maximum duration of each stage
+
+    """
+    summary = {'count': 0, 'status': {}, 'failed_stage': {}, 'timings': {}}
+    durations = {}
+    for result in results:
+        summary['count'] += 1
+        summary['status'][result.status] = \
+            summary['status'].get(result.status, 0) + 1
+        if not result.ok:
+            summary['failed_stage'][result.stage] = \
+                summary['failed_stage'].get(result.stage, 0) + 1
+        for stage, duration in result.timings.items():
+            durations.setdefault(stage, []).append(duration)
+    for stage, values in durations.items():
+        summary['timings'][stage] = {'mean': sum(values) / len(values),
+                                     'max': max(values)}
+    return summary
@@ -4,11 +4,18 @@ import json
 import re
 from urllib.parse import urlencode
 
+from msa_sdk import cache
 from msa_sdk.msa_api import MSA_API
 
 
 class Repository(MSA_API):
-    """Class Repository."""
+    """
+    Class Repository.
+
+    Files, microservice and workflow definitions are read through the
+    repository cache (see msa_sdk.cache), and dropped from it when they
+    are written or deleted through this class.
+    """
 
     def __init__(self):
         """Initialize."""
@@ -17,6 +24,29 @@ class Repository(MSA_API):
         self.api_path = "/repository"
         self.api_path_v2 = "/repository/v2"
 
+    @staticmethod
+    def _invalidate(*file_uris):
+        """Drop cached resources, all of them without URI."""
+        file_uris = [file_uri for file_uri in file_uris if file_uri]
+        if not file_uris:
+            cache.repository_cache.clear()
+        for file_uri in file_uris:
+            cache.repository_cache.invalidate(file_uri)
+
+    @staticmethod
+    def _definition_uris(definition):
+        """Files of a microservice or workflow definition, by URI."""
+        if isinstance(definition, str):
+            try:
+                definition = json.loads(definition)
+            except ValueError:
+                return []
+        if not isinstance(definition, dict):
+            return []
+        return [meta.get('uri') for meta in
+                definition.get('metaInformationList') or []
+                if isinstance(meta, dict)]
+
     def file_update_comment(self, file_uri, comment):
         """
         File update document.
@@ -39,6 +69,7 @@ class Repository(MSA_API):
         self.path = "{}/comment?{}".format(self.api_path, url_encoded)
 
         self._call_post()
+        self._invalidate(file_uri)
 
     def get_microservice_variables(self, file_uri):
         """
@@ -60,7 +91,7 @@ class Repository(MSA_API):
         url_encoded = urlencode({'uri': file_uri})
         self.path = "{}/resource/variables?{}".format(
             self.api_path_v2, url_encoded)
-        self._call_get()
+        self._call_get_cached(cache.repository_cache, file_uri)
         return json.loads(self.content)
 
     def post_repository_variables(self, repository_uri):
@@ -105,7 +136,7 @@ class Repository(MSA_API):
         self.path = "{}/resource/microservice?{}".format(
             self.api_path_v2, url_encoded)
 
-        self._call_get()
+        self._call_get_cached(cache.repository_cache, file_uri)
         return json.loads(self.content)
 
     def put_microservice_details(self, microservice_details):
@@ -126,6 +157,7 @@ class Repository(MSA_API):
 
         self.path = "{}/resource/microservice".format(self.api_path_v2)
         self._call_put(microservice_details)
+        self._invalidate(*self._definition_uris(microservice_details))
 
     def create_microservice(self, microservice_details):
         """
@@ -145,6 +177,7 @@ class Repository(MSA_API):
 
         self.path = "{}/resource/microservice".format(self.api_path_v2)
         self._call_post(microservice_details)
+        self._invalidate(*self._definition_uris(microservice_details))
 
     def delete_repository_resource(self, file_uri):
         """
@@ -165,6 +198,7 @@ class Repository(MSA_API):
         url_encoded = urlencode({'uri': file_uri})
         self.path = "{}/resource?{}".format(self.api_path_v2, url_encoded)
         self._call_delete()
+        self._invalidate(file_uri)
 
     def get_microservice_path_by_name(self, microservice_name: str,
                                       deployment_settings_id: str):
@@ -234,12 +268,17 @@ class Repository(MSA_API):
         self.path = "/conf-profile/v2/detach/{}/repository/files".format(
             deployment_settings_id)
         self._call_put(json.dumps(ms_list))
+        self._invalidate(*ms_list)
         return None
 
     def get_workflow_definition(self, file_uri: str) -> dict:
         """
         Get workflow definition.
 
+        Read through msa_sdk.cache. With MSA_SDK_CACHE_TTL above 0, a
+        definition changed by another process or workflow may be returned
+        stale until its entry expires.
+
         Parameters
         ----------
             file_uri: Path to workflow file like 'Process/workflows/TEST_WF1/TEST_WF1.xml'.
@@ -252,7 +291,7 @@ class Repository(MSA_API):
         url_encoded = urlencode({'uri': file_uri})
         self.action = 'Get workflow definition'
         self.path = "/repository/v2/resource/workflow?{}".format(url_encoded)
-        self._call_get()
+        self._call_get_cached(cache.repository_cache, file_uri)
         return json.loads(self.content)
 
     def change_workflow_definition(
@@ -283,6 +322,7 @@ class Repository(MSA_API):
                 process_details['tasks'] = list()
 
         self._call_put(json.dumps(workflow_definition_dict))
+        self._invalidate(file_uri)
         return None
 
     def create_workflow_definition(
@@ -358,6 +398,7 @@ class Repository(MSA_API):
                 process_details['tasks'] = list()
 
         self._call_post(workflow_definition_dict)
+        self._invalidate(*self._definition_uris(workflow_definition_dict))
         return None
 
     def delete_workflow_definition(self, file_uri: str) -> None:
@@ -376,6 +417,7 @@ class Repository(MSA_API):
         self.action = 'Delete workflow definition'
         self.path = "/repository/v1/resource/workflow?{}".format(url_encoded)
         self._call_delete()
+        self._invalidate(file_uri)
         return None
 
 
@@ -383,6 +425,10 @@ class Repository(MSA_API):
         """
         Get file content.
 
+        Read through msa_sdk.cache. With MSA_SDK_CACHE_TTL above 0, a file
+        written by another process or workflow may be returned stale
+        until its entry expires, otherwise every read is revalidated.
+
         Parameters
         ----------
             file_uri: String
@@ -398,7 +444,7 @@ class Repository(MSA_API):
         self.action = 'Get file content'
         url_encoded = urlencode({'uri': file_uri})
         self.path = "{}/file?{}".format(self.api_path, url_encoded)
-        self._call_get()
+        self._call_get_cached(cache.repository_cache, file_uri)
         return json.loads(self.content)
 
     def add_file(self, file_uri, content):
@@ -422,6 +468,7 @@ class Repository(MSA_API):
         self.path = "{}/file?{}".format(self.api_path, url_encoded)
         content_dict = {'content': content}
         self._call_post(content_dict)
+        self._invalidate(file_uri)
 
     def add_directory(self, uri):
         """
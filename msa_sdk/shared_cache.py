@@ -0,0 +1,259 @@
+"""
+Module shared_cache.
+
+Cache of slowly changing lookup tables (manufacturers, customers,
+managers, security nodes) shared by all the processes of a node through
+a SQLite file, so short-lived task processes do not all fetch the same
+tables again.
+
+The cache is off unless MSA_SDK_SHARED_CACHE_DIR names a directory.
+Each table has its own time to live, overridden by
+MSA_SDK_SHARED_CACHE_TTL_<TABLE>, for instance
+MSA_SDK_SHARED_CACHE_TTL_CUSTOMERS=60.
+
+When an entry expires, one process takes a lease and refreshes it while
+the others keep serving the previous copy, and the new copy replaces
+the old one in a single transaction.
+
+A cache that cannot be used, for instance a read-only or full directory
+or a lock timeout, is skipped: the request is sent as without cache and
+the first error is logged.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTLS = {
+    'manufacturers': 3600.0,
+    'customers': 300.0,
+    'managers': 300.0,
+    'sec_nodes': 300.0,
+}
+
+DB_NAME = 'msa_sdk_lookup.sqlite'
+
+# Errors of an unusable cache directory or SQLite file
+ERRORS = (sqlite3.Error, OSError)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = ('CREATE TABLE IF NOT EXISTS entries ('
+           'key TEXT PRIMARY KEY, body TEXT, stored REAL NOT NULL, '
+           'lease REAL NOT NULL DEFAULT 0)')
+
+
+class SharedCache():
+    """Lookup tables cached in a SQLite file shared by processes."""
+
+    def __init__(self, directory, ttls=None, lease_timeout=30.0,
+                 clock=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        directory: String
+                Directory of the SQLite file, created if needed
+        ttls: Dictionary
+                Seconds to live per table, on top of DEFAULT_TTLS and
+                the MSA_SDK_SHARED_CACHE_TTL_<TABLE> variables
+        lease_timeout: Float
+                Seconds a process may take to refresh an entry before
+                another one tries
+        clock: Function
+                Wall clock, default time.time
+
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, DB_NAME)
+        self.ttls = dict(DEFAULT_TTLS)
+        for table in list(self.ttls):
+            value = os.environ.get(
+                'MSA_SDK_SHARED_CACHE_TTL_{}'.format(table.upper()))
+            if value:
+                self.ttls[table] = float(value)
+        self.ttls.update(ttls or {})
+        self.lease_timeout = lease_timeout
+        self.clock = clock or time.time
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connect().execute(_SCHEMA)
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit, transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=10,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def ttl(self, table):
+        """
+        Time to live of a table.
+
+        Parameters
+        ----------
+        table: String
+                Table name, a key of DEFAULT_TTLS
+
+        Returns
+        -------
+        Seconds, 0 for an unknown table
+
+        """
+        return self.ttls.get(table, 0.0)
+
+    def _claim(self, key, ttl):
+        """
+        Return (body, fresh) of an entry, or take the refresh lease.
+
+        The lease is taken when the entry is missing or stale and no
+        other process holds it, then body is None or the stale body and
+        fresh is False.
+        """
+        connection = self._connect()
+        now = self.clock()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT body, stored, lease FROM entries WHERE key = ?',
+                (key,)).fetchone()
+            if row is not None and row[0] is not None:
+                if now - row[1] < ttl:
+                    return row[0], True
+                if row[2] > now:
+                    # Another process is refreshing, serve the old copy
+                    return row[0], True
+            connection.execute(
+                'INSERT INTO entries (key, body, stored, lease) '
+                'VALUES (?, NULL, 0, ?) ON CONFLICT(key) DO UPDATE '
+                'SET lease = excluded.lease',
+                (key, now + self.lease_timeout))
+            return (row[0] if row is not None else None), False
+        finally:
+            connection.execute('COMMIT')
+
+    def get_or_fetch(self, key, table, fetch):
+        """
+        Get the body of key, fetched again once stale.
+
+        Parameters
+        ----------
+        key: String
+                Entry key, the request URL
+        table: String
+                Table of the entry, selects the time to live
+        fetch: Function
+                Called without argument to get a new body, returns None
+                when the request failed
+
+        Returns
+        -------
+        Body, or None if it could not be fetched nor found
+
+        """
+        body, fresh = self._claim(key, self.ttl(table))
+        if fresh:
+            self.hits += 1
+            return body
+        self.misses += 1
+        new_body = None
+        try:
+            new_body = fetch()
+        finally:
+            connection = self._connect()
+            if new_body is None:
+                # Let another process try
+                connection.execute(
+                    'UPDATE entries SET lease = 0 WHERE key = ?', (key,))
+            else:
+                connection.execute(
+                    'UPDATE entries SET body = ?, stored = ?, lease = 0 '
+                    'WHERE key = ?', (new_body, self.clock(), key))
+        return new_body
+
+    def invalidate(self, key=None):
+        """
+        Drop an entry, or all the entries.
+
+        Parameters
+        ----------
+        key: String
+                Entry key, None for all
+
+        Returns
+        -------
+        None
+
+        """
+        connection = self._connect()
+        if key is None:
+            connection.execute('DELETE FROM entries')
+        else:
+            connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def close(self):
+        """
+        Close the connection of the calling thread.
+
+        Returns
+        -------
+        None
+
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+_error_logged = False
+
+
+def get_shared_cache():
+    """
+    Shared cache of the process.
+
+    Returns
+    -------
+    SharedCache, None if MSA_SDK_SHARED_CACHE_DIR is not set
+
+    """
+    global _shared_cache  # pylint: disable=global-statement
+    directory = os.environ.get('MSA_SDK_SHARED_CACHE_DIR')
+    if not directory:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None or \
+                os.path.dirname(_shared_cache.path) != directory:
+            _shared_cache = SharedCache(directory)
+        return _shared_cache
+
+
+def log_error(error):
+    """
+    Log an error of the shared cache, once per process.
+
+    Parameters
+    ----------
+    error: Exception
+            One of ERRORS
+
+    Returns
+    -------
+    None
+
+    """
+    global _error_logged  # pylint: disable=global-statement
+    with _shared_cache_lock:
+        if _error_logged:
+            return
+        _error_logged = True
+    logger.warning('Shared cache disabled: %s', error)
@@ -0,0 +1,147 @@
+"""
+Module streaming.
+
+Incremental parsing of large JSON responses. The items of a top level
+JSON array, or the members of a top level JSON object, are decoded one
+at a time as the body is received, so only one item is held in memory
+besides the current chunk.
+"""
+import codecs
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = ',:]}' + _WHITESPACE
+
+
+class _Buffer():
+    """Text received so far and the position of the parser."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.ended = False
+
+    def more(self):
+        """Append the next chunk, False at the end of the body."""
+        if self.ended:
+            return False
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                # Drop what was already parsed before growing the text
+                self.text = self.text[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.text = self.text[self.pos:] + self._decoder.decode(b'', True)
+        self.pos = 0
+        self.ended = True
+        return False
+
+    def peek(self):
+        """Next non blank character, None at the end of the body."""
+        while True:
+            while self.pos < len(self.text) and \
+                    self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return None
+
+    def expect(self, chars):
+        """Consume the next non blank character, one of chars."""
+        char = self.peek()
+        if char is None or char not in chars:
+            raise json.JSONDecodeError(
+                'Expecting one of {!r}'.format(chars), self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self, decoder):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # A number may go on in the next chunk, only trust a value
+            # followed by a delimiter
+            if self.ended or (end < len(self.text) and
+                              self.text[end] in _DELIMITERS):
+                self.pos = end
+                return value
+            self.more()
+
+
+def iter_json_items(chunks, decoder=None):
+    """
+    Iterate over a JSON array or object received in chunks.
+
+    Parameters
+    ----------
+    chunks: Iterable
+            Chunks of the body, bytes in UTF-8 or str
+    decoder: json.JSONDecoder
+            Decoder of the items, default json.JSONDecoder()
+
+    Returns
+    -------
+    Generator of the items of an array, or of (key, value) tuples of an
+    object. A body holding another JSON value yields that value.
+
+    """
+    decoder = decoder or json.JSONDecoder()
+    buffer = _Buffer(chunks)
+    first = buffer.peek()
+    if first is None:
+        return
+    if first not in '[{':
+        yield buffer.value(decoder)
+        return
+    closing = ']' if first == '[' else '}'
+    buffer.pos += 1
+    if buffer.peek() == closing:
+        buffer.pos += 1
+        return
+    while True:
+        if closing == '}':
+            key = buffer.value(decoder)
+            buffer.expect(':')
+            yield key, buffer.value(decoder)
+        else:
+            yield buffer.value(decoder)
+        if buffer.expect(',' + closing) == closing:
+            return
+
+
+def iter_response_items(response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate over the JSON items of a streamed requests response.
+
+    The response is closed once iterated, or if the iteration stops
+    early.
+
+    Parameters
+    ----------
+    response: requests.Response
+            Response of a request sent with stream=True
+    chunk_size: Integer
+            Bytes read at a time
+
+    Returns
+    -------
+    Generator, see iter_json_items
+
+    """
+    try:
+        yield from iter_json_items(response.iter_content(chunk_size))
+    finally:
+        response.close()
@@ -0,0 +1,419 @@
+"""
+Module stub_server.
+
+Fake MSA REST API answering the endpoints used by the SDK, to measure
+concurrency, pooling and retries without a live MSA. It runs in a
+background thread::
+
+    with StubServer(latency=0.01) as server:
+        os.environ.update(server.env())
+        Device(device_id=1234)
+
+or standalone, and prints the environment to point the SDK at it::
+
+    python -m msa_sdk.stub_server --port 8480 --error-rate 0.05
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
+
+API_PREFIX = '/ubi-api-rest'
+
+
+def device(device_id):
+    """
+    Device as returned by /device/v3/{id}.
+
+    Parameters
+    ----------
+    device_id: Integer
+            Device ID
+
+    Returns
+    -------
+    Dictionary
+
+    """
+    return {
+        "id": device_id, "name": "Stub device {}".format(device_id),
+        "externalReference": "MSA{}".format(device_id),
+        "manufacturerId": 14020601, "modelId": 14020601,
+        "managementAddress": "10.{}.{}.{}".format((device_id >> 16) & 255,
+                                                  (device_id >> 8) & 255,
+                                                  device_id & 255),
+        "managementPort": "22", "managementInterface": "", "login": "root",
+        "password": "stub", "passwordAdmin": "", "logEnabled": False,
+        "logMoreEnabled": False, "mailAlerting": False, "reporting": False,
+        "useNat": True, "snmpCommunity": "", "hostname": "stub"
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Dispatch requests to the routes of the owning StubServer."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, payload = self.server.stub.dispatch(self.command, self.path,
+                                                    body)
+        data = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+    def log_message(self, *args):
+        """Do not log each request on stderr."""
+
+
+class StubServer():
+    """
+    Fake MSA REST API served from a background thread.
+
+    Every request sleeps latency seconds plus up to jitter seconds, and
+    fails with error_status for a share error_rate of the requests.
+    List endpoints return payload_size items. A process instance is
+    RUNNING for its first process_polls - 1 reads, then ENDED, and so are
+    the provisioning of a device, then OK, and its synchronization.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, payload_size=10,
+                 process_polls=1, seed=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        host: String
+                Listening address
+        port: Integer
+                Listening port, 0 picks a free one
+        latency: Float
+                Seconds added to every request
+        jitter: Float
+                Maximum random seconds added on top of latency
+        error_rate: Float
+                Share of requests failing, between 0 and 1
+        error_status: Integer
+                HTTP status of failing requests
+        payload_size: Integer
+                Number of items returned by list endpoints
+        process_polls: Integer
+                Reads of a process instance until it is ENDED
+        seed: Integer
+                Seed of the latency and error draws
+
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_size = payload_size
+        self.process_polls = process_polls
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._process_reads = {}
+        self._process_ids = itertools.count(1)
+        self._status_reads = {}
+        self._device_ids = itertools.count(1001)
+        self._routes = []
+        self._server = None
+        self._thread = None
+        self._add_default_routes()
+
+    def __enter__(self):
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *args):
+        """Stop the server."""
+        self.stop()
+
+    @property
+    def url(self):
+        """Base URL of the API, as built by MSA_API."""
+        return 'http://{}:{}{}'.format(self.host, self.port, API_PREFIX)
+
+    def env(self):
+        """
+        Environment pointing the SDK at this server.
+
+        Returns
+        -------
+        Dictionary of UBIQUBE_MSA_HOST, UBIQUBE_MSA_PORT, API_TOKEN_URL
+
+        """
+        return {
+            'UBIQUBE_MSA_HOST': self.host,
+            'UBIQUBE_MSA_PORT': str(self.port),
+            'API_TOKEN_URL': 'http://{}:{}/auth/token'.format(self.host,
+                                                              self.port),
+        }
+
+    def start(self):
+        """
+        Listen and serve from a daemon thread.
+
+        Returns
+        -------
+        The started server
+
+        """
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05},
+                                        name='StubServer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+
+        Returns
+        -------
+        None
+
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def add_route(self, method, pattern, handler):
+        """
+        Answer a route, routes added last are matched first.
+
+        Parameters
+        ----------
+        method: String
+                HTTP method
+        pattern: String
+                Regular expression matched against the path without the
+                API prefix nor the query string
+        handler: Function
+                Called with the match and the parsed body, or the query
+                parameters of a request without body, returns a tuple
+                (status, JSON payload or None)
+
+        Returns
+        -------
+        None
+
+        """
+        self._routes.insert(0, (method, re.compile(pattern + '$'), handler))
+
+    def dispatch(self, method, path, body):
+        """
+        Answer a request.
+
+        Parameters
+        ----------
+        method: String
+                HTTP method
+        path: String
+                Request path with its query string
+        body: Bytes
+                Request body
+
+        Returns
+        -------
+        Tuple (status, JSON payload or None)
+
+        """
+        path, query = urlsplit(path)[2:4]
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        with self._lock:
+            key = '{} {}'.format(method, path)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self.error_status, {"message": "Stub error"}
+        try:
+            data = json.loads(body) if body else dict(parse_qsl(query))
+        except ValueError:
+            data = None
+        for route_method, regex, handler in self._routes:
+            match = regex.match(path)
+            if route_method == method and match:
+                return handler(match, data)
+        return 200, {}
+
+    def request_count(self, method=None, pattern=''):
+        """
+        Count the requests received.
+
+        Parameters
+        ----------
+        method: String
+                Only count this HTTP method
+        pattern: String
+                Only count paths matching this regular expression
+
+        Returns
+        -------
+        Integer
+
+        """
+        regex = re.compile(pattern)
+        with self._lock:
+            return sum(count for key, count in self.requests.items()
+                       if (method is None or key.split(' ')[0] == method)
+                       and regex.search(key.split(' ', 1)[1]))
+
+    def _process_instance(self, match, _):
+        process_id = int(match.group(1))
+        with self._lock:
+            reads = self._process_reads.get(process_id, 0) + 1
+            self._process_reads[process_id] = reads
+        status = 'ENDED' if reads >= self.process_polls else 'RUNNING'
+        return 200, {"processId": {"id": process_id},
+                     "status": {"status": status, "details": ""}}
+
+    def _create_device(self, _, data):
+        with self._lock:
+            device_id = next(self._device_ids)
+        created = device(device_id)
+        if isinstance(data, dict):
+            created.update(data)
+        created['id'] = device_id
+        return 200, created
+
+    def _status_read(self, key):
+        """Count a read of a device status, tell if it is final."""
+        with self._lock:
+            reads = self._status_reads.get(key, 0) + 1
+            self._status_reads[key] = reads
+        return reads >= self.process_polls
+
+    def _provision_status(self, match, _):
+        final = self._status_read(('provision', int(match.group(1))))
+        status = 'OK' if final else 'RUNNING'
+        return 200, {"status": status, "errorMsg": "",
+                     "rawJSONResult": {"sms_status": status}}
+
+    def _synchronize_status(self, _, query):
+        device_id = int(query.get('deviceId', 0))
+        final = self._status_read(('synchronize', device_id))
+        return 200, {"deviceId": device_id,
+                     "status": 'ENDED' if final else 'RUNNING'}
+
+    def _execute(self, *_):
+        with self._lock:
+            process_id = next(self._process_ids)
+        return 200, {"serviceId": {"id": process_id},
+                     "processId": {"id": process_id},
+                     "status": {"status": "RUNNING"}}
+
+    def _device_list(self, *_):
+        return 200, [{"id": device_id, "name": "Stub device {}".format(
+            device_id)} for device_id in range(1, self.payload_size + 1)]
+
+    def _service_instances(self, *_):
+        return 200, [{"id": service_id, "name": "Process/Stub",
+                      "state": "ACTIVE"}
+                     for service_id in range(1, self.payload_size + 1)]
+
+    def _workflow_details(self, _, query):
+        page = int(query.get('page', 1))
+        page_size = int(query.get('page_size', 100))
+        first = (page - 1) * page_size + 1
+        last = min(first + page_size, self.payload_size + 1)
+        return 200, [{"serviceId": {"id": service_id},
+                      "status": {"status": "ENDED"}}
+                     for service_id in range(first, last)]
+
+    def _objects(self, *_):
+        return 200, {"stub_ms_{}".format(index): {} for index in
+                     range(1, self.payload_size + 1)}
+
+    def _add_default_routes(self):
+        self.add_route('POST', r'/auth/token', lambda *_: (
+            200, {"access_token": "stub-token", "expires_in": 3600}))
+        self.add_route('GET', r'/device/v3/(\d+)',
+                       lambda match, _: (200, device(int(match.group(1)))))
+        self.add_route('GET', r'/device/reference/[A-Za-z]*(\d+)',
+                       lambda match, _: (200, device(int(match.group(1)))))
+        self.add_route('POST', r'/device/v2/\d+', self._create_device)
+        self.add_route('POST', r'/device/(?:activate|provisioning)/\d+',
+                       lambda *_: (200, None))
+        self.add_route('GET', r'/device/provisioning/status/(\d+)',
+                       self._provision_status)
+        self.add_route('GET', r'/device/v1/customer/\d+/device-features',
+                       self._device_list)
+        self.add_route('GET', r'/lookup/(?:customer/)?devices.*',
+                       self._device_list)
+        self.add_route('GET', r'/orchestration/\d+/service/instance',
+                       self._service_instances)
+        self.add_route('GET', r'/orchestration/v2/\w+/workflow/details',
+                       self._workflow_details)
+        self.add_route('GET', r'/ordercommand/objects/\d+',
+                       self._objects)
+        self.add_route('GET', r'/orchestration/process/instance/(\d+)',
+                       self._process_instance)
+        self.add_route('POST', r'/orchestration/(?:service|process)/'
+                       r'execute/.*', self._execute)
+        self.add_route('POST', r'/ordercommand/execute/\d+/\w+',
+                       lambda *_: (200, None))
+        self.add_route('POST', r'/ordercommand/synchronize/\d+',
+                       lambda *_: (200, None))
+        self.add_route('GET', r'/ordercommand/synchronize/status',
+                       self._synchronize_status)
+        self.add_route('GET', r'/ordercommand/objects/\d+/.*',
+                       lambda *_: (200, {}))
+        self.add_route('GET', r'/repository/.*', lambda *_: (200, {}))
+
+
+def main(argv=None):
+    """Run the stub server until interrupted."""
+    parser = argparse.ArgumentParser(description='Fake MSA REST API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8480)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--payload-size', type=int, default=10)
+    parser.add_argument('--process-polls', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = StubServer(**vars(args)).start()
+    for name, value in server.env().items():
+        print('export {}={}'.format(name, value), flush=True)
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,213 @@
+"""
+Module tracing.
+
+Export the spans of the API requests made by a task. Every request is
+a child span of the task span read from the context, and the exporter
+sends finished spans in batches to a sink::
+
+    tracing.SpanExporter(tracing.FileSink('/tmp/spans.ndjson')).install()
+
+Setting MSA_SDK_TRACE_FILE to a path, or MSA_SDK_TRACE_LOG=1 to send
+the spans through the loggers (and the ES handler), installs an
+exporter at import.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from msa_sdk import instrumentation
+
+
+class FileSink():
+    """Append spans to a file, one JSON document per line."""
+
+    def __init__(self, path):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        path: String
+                File the spans are appended to
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, spans):
+        """Write a batch of spans."""
+        data = ''.join(json.dumps(span) + '\n' for span in spans)
+        with self._lock, open(self.path, 'a') as spans_file:
+            spans_file.write(data)
+
+
+class LoggerSink():
+    """
+    Log each span as a record carrying the span in its span attribute.
+
+    Records go up to the root logger, so an ES handler indexes the span
+    with the other log fields.
+    """
+
+    def __init__(self, logger=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        logger: logging.Logger
+                Logger of the spans, default msa-sdk.spans
+
+        """
+        self.logger = logger or logging.getLogger('msa-sdk.spans')
+
+    def __call__(self, spans):
+        """Log a batch of spans."""
+        for span in spans:
+            elapsed = (span['endTimeUnixNano'] -
+                       span['startTimeUnixNano']) / 1e6
+            self.logger.info('span %s %s %s %.1fms', span['name'],
+                             span['attributes']['http.method'],
+                             span['attributes']['http.route'], elapsed,
+                             extra={'span': span})
+
+
+class SpanExporter():
+    """
+    Batch the spans of finished requests and send them to a sink.
+
+    A batch is sent when it holds max_batch spans, when a span finishes
+    more than flush_interval seconds after the batch was started, and
+    at exit.
+    """
+
+    def __init__(self, sink, max_batch=100, flush_interval=5.0, clock=None):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        sink: Function
+                Called with a list of spans
+        max_batch: Integer
+                Maximum spans per batch
+        flush_interval: Float
+                Maximum age in seconds of a batch
+        clock: Function
+                Monotonic clock, default time.monotonic
+
+        """
+        self.sink = sink
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.clock = clock or time.monotonic
+        self.exported = 0
+        self.failed = 0
+        self._batch = []
+        self._batch_start = None
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        """Add the span of a finished request, usable as an after hook."""
+        self.export(record.to_span())
+
+    def export(self, span):
+        """
+        Add a span to the current batch.
+
+        Parameters
+        ----------
+        span: Dictionary
+                Span to export
+
+        Returns
+        -------
+        None
+
+        """
+        now = self.clock()
+        with self._lock:
+            if not self._batch:
+                self._batch_start = now
+            self._batch.append(span)
+            if len(self._batch) < self.max_batch and \
+                    now - self._batch_start < self.flush_interval:
+                return
+        self.flush()
+
+    def flush(self):
+        """
+        Send the current batch.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            batch = self._batch
+            self._batch = []
+        if not batch:
+            return
+        try:
+            self.sink(batch)
+            self.exported += len(batch)
+        except Exception:  # pylint: disable=broad-except
+            # Tracing must never break the task
+            self.failed += len(batch)
+            instrumentation.logger.exception('Span export failed')
+
+    def install(self, at_exit=True):
+        """
+        Register the exporter as an instrumentation after hook.
+
+        Parameters
+        ----------
+        at_exit: Bool
+                Flush the last batch when the process exits
+
+        Returns
+        -------
+        The exporter
+
+        """
+        instrumentation.add_hooks(after=self)
+        if at_exit:
+            atexit.register(self.flush)
+        return self
+
+    def uninstall(self):
+        """
+        Unregister the exporter and send the current batch.
+
+        Returns
+        -------
+        None
+
+        """
+        instrumentation.remove_hooks(after=self)
+        atexit.unregister(self.flush)
+        self.flush()
+
+
+def install_from_env():
+    """
+    Install a span exporter configured by the environment.
+
+    MSA_SDK_TRACE_FILE exports to a file, otherwise MSA_SDK_TRACE_LOG=1
+    exports through the loggers.
+
+    Returns
+    -------
+    The exporter or None
+
+    """
+    path = os.environ.get('MSA_SDK_TRACE_FILE')
+    if path:
+        return SpanExporter(FileSink(path)).install()
+    if os.environ.get('MSA_SDK_TRACE_LOG', '') not in ('', '0', 'false'):
+        return SpanExporter(LoggerSink()).install()
+    return None
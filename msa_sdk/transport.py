@@ -0,0 +1,210 @@
+"""Module transport."""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+IDEMPOTENT_METHODS = SAFE_METHODS | frozenset(['PUT', 'DELETE'])
+
+# Session kinds
+DEFAULT = 'default'
+IDEMPOTENT = 'idempotent'
+NO_RETRY = 'no_retry'
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class Transport():
+    """
+    Pooled HTTP transport shared by all the MSA_API instances.
+
+    Connections are kept alive and reused across calls. Requests are
+    retried with exponential backoff on connection errors. Only GET, HEAD
+    and OPTIONS are also retried on the configured status codes, since
+    several PUT and DELETE actions of the API (firmware update,
+    configuration push) must not run twice. The IDEMPOTENT session
+    retries PUT and DELETE on status too, for the calls known to be safe,
+    and the NO_RETRY session never retries.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 pool_block=False, keep_alive=None, retries=None,
+                 backoff_factor=None, status_forcelist=(502, 503, 504)):
+        """
+        Initialize.
+
+        Parameters
+        ----------
+        pool_connections: Integer
+                Number of host pools to keep
+                Default: MSA_SDK_POOL_CONNECTIONS or 10
+        pool_maxsize: Integer
+                Connections kept per host
+                Default: MSA_SDK_POOL_SIZE or 20
+        pool_block: Bool
+                Block when a host pool is exhausted instead of opening
+                extra connections
+        keep_alive: Bool
+                Reuse connections between calls
+                Default: MSA_SDK_KEEP_ALIVE or True
+        retries: Integer
+                Retries on connection errors and on status_forcelist
+                Default: MSA_SDK_HTTP_RETRIES or 3
+        backoff_factor: Float
+                Backoff factor between retries
+                Default: MSA_SDK_HTTP_BACKOFF or 0.5
+        status_forcelist: Tuple
+                Status codes that trigger a retry
+
+        """
+        if pool_connections is None:
+            pool_connections = _env_int('MSA_SDK_POOL_CONNECTIONS', 10)
+        if pool_maxsize is None:
+            pool_maxsize = _env_int('MSA_SDK_POOL_SIZE', 20)
+        if keep_alive is None:
+            keep_alive = os.environ.get(
+                'MSA_SDK_KEEP_ALIVE', 'true').lower() not in ('0', 'false')
+        if retries is None:
+            retries = _env_int('MSA_SDK_HTTP_RETRIES', 3)
+        if backoff_factor is None:
+            backoff_factor = _env_float('MSA_SDK_HTTP_BACKOFF', 0.5)
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = tuple(status_forcelist)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _build_session(self, kind=DEFAULT):
+        if kind == NO_RETRY:
+            retry = 0
+        else:
+            # Connection errors are retried whatever the method, status
+            # codes only for allowed_methods
+            retry = Retry(total=self.retries,
+                          backoff_factor=self.backoff_factor,
+                          status_forcelist=self.status_forcelist,
+                          allowed_methods=(IDEMPOTENT_METHODS
+                                           if kind == IDEMPOTENT
+                                           else SAFE_METHODS),
+                          raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def get_session(self, kind=DEFAULT) -> requests.Session:
+        """
+        Pooled session of a retry policy, created on first use.
+
+        Parameters
+        ----------
+        kind: String
+                DEFAULT, IDEMPOTENT or NO_RETRY
+
+        Returns
+        -------
+        requests.Session
+
+        """
+        session = self._sessions.get(kind)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(kind)
+                if session is None:
+                    session = self._build_session(kind)
+                    self._sessions[kind] = session
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled session, created on first use."""
+        return self.get_session()
+
+    def close(self):
+        """
+        Close the pooled connections.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+_transport = Transport()
+
+
+def get_transport() -> Transport:
+    """
+    Shared transport.
+
+    Returns
+    -------
+    Transport used by all the MSA_API instances
+
+    """
+    return _transport
+
+
+def configure(**kwargs) -> Transport:
+    """
+    Replace the shared transport.
+
+    Parameters
+    ----------
+    kwargs: Transport arguments (pool_maxsize, retries, ...)
+
+    Returns
+    -------
+    The new shared transport
+
+    """
+    global _transport  # pylint: disable=global-statement
+    old = _transport
+    _transport = Transport(**kwargs)
+    old.close()
+    return _transport
+
+
+def session(kind=DEFAULT) -> requests.Session:
+    """
+    Pooled session of the shared transport.
+
+    Parameters
+    ----------
+    kind: String
+            Retry policy, DEFAULT, IDEMPOTENT or NO_RETRY
+
+    Returns
+    -------
+    requests.Session
+
+    """
+    return _transport.get_session(kind)
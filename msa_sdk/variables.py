@@ -4,8 +4,6 @@ import json
 import os
 import sys
 
-import requests
-
 
 class VariableExistsException(BaseException):
     """Class Exception for variables that already were added."""
@@ -19,7 +19,7 @@ def test_get_vars_value(admin_fixture):
     }])
     test_requested_var_value = 'UBI_VAR_VALUE'
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = test_response
         assert admin.get_vars_value(
             test_requested_var_name) == test_requested_var_value
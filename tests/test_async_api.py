@@ -0,0 +1,176 @@
+"""
+Test async API
+"""
+
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from util import device_info
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import instrumentation
+from msa_sdk.async_api import AsyncAPIError
+from msa_sdk.async_api import AsyncDevice
+from msa_sdk.async_api import AsyncLookup
+from msa_sdk.async_api import AsyncOrchestration
+from msa_sdk.async_api import AsyncOrder
+
+
+def _response(text, ok=True, status_code=200):
+    response = MagicMock()
+    response.ok = ok
+    response.status_code = status_code
+    response.text = text
+    response.json.return_value = json.loads(text) if text else {}
+    return response
+
+
+def test_read_device():
+    """
+    Test async read device
+    """
+    with patch('requests.Session.request') as mock_request:
+        mock_request.return_value = _response(device_info())
+        device = asyncio.run(AsyncDevice().read(21594))
+
+        assert device['name'] == 'Linux self MSA'
+        args, kwargs = mock_request.call_args
+        assert args[0] == 'GET'
+        assert args[1].endswith('/device/v3/21594')
+        assert 'traceparent' in kwargs['headers']
+        assert kwargs['data'] is None
+
+
+def test_read_device_by_ref():
+    """
+    Test async read device by reference
+    """
+    with patch('requests.Session.request') as mock_request:
+        mock_request.return_value = _response(device_info())
+        asyncio.run(AsyncDevice().read(None, by_ref='MSA21594'))
+        assert mock_request.call_args[0][1].endswith(
+            '/device/reference/MSA21594')
+
+
+def test_read_many_bounded():
+    """
+    Test concurrent reads honour max concurrency
+    """
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def request(*args, **kwargs):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        if args[1].endswith('/3'):
+            return _response('{"message": "Not found"}', False, 404)
+        return _response(device_info())
+
+    with patch('requests.Session.request', side_effect=request):
+        results = asyncio.run(
+            AsyncDevice(max_concurrency=3).read_many(range(10)))
+
+    assert state['peak'] == 3
+    assert len(results) == 10
+    assert results[0]['id'] == 21594
+    assert isinstance(results[3], AsyncAPIError)
+    assert results[3].status_code == 404
+    assert results[3].message == 'Not found'
+
+
+def test_get_process_instance():
+    """
+    Test async get process instance
+    """
+    with patch('requests.Session.request') as mock_request:
+        mock_request.return_value = _response(
+            '{"status": {"status": "ENDED"}}')
+        result = asyncio.run(AsyncOrchestration().get_process_instance(12))
+
+        assert result['status']['status'] == 'ENDED'
+        assert mock_request.call_args[0][1].endswith(
+            '/orchestration/process/instance/12')
+
+
+def test_command_execute():
+    """
+    Test async command execute
+    """
+    params = {"simple_firewall": {"12": {"object_id": "12"}}}
+    with patch('requests.Session.request') as mock_request:
+        mock_request.return_value = _response('')
+        result = asyncio.run(AsyncOrder().command_execute(1234, 'CREATE',
+                                                          params))
+
+        assert result is None
+        args, kwargs = mock_request.call_args
+        assert args[0] == 'POST'
+        assert args[1].endswith('/ordercommand/execute/1234/CREATE')
+        assert json.loads(kwargs['data']) == params
+        assert kwargs['headers']['Content-Type'] == 'application/json'
+        assert kwargs['timeout'] == 300
+
+
+def test_command_execute_bad_params():
+    """
+    Test async command execute with bad parameters
+    """
+    with pytest.raises(TypeError):
+        asyncio.run(AsyncOrder().command_execute(1234, 'CREATE', 'params'))
+
+
+def test_look_list_device_ids():
+    """
+    Test async look list device ids
+    """
+    with patch('requests.Session.request') as mock_request:
+        mock_request.return_value = _response('[{"id": 1}, {"id": 2}]')
+        lookup = AsyncLookup()
+        assert asyncio.run(lookup.look_list_device_ids()) == [{"id": 1},
+                                                               {"id": 2}]
+        # A new event loop gets its own semaphore
+        assert asyncio.run(lookup.look_list_device_ids()) == [{"id": 1},
+                                                               {"id": 2}]
+
+
+def test_request_error_without_json():
+    """
+    Test error message falls back to the body
+    """
+    response = _response('', False, 500)
+    response.text = 'Internal error'
+    response.json.side_effect = ValueError
+    with patch('requests.Session.request', return_value=response):
+        with pytest.raises(AsyncAPIError) as error:
+            asyncio.run(AsyncLookup().look_list_device_ids())
+    assert error.value.message == 'Internal error'
+    assert error.value.action == 'Get device ids'
+
+
+def test_instrumented(stub_server):
+    """
+    Test async calls are recorded like synchronous ones
+    """
+    aggregator = instrumentation.Aggregator().install()
+    try:
+        device, _ = asyncio.run(AsyncDevice().gather([
+            AsyncDevice().read(3),
+            AsyncOrder().command_execute(3, 'CREATE', {"a": {"1": {}}})]))
+    finally:
+        aggregator.uninstall()
+
+    assert device['id'] == 3
+    records = sorted(aggregator.records, key=lambda record: record.method)
+    assert [(record.endpoint, record.action) for record in records] == [
+        ('GET /device/v3/{id}', 'Read device'),
+        ('POST /ordercommand/execute/{id}/CREATE', 'Command execute')]
+    assert all(len(record.trace_id) == 32 for record in records)
@@ -0,0 +1,215 @@
+"""
+Test auth
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import auth
+from msa_sdk.auth import FALLBACK_TOKEN
+from msa_sdk.auth import TokenCache
+from msa_sdk.lookup import Lookup
+
+
+def test_token_is_cached():
+    """
+    Test token is fetched once and then served from cache
+    """
+    cache = TokenCache()
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.json.return_value = {
+            'access_token': 'abc', 'expires_in': 300}
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        mock_post.assert_called_once()
+
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'refreshes': 0,
+                             'size': 1}
+
+
+def test_token_keyed_on_url_and_client():
+    """
+    Test different clients get different tokens
+    """
+    cache = TokenCache()
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.json.side_effect = [
+            {'access_token': 'abc', 'expires_in': 300},
+            {'access_token': 'def', 'expires_in': 300}]
+        assert cache.get('http://auth', 'client1', 'secret') == 'abc'
+        assert cache.get('http://auth', 'client2', 'secret') == 'def'
+        assert mock_post.call_count == 2
+
+
+def test_token_refreshed_ahead_of_expiry():
+    """
+    Test token is refreshed when it enters the refresh margin
+    """
+    cache = TokenCache(refresh_margin=30)
+    with patch('requests.Session.post') as mock_post, \
+            patch('msa_sdk.auth.time.monotonic') as mock_time:
+        mock_post.return_value.json.side_effect = [
+            {'access_token': 'abc', 'expires_in': 300},
+            {'access_token': 'def', 'expires_in': 300}]
+        mock_time.return_value = 1000
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        mock_time.return_value = 1269
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        mock_time.return_value = 1271
+        assert cache.get('http://auth', 'client', 'secret') == 'def'
+
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_token_refresh_failure_keeps_valid_token():
+    """
+    Test a failed refresh serves the still valid token
+    """
+    cache = TokenCache(refresh_margin=30)
+    with patch('requests.Session.post') as mock_post, \
+            patch('msa_sdk.auth.time.monotonic') as mock_time:
+        mock_post.return_value.json.side_effect = [
+            {'access_token': 'abc', 'expires_in': 300},
+            ValueError('auth down')]
+        mock_time.return_value = 1000
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        mock_time.return_value = 1280
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+
+
+def test_token_fallback_cached_briefly():
+    """
+    Test the fallback token is only kept for failure_ttl
+    """
+    cache = TokenCache(failure_ttl=10)
+    with patch('requests.Session.post') as mock_post, \
+            patch('msa_sdk.auth.time.monotonic') as mock_time:
+        mock_post.return_value.json.return_value = {'token': '12345qwert'}
+        mock_time.return_value = 1000
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+        assert mock_post.call_count == 1
+        mock_time.return_value = 1011
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+        assert mock_post.call_count == 2
+
+
+def test_token_fallback_not_cached():
+    """
+    Test the fallback token is not cached with failure_ttl=0
+    """
+    cache = TokenCache(failure_ttl=0)
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.json.return_value = {'token': '12345qwert'}
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+        assert mock_post.call_count == 2
+
+    assert cache.stats()['size'] == 0
+
+
+def test_token_concurrent_refresh_coalesced():
+    """
+    Test concurrent callers trigger a single fetch
+    """
+    cache = TokenCache()
+
+    def slow_fetch(*args, **kwargs):
+        time.sleep(0.2)
+        return ('abc', 300.0)
+
+    results = []
+    with patch.object(cache, '_fetch', side_effect=slow_fetch) as mock_fetch:
+        threads = [threading.Thread(
+            target=lambda: results.append(
+                cache.get('http://auth', 'client', 'secret')))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        mock_fetch.assert_called_once()
+
+    assert results == ['abc'] * 8
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 7
+
+
+def test_token_invalidate_and_clear():
+    """
+    Test invalidate and clear
+    """
+    cache = TokenCache()
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.json.return_value = {'access_token': 'abc'}
+        cache.get('http://auth', 'client1', 'secret')
+        cache.get('http://auth', 'client2', 'secret')
+        cache.invalidate(client_id='client1')
+        assert cache.stats()['size'] == 1
+        cache.invalidate(url='http://other')
+        assert cache.stats()['size'] == 1
+        cache.invalidate()
+        assert cache.stats()['size'] == 0
+        cache.get('http://auth', 'client1', 'secret')
+        cache.clear()
+
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'refreshes': 0,
+                             'size': 0}
+
+
+def test_unreachable_auth_server_is_not_retried():
+    """
+    Test an unreachable auth server falls back at once
+    """
+    cache = TokenCache(timeout=1)
+    with patch('requests.Session.post',
+               side_effect=ConnectionError) as mock_post:
+        assert cache.get('http://auth', 'client', 'secret') == FALLBACK_TOKEN
+    assert mock_post.call_args.kwargs['timeout'] == 1
+
+    start = time.monotonic()
+    assert TokenCache().get('http://127.0.0.1:1/token', 'client',
+                            'secret') == FALLBACK_TOKEN
+    assert time.monotonic() - start < 1
+
+
+def test_invalidate_token():
+    """
+    Test only the given token is dropped
+    """
+    cache = TokenCache()
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.json.side_effect = [
+            {'access_token': 'abc', 'expires_in': 300},
+            {'access_token': 'def', 'expires_in': 300}]
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        cache.invalidate('http://auth', 'client', 'old')
+        assert cache.get('http://auth', 'client', 'secret') == 'abc'
+        cache.invalidate('http://auth', 'client', 'abc')
+        assert cache.get('http://auth', 'client', 'secret') == 'def'
+
+
+def test_rejected_token_fetched_again(stub_server):
+    """
+    Test a token rejected with 401 is not served again
+    """
+    auth.token_cache.clear()
+    calls = []
+
+    def customers(*_):
+        calls.append(True)
+        if len(calls) == 1:
+            return 401, {"message": "Token revoked"}
+        return 200, []
+
+    stub_server.add_route('GET', r'/lookup/customers', customers)
+    lookup = Lookup()
+    lookup.look_list_customer_ids()
+    assert lookup.response.status_code == 401
+    for _ in range(2):
+        lookup.look_list_customer_ids()
+        assert lookup.response.ok
+    assert stub_server.request_count('POST', r'/auth/token') == 2
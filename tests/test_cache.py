@@ -0,0 +1,241 @@
+"""
+Test repository response cache
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from requests import Response
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import cache
+from msa_sdk.cache import CacheEntry
+from msa_sdk.cache import ResponseCache
+from msa_sdk.repository import Repository
+
+FILE_URI = 'Datafiles/test.txt'
+
+
+class Clock():
+    """Settable clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def repository_cache():
+    """Repository cache with a settable clock, for one test."""
+    clock = Clock()
+    response_cache = cache.configure(ttl=60, max_entries=10, clock=clock)
+    response_cache.now = clock
+    yield response_cache
+    cache.configure()
+
+
+def _response(status_code, body=b'', headers=None):
+    response = Response()
+    response.status_code = status_code
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+def test_lru_and_ttl():
+    """
+    Test entries expire and the least recently used is evicted
+    """
+    clock = Clock()
+    response_cache = ResponseCache(ttl=10, max_entries=2, directory='',
+                                   clock=clock)
+    for key in ('a', 'b'):
+        response_cache.put(CacheEntry(key, key.upper()))
+    assert response_cache.get('a').body == 'A'
+    response_cache.put(CacheEntry('c', 'C'))
+    assert response_cache.get('b') is None
+    assert response_cache.get('a').body == 'A'
+
+    clock.now += 10
+    entry = response_cache.get('c')
+    assert not response_cache.fresh(entry)
+    response_cache.touch(entry)
+    assert response_cache.fresh(response_cache.get('c'))
+    assert (response_cache.hits, response_cache.misses,
+            response_cache.revalidated) == (3, 2, 1)
+
+
+def test_invalidate(tmp_path):
+    """
+    Test entries are dropped by tag, in memory and on disk
+    """
+    response_cache = ResponseCache(directory=str(tmp_path))
+    response_cache.put(CacheEntry('/file?a', 'A', tag='a'))
+    response_cache.put(CacheEntry('/variables?a', 'A', tag='a'))
+    response_cache.put(CacheEntry('/file?b', 'B', tag='b'))
+    assert len(os.listdir(tmp_path)) == 3
+
+    response_cache.invalidate('a')
+    assert response_cache.get('/file?a', 'a') is None
+    assert response_cache.get('/variables?a', 'a') is None
+    assert response_cache.get('/file?b', 'b').body == 'B'
+    assert len(os.listdir(tmp_path)) == 1
+
+    response_cache.clear()
+    assert response_cache.get('/file?b', 'b') is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_shared_directory(tmp_path):
+    """
+    Test processes share the entries of the directory
+    """
+    clock = Clock()
+    writer = ResponseCache(ttl=10, max_entries=2, directory=str(tmp_path),
+                           clock=clock)
+    reader = ResponseCache(ttl=10, directory=str(tmp_path), clock=clock)
+    writer.put(CacheEntry('/file?a', 'A', etag='"1"', tag='a'))
+    entry = reader.get('/file?a', 'a')
+    assert (entry.body, entry.etag) == ('A', '"1"')
+
+    # A stale entry is replaced by a newer one of another process
+    clock.now += 10
+    writer.put(CacheEntry('/file?a', 'A2', tag='a'))
+    assert reader.get('/file?a', 'a').body == 'A2'
+
+    for key in ('/b', '/c', '/d'):
+        clock.now += 1
+        writer.put(CacheEntry(key, 'X'))
+    assert len(os.listdir(tmp_path)) == 2
+
+    with open(writer._path('/d', None), 'w') as entry_file:
+        entry_file.write('not json')
+    assert ResponseCache(directory=str(tmp_path)).get('/d') is None
+
+
+def test_repository_read_through(stub_server, repository_cache):
+    """
+    Test repository reads are cached until written
+    """
+    repository = Repository()
+    for _ in range(3):
+        assert repository.get_file(FILE_URI) == {}
+        assert repository.get_microservice_variables(FILE_URI) == {}
+        assert repository.response.ok
+    assert stub_server.request_count('GET', r'/repository/') == 2
+
+    repository.add_file(FILE_URI, 'content')
+    repository.get_file(FILE_URI)
+    repository.get_microservice_variables(FILE_URI)
+    assert stub_server.request_count('GET', r'/repository/') == 4
+
+    repository_cache.now.now += 60
+    repository.get_file(FILE_URI)
+    assert stub_server.request_count('GET', r'/repository/') == 5
+
+
+def test_repository_default_not_cached(stub_server, monkeypatch):
+    """
+    Test repository reads ask the server every time by default
+    """
+    monkeypatch.delenv('MSA_SDK_CACHE_TTL', raising=False)
+    assert cache.configure().ttl == 0
+    repository = Repository()
+    for _ in range(3):
+        assert repository.get_file(FILE_URI) == {}
+    assert stub_server.request_count('GET', r'/repository/') == 3
+
+
+def test_repository_write_invalidates(stub_server, repository_cache):
+    """
+    Test every write drops the cached resources
+    """
+    repository = Repository()
+    other = 'Process/workflows/WF/WF.xml'
+    definition = {"metaInformationList": [{"uri": FILE_URI}],
+                  "process": [], "example": None}
+    writes = [
+        lambda: repository.put_microservice_details(definition),
+        lambda: repository.create_microservice(definition),
+        lambda: repository.delete_repository_resource(FILE_URI),
+        lambda: repository.change_workflow_definition(FILE_URI, definition),
+        lambda: repository.create_workflow_definition(definition),
+        lambda: repository.delete_workflow_definition(FILE_URI),
+        lambda: repository.add_file(FILE_URI, ''),
+        lambda: repository.file_update_comment(FILE_URI, 'comment'),
+        lambda: repository.detach_microserviceis_from_configuration_profile(
+            '12', [FILE_URI]),
+    ]
+    for write in writes:
+        repository.get_workflow_definition(FILE_URI)
+        repository.get_microservice_details(other)
+        write()
+        assert [entry.tag for entry in
+                repository_cache._entries.values()] == [other]
+
+    repository.put_microservice_details('{"no": "uri"}')
+    assert not repository_cache._entries
+    assert Repository._definition_uris('not json') == []
+    assert Repository._definition_uris([1]) == []
+
+
+def test_repository_revalidation(repository_cache):
+    """
+    Test stale entries are revalidated with their ETag
+    """
+    responses = [
+        _response(200, b'{"a": 1}', {'ETag': '"v1"',
+                                     'Last-Modified': 'Mon, 1 Jan 2024'}),
+        _response(304),
+        _response(200, b'{"a": 2}'),
+        _response(500, b'{"message": "error"}'),
+    ]
+    with patch('requests.Session.get', side_effect=responses) as mock_get, \
+            patch('msa_sdk.auth.token_cache.get', return_value='token'):
+        repository = Repository()
+        assert repository.get_file(FILE_URI) == {"a": 1}
+        assert repository.get_file(FILE_URI) == {"a": 1}
+        assert repository.response.headers['ETag'] == '"v1"'
+        assert mock_get.call_count == 1
+
+        repository_cache.now.now += 60
+        assert repository.get_file(FILE_URI) == {"a": 1}
+        headers = mock_get.call_args.kwargs['headers']
+        assert headers['If-None-Match'] == '"v1"'
+        assert headers['If-Modified-Since'] == 'Mon, 1 Jan 2024'
+        assert repository_cache.revalidated == 1
+
+        repository_cache.now.now += 60
+        assert repository.get_file(FILE_URI) == {"a": 2}
+        repository_cache.now.now += 60
+        assert repository.get_file(FILE_URI)['wo_status'] == 'FAIL'
+        assert 'If-None-Match' not in mock_get.call_args.kwargs['headers']
+        assert mock_get.call_count == 4
+        assert repository_cache.get(
+            repository._cache_key()).body == '{"a": 2}'
+
+
+def test_key_per_host_and_client(stub_server, repository_cache, monkeypatch):
+    """
+    Test hosts and clients sharing the cache do not see each other entries
+    """
+    monkeypatch.setenv('CLIENT_ID', 'client1')
+    repository = Repository()
+    repository.get_file(FILE_URI)
+    assert repository._cache_key().startswith(
+        'client1 {}/repository/'.format(stub_server.url))
+
+    monkeypatch.setenv('CLIENT_ID', 'client2')
+    Repository().get_file(FILE_URI)
+    monkeypatch.setenv('UBIQUBE_MSA_PORT', str(stub_server.port + 1))
+    other_host = Repository()
+    with patch('requests.Session.get',
+               side_effect=ConnectionError('other host')):
+        with pytest.raises(ConnectionError):
+            other_host.get_file(FILE_URI)
+    assert stub_server.request_count('GET', r'/repository/') == 2
+    assert len(repository_cache._entries) == 2
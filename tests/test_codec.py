@@ -0,0 +1,84 @@
+"""
+Test JSON codec
+"""
+import decimal
+import json
+from unittest.mock import patch
+
+import pytest
+
+from msa_sdk import codec
+from msa_sdk.msa_api import MSA_API
+
+
+@pytest.fixture
+def restore_codec():
+    """Restore the default codec after the test."""
+    yield
+    codec.configure()
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson'])
+def test_round_trip(name, restore_codec):
+    """
+    Test encode and decode with each codec
+    """
+    pytest.importorskip(name)
+    assert codec.configure(name).name == name
+    document = {"a": [1, 2.5, None, True, "é"], "b": {"c": "d"}}
+    data = codec.dumps(document)
+    assert json.loads(data) == document
+    assert codec.loads(data) == document
+    assert codec.loads(data.encode() if isinstance(data, str)
+                       else data.decode()) == document
+
+
+def test_orjson_fallback(restore_codec):
+    """
+    Test orjson encodes integer keys, and falls back to json for the
+    values it does not know
+    """
+    pytest.importorskip('orjson')
+    codec.configure('orjson')
+    assert json.loads(codec.dumps({12: {"object_id": "12"}})) == \
+        {"12": {"object_id": "12"}}
+    assert json.loads(codec.dumps([2 ** 70])) == [2 ** 70]
+    with pytest.raises(TypeError):
+        codec.dumps({"a": decimal.Decimal(1)})
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'not json')
+
+
+def test_configure(restore_codec):
+    """
+    Test a custom codec and the environment default
+    """
+    custom = codec.configure(dumps=lambda obj: 'dumped',
+                             loads=lambda data: 'loaded')
+    assert custom.name == 'custom'
+    assert codec.get_codec() is custom
+    assert codec.dumps({}) == 'dumped'
+    assert codec.loads('{}') == 'loaded'
+
+    with pytest.raises(ValueError):
+        codec.configure('unknown')
+
+    with patch.dict('os.environ', {'MSA_SDK_JSON': 'json'}):
+        assert codec.configure() is codec.STDLIB
+    assert codec.configure() is (codec.ORJSON or codec.STDLIB)
+
+
+def test_post_encoded(restore_codec):
+    """
+    Test POST and PUT bodies are encoded by the codec in use
+    """
+    codec.configure(dumps=lambda obj: 'encoded')
+    api = MSA_API()
+    with patch('msa_sdk.msa_api.MSA_API._send') as mock_send, \
+            patch('msa_sdk.auth.token_cache.get', return_value='token'):
+        api._call_post({"a": 1})
+        assert mock_send.call_args.kwargs['data'] == 'encoded'
+        api._call_put([1])
+        assert mock_send.call_args.kwargs['data'] == 'encoded'
+        api._call_put('raw')
+        assert mock_send.call_args.kwargs['data'] == 'raw'
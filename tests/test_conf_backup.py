@@ -40,7 +40,7 @@ def test_restore_status(conf_backup_fixture):
 def test_backup_status(conf_backup_fixture):
     """Test Backup Status"""
 
-    with patch('requests.get') as mock_get:
+    with patch('requests.Session.get') as mock_get:
         conf_backup = conf_backup_fixture
 
         mock_get.return_value.text = ('{"message": "Backup successful",'
@@ -55,7 +55,7 @@ def test_backup_status(conf_backup_fixture):
 def test_backup_status_content(conf_backup_fixture):
     """Test Backup Status content"""
 
-    with patch('requests.get') as mock_get:
+    with patch('requests.Session.get') as mock_get:
         conf_backup = conf_backup_fixture
 
         mock_get.return_value.text = ('{"message": "Backup successful",'
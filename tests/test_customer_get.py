@@ -2,10 +2,12 @@
 Test Customer GET
 """
 import json
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from util import customer_fixture  # pylint: disable=unused-import
 from util import customer_info
+from util import device_info
 from util import device_list
 
 from msa_sdk.customer import Customer
@@ -13,7 +15,7 @@ from msa_sdk.customer import Customer
 # pylint: disable=redefined-outer-name
 
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_device_list_by_id(mock_post):
     """
     Get device list for the customer.
@@ -22,7 +24,7 @@ def test_get_device_list_by_id(mock_post):
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
     customer_device_list = list()
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_list()
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -39,7 +41,7 @@ def test_get_device_list_by_id(mock_post):
         mock_call_get.assert_called_once()
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_get_customer_by_id(mock_post):
     """
     Get customer info by ID
@@ -47,7 +49,7 @@ def test_get_customer_by_id(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = customer_info()
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -64,7 +66,7 @@ def test_get_customer_by_id(mock_post):
         mock_call_get.assert_called_once()
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_get_customer_by_reference(mock_post):
     """
     Get customer info by reference
@@ -72,7 +74,7 @@ def test_get_customer_by_reference(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = customer_info()
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -89,7 +91,7 @@ def test_get_customer_by_reference(mock_post):
         mock_call_get.assert_called_once()
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_get_variables_by_id(mock_post):
     """
     Get variables by ID
@@ -97,7 +99,7 @@ def test_get_variables_by_id(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
             customer = Customer()
@@ -108,7 +110,7 @@ def test_get_variables_by_id(mock_post):
         mock_call_get.assert_called_once()
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_get_variables_by_name(mock_post):
     """
     Get variables by name
@@ -116,7 +118,7 @@ def test_get_variables_by_name(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
             customer = Customer()
@@ -160,3 +162,48 @@ def test_get_deployment_settings_empty(customer_fixture):
         assert customer.path == '/conf-profile/v2/list/customer/6'
 
         mock_call_get.assert_called_once()
+
+
+def _device_response(url, **kwargs):
+    response = MagicMock()
+    if url.endswith('/device-features'):
+        response.text = device_list()
+        return response
+    device_id = int(url.rsplit('/', 1)[1])
+    if device_id == 127:
+        response.ok = False
+        response.json.return_value = {'message': 'Device not found'}
+    else:
+        info = json.loads(device_info())
+        info['id'] = device_id
+        info['managementAddress'] = '10.0.0.{}'.format(device_id)
+        response.ok = True
+        response.text = json.dumps(info)
+    return response
+
+
+def test_get_ip_address_list(customer_fixture):
+    """
+    Get ip address list, one GET per device
+    """
+    customer = customer_fixture
+    with patch('requests.Session.get',
+               side_effect=_device_response) as mock_call_get:
+        assert customer.get_ip_address_list(6) == ['10.0.0.130', None,
+                                                   '10.0.0.125']
+        assert mock_call_get.call_count == 4
+
+
+def test_iter_ip_address_list(customer_fixture):
+    """
+    Stream ip addresses with per device errors
+    """
+    customer = customer_fixture
+    errors = {}
+    with patch('requests.Session.get', side_effect=_device_response):
+        result = dict(customer.iter_ip_address_list(6, max_workers=2,
+                                                    errors=errors))
+
+    assert result == {130: '10.0.0.130', 127: None, 125: '10.0.0.125'}
+    assert list(errors) == [127]
+    assert str(errors[127]) == 'Device not found'
@@ -31,7 +31,7 @@ def test_delete(device_fixture):
     """
     device = device_fixture
     device.device_id = '1234'
-    with patch('requests.delete') as mock_call_delete:
+    with patch('requests.Session.delete') as mock_call_delete:
 
         device.delete()
         assert device.path == '/device/id/{}'.format(device.device_id)
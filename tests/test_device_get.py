@@ -5,6 +5,7 @@ import json
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import pytest
 from util import _is_valid_json
 from util import device_fixture  # pylint: disable=unused-import
 from util import device_info
@@ -12,7 +13,7 @@ from util import device_info
 from msa_sdk.device import Device
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_read_by_id(mock_post):
     """
     Read Device by id
@@ -20,7 +21,7 @@ def test_read_by_id(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info()
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -43,7 +44,7 @@ def test_read_by_id(mock_post):
         mock_call_get.assert_called_once()
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_read_by_invalid_id(mock_post):
     """
     Read Device by id
@@ -58,7 +59,7 @@ def test_read_by_invalid_id(mock_post):
 
     return_message = {"wo_status": "FAIL", "wo_comment": "Read device",
                       "wo_newparams": "Not found"}
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -68,7 +69,7 @@ def test_read_by_invalid_id(mock_post):
         assert device.content == json.dumps(return_message)
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_read_by_reference(mock_post):
     """
     Read Device by reference
@@ -76,7 +77,7 @@ def test_read_by_reference(mock_post):
 
     mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info()
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -107,7 +108,7 @@ def test_status(device_fixture):  # pylint: disable=W0621
     """
     device = device_fixture
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = 'UNREACHABLE'
         assert device.status() == 'UNREACHABLE'
 
@@ -121,7 +122,7 @@ def test_status_unreachable(device_fixture):  # pylint: disable=W0621
     """
     device = device_fixture
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = 'UNREACHABLE'
         assert device.status() == 'UNREACHABLE'
 
@@ -145,7 +146,7 @@ def test_status_fail(device_fixture):  # pylint: disable=W0621
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
         device.status()
@@ -178,7 +179,7 @@ def test_provision_status(device_fixture):  # pylint: disable=W0621
     device = device_fixture
     device.device_id = 1234
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = provision_info
 
         assert _is_valid_json(json.dumps(device.provision_status()))
@@ -205,7 +206,7 @@ def test_provision_status_fail(device_fixture):  # pylint: disable=W0621
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False, reason='Not found')
         mock_call_get.return_value.json.return_value = fail_return
         device.provision_status()
@@ -220,7 +221,7 @@ def test_load_configuration(device_fixture):
     device = device_fixture
     device.device_id = 1234
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         r_value = ('{"message":"OK\\r\\n\\r\\n","date":"24-04-2019 '
                    '16:30:05","status":"ENDED"}')
         mock_call_get.return_value.text = r_value
@@ -249,7 +250,7 @@ def test_ping(device_fixture):
                'packet loss, time 3999ms\\\\nrtt min/avg/max/mdev = '
                '0.014/0.020/0.027/0.007 ms\\"}","status":"OK"}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
 
         assert _is_valid_json(device.ping('localhost'))
@@ -267,7 +268,7 @@ def test_push_configuration_status(device_fixture):
     r_value = ('{"message":"[root@LINUX-FW ~]# [root@LINUX-FW ~]#\n ",'
                '"date":"27-06-2018 09:15:33","status":"ENDED"}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         assert _is_valid_json(device.push_configuration_status())
 
@@ -284,7 +285,7 @@ def test_is_device(device_fixture):
 
     r_value = json.dumps('{"isDevice": true}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
 
         assert device.is_device()
@@ -310,7 +311,7 @@ def test_is_device_fail(device_fixture):  # pylint: disable=W0621
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False, reason='Not found')
         mock_call_get.return_value.json.return_value = fail_return
         device.is_device()
@@ -330,7 +331,7 @@ def test_get_configuration_variable(device_fixture):
         'value': 'Content-Type: application/json',
         'comment': ''
     })
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = test_response
         assert device.get_configuration_variable(
             test_requested_var)['name'] == test_requested_var
@@ -350,7 +351,7 @@ def test_execute_command_on_device(device_fixture):
 
     command = 'show user'
 
-    with patch('requests.get') as mock_call_post:
+    with patch('requests.Session.get') as mock_call_post:
       mock_call_post.return_value.text = response_content
       assert _is_valid_json(json.dumps(device.execute_command_on_device(command)))
       path = ('/device/v1/command/execute/{}')
@@ -369,7 +370,7 @@ def test_get_all_configuration_variables(device_fixture):  # pylint: disable=W06
 
     r_value = json.dumps('{"get_all_configuration_variables": true}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         
         assert device.get_all_configuration_variables()
@@ -385,7 +386,7 @@ def test_get_all_manufacturers(device_fixture):
 
     r_value = json.dumps('{"get_all_manufacturers": true}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         
         assert device.get_all_manufacturers()
@@ -401,7 +402,7 @@ def test_get_customer_id(device_fixture):
 
     r_value = json.dumps('{"get_customer_id": true}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         
         assert device.get_customer_id()
@@ -418,7 +419,7 @@ def test_get_update_firmware_status(device_fixture):
 
     r_value = json.dumps('{"status": "RUNNING"}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         
         assert device.get_update_firmware_status()
@@ -434,10 +435,114 @@ def test_get_tags(device_fixture):
 
     r_value = json.dumps('[test]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = r_value
         
         assert device.get_tags()
         assert device.path == '/device/v2/labels?id={}&type=ME'.format(device.device_id)
 
         mock_call_get.assert_called_once()
+
+
+def _read_response(url, **kwargs):
+    response = MagicMock()
+    device_id = int(url.rsplit('/', 1)[1])
+    if device_id == 13:
+        response.ok = False
+        response.json.return_value = {'message': 'Device not found'}
+    else:
+        info = json.loads(device_info())
+        info['id'] = device_id
+        info['managementAddress'] = '10.0.0.{}'.format(device_id)
+        response.ok = True
+        response.text = json.dumps(info)
+    return response
+
+
+def test_read_many():
+    """
+    Read many devices concurrently
+    """
+    with patch('requests.Session.get',
+               side_effect=_read_response) as mock_call_get:
+        results = {device_id: (device, error)
+                   for device_id, device, error in
+                   Device.read_many([1, 2, 13, 2, 4], max_workers=2)}
+
+        assert mock_call_get.call_count == 4
+
+    assert sorted(results) == [1, 2, 4, 13]
+    assert results[1][0].management_address == '10.0.0.1'
+    assert results[4][0].device_id == 4
+    assert results[1][1] is None
+    assert results[13][0] is None
+    assert str(results[13][1]) == 'Device not found'
+
+
+def test_read_lazy():
+    """
+    Lazy device is read on first attribute access only
+    """
+    with patch('requests.Session.get') as mock_call_get:
+        mock_call_get.return_value.text = device_info()
+        device = Device(device_id=21594, lazy=True)
+        mock_call_get.assert_not_called()
+
+        device.path = '/previous/call'
+        device._content = 'previous content'
+        assert device.name == 'Linux self MSA'
+        assert device.management_address == '127.0.0.1'
+        mock_call_get.assert_called_once()
+
+        # The lazy read does not clobber the last call
+        assert device.path == '/previous/call'
+        assert device.content == 'previous content'
+
+
+def test_read_lazy_assigned_value_kept():
+    """
+    Values assigned before the lazy read are kept
+    """
+    with patch('requests.Session.get') as mock_call_get:
+        mock_call_get.return_value.text = device_info()
+        device = Device(device_id=21594, lazy=True)
+        device.name = 'New name'
+        assert device.hostname == 'test'
+        assert device.name == 'New name'
+
+
+def test_read_lazy_failed():
+    """
+    Failed lazy read raises the API error and keeps the response
+    """
+    with patch('requests.Session.get') as mock_call_get:
+        mock_call_get.return_value.ok = False
+        mock_call_get.return_value.json.return_value = {'message': 'KO'}
+        device = Device(device_id=21594, lazy=True)
+        device.customer_id = 6
+        with pytest.raises(RuntimeError, match='KO'):
+            device.name
+        with pytest.raises(RuntimeError, match='KO'):
+            device.login
+        mock_call_get.assert_called_once()
+        assert not device.response.ok
+        assert json.loads(device.content)['wo_comment'] == 'Read device'
+        assert device.customer_id == 6
+
+        with pytest.raises(AttributeError):
+            device.unknown_attribute
+
+
+def test_read_lazy_network_error():
+    """
+    Lazy read failing on the network is tried again on the next access
+    """
+    with patch('requests.Session.get') as mock_call_get:
+        mock_call_get.side_effect = [ConnectionError('refused'),
+                                     mock_call_get.return_value]
+        mock_call_get.return_value.text = device_info()
+        device = Device(device_id=21594, lazy=True)
+        with pytest.raises(ConnectionError):
+            device.name
+        assert device.name == 'Linux self MSA'
+        assert mock_call_get.call_count == 2
@@ -17,9 +17,10 @@ def test_activate(device_fixture):
     Test activate
     """
     device = device_fixture
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
         device.activate()
         assert device.path == '/device/activate/{}'.format(device.device_id)
+        assert device.action == 'Activate device'
         mock_call_post.assert_called()
 
 
@@ -28,7 +29,7 @@ def test_do_provisioningion(device_fixture):
     Test provision
     """
     device = device_fixture
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
 
         device.provision()
         assert device.path == '/device/provisioning/{}'.format(
@@ -46,7 +47,7 @@ def test_update_config(device_fixture):
                '"{\"sms_status\":\"OK\"}",'
                '"rawSmsResult":null,"ok":true,"code":null,"message":null}')
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
         mock_call_post.return_value.text = r_value
 
         assert _is_valid_json(device.update_config())
@@ -61,7 +62,7 @@ def test_do_provisioning(device_fixture):
     """
     device = device_fixture
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
 
         device.initial_provisioning()
 
@@ -79,7 +80,7 @@ def test_create(device_fixture):
 
     response_content = '{"id": 67015, "name": "PyASA27-b"}'
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
         mock_call_post.return_value.text = response_content
         assert _is_valid_json(json.dumps(device.create()))
         assert device.path == '/device/v2/{}'.format(device.customer_id)
@@ -108,7 +109,7 @@ def test_create_fail(device_fixture):
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
         mock_call_post.return_value = MagicMock(ok=False)
         mock_call_post.return_value.json.return_value = fail_return
         assert _is_valid_json(json.dumps(device.create()))
@@ -129,7 +130,7 @@ def test_run_jsa_command_device(device_fixture):
     command = 'get_files'
     params = dict(src_dir= '/tmp/',file_pattern='testfile.txt', dest_dir='/tmp')
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
       mock_call_post.return_value.text = response_content
       assert _is_valid_json(json.dumps(device.run_jsa_command_device(command, params)))
       path = ('/sms/cmd/{}/{}/')
@@ -153,7 +154,7 @@ def test_run_jsa_command_device_empty_params(device_fixture):
     command = 'get_files'
     params = dict()
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
       mock_call_post.return_value.text = response_content
       assert _is_valid_json(json.dumps(device.run_jsa_command_device(command, params)))
       path = ('/sms/cmd/{}/{}/')
@@ -176,7 +177,7 @@ def test_set_tags(device_fixture):
     
     response_content = '{"id": 67015, "labelValues": "TAG1:TAG2"}'
 
-    with patch('requests.post') as mock_call_post:
+    with patch('requests.Session.post') as mock_call_post:
         mock_call_post.return_value.text = response_content
         assert _is_valid_json(json.dumps(device.set_tags("TAG1:TAG2")))
         assert device.path == '/device/v2/67015/labels?labelValues=TAG1%3BTAG2'
@@ -15,7 +15,7 @@ def test_update_ip_address_no_mask(device_fixture):
     device = device_fixture
     ip_addr = '10.10.1.3'
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         device.update_ip_address(ip_addr)
         path = ('/device/management_ip/update/{}?ip={}&mask={}')
@@ -32,7 +32,7 @@ def test_update_ip_address_mask(device_fixture):
     ip_addr = '10.10.1.3'
     netmask = '255.255.255.254'
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         device.update_ip_address(ip_addr, netmask)
         path = ('/device/management_ip/update/{}?ip={}&mask={}')
@@ -46,7 +46,7 @@ def test_push_configuration(device_fixture):
     """
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         device.push_configuration()
         path = ('/device/push_configuration/{}')
@@ -60,7 +60,7 @@ def test_push_configuration_with_data(device_fixture):
     """
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         configuration = '{"configuration": "conf"}'
         device.push_configuration(configuration)
@@ -75,7 +75,7 @@ def test_configuration_profile_switch(device_fixture):
     """
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         device.profile_switch('oldprof', 'newprof')
         path = ('/device/conf_profile/switch/{}?old_profile_ref={}'
@@ -92,7 +92,7 @@ def test_update_credentials(device_fixture):
 
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
 
         device.update_credentials('login', 'password')
         path = ('/device/credentials/update/{}?login={}&password={}')
@@ -112,7 +112,7 @@ def test_attach_files(device_fixture):
             '"uri": "Configuration/ABR/Upload_2"'
             '}]')
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         device.attach_files(uris)
         assert device.path == '/device/attach/{}/files/AUTO'.format(
             device.device_id)
@@ -136,7 +136,7 @@ def test_detach_files(device_fixture):
         '}]'
     )
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         device.detach_files(uris)
         assert device.path == '/device/detach/{}/files'.format(
             device.device_id)
@@ -158,8 +158,8 @@ def test_create_configuration_variable_success(device_fixture):
                                 'comment': ''
                                 })
 
-    with patch('requests.get') as mock_call_get:
-        with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.get') as mock_call_get:
+        with patch('requests.Session.put') as mock_call_put:
             mock_call_get.return_value.text = test_response
             assert device.create_configuration_variable(
                 test_var_name, test_var_value, test_var_comment)
@@ -180,8 +180,8 @@ def test_create_configuration_variable_fail(device_fixture):
                                 'comment': ''
                                 })
 
-    with patch('requests.get') as mock_call_get:
-        with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.get') as mock_call_get:
+        with patch('requests.Session.put') as mock_call_put:
             mock_call_get.return_value.text = test_response
             assert not device.create_configuration_variable(
                 test_var_name, test_var_value, test_var_comment)
@@ -196,7 +196,7 @@ def test_profile_attach(device_fixture):
 
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         device.profile_attach(test_profile_reference)
         assert device.path == f'/profile/{test_profile_reference}/attach?device=Dexternal'
         mock_call_put.assert_called_once()
@@ -211,7 +211,7 @@ def test_profile_detach(device_fixture):
 
     device = device_fixture
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         device.profile_detach(test_profile_reference)
         assert device.path == f'/profile/{test_profile_reference}/detach?device=Dexternal'
         mock_call_put.assert_called_once()
@@ -230,7 +230,7 @@ def test_update(device_fixture):
 
     response_content = f'{{"id": 67015, "name": "{update_value}"}}'
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         mock_call_put.return_value.text = response_content
         device.update(update_field, update_value)
         assert json.loads(device.content)['name'] == 'RouterA'
@@ -247,7 +247,7 @@ def test_update_firmware(device_fixture):
 
     response_content = 'ttt'
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
       mock_call_put.return_value.text = response_content
       device.update_firmware( update_field)
 
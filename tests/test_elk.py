@@ -0,0 +1,341 @@
+"""
+Test ES log handler
+"""
+
+import datetime
+import logging
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from opensearchpy import ConnectionError as EsConnectionError
+from opensearchpy import TransportError
+
+from msa_sdk.elk import EsHandler
+from msa_sdk.elk import EsSpool
+
+
+def _record(message='hello'):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message,
+                             (), None)
+
+
+@pytest.fixture
+def es_bulk():
+    """Patch the OpenSearch client and bulk helper."""
+    batches = []
+
+    def bulk(client, actions, **kwargs):
+        batches.append([action['_source']['message'] for action in actions])
+
+    with patch('msa_sdk.elk.OpenSearch') as mock_client, \
+            patch('msa_sdk.elk.eshelpers.bulk', side_effect=bulk):
+        yield mock_client, batches
+
+
+def test_document():
+    """
+    Test the ES document built by the flusher
+    """
+    documents = []
+
+    def bulk(client, actions, **kwargs):
+        documents.extend(actions)
+
+    record = _record('hello %s')
+    record.args = (12,)
+    record.created = 1700000000.1234
+    record.order_id = 'order-1'
+    with patch('msa_sdk.elk.OpenSearch'), \
+            patch('msa_sdk.elk.eshelpers.bulk', side_effect=bulk):
+        handler = EsHandler(context={'PROCESSINSTANCEID': 12},
+                            es_record_fields=('order_id', 'missing'))
+        handler.emit(record)
+        handler.close()
+
+    assert documents[0]['_index'].startswith('process-log-')
+    document = documents[0]['_source']
+    assert document['message'] == 'hello 12'
+    assert document['levelname'] == 'INFO'
+    assert document['name'] == 'test'
+    assert document['thread'] == record.thread
+    assert document['exc_text'] == ''
+    assert document['order_id'] == 'order-1'
+    assert document['missing'] is None
+    assert document['process_id'] == 12
+    assert document['timestamp'] == '2023-11-14T22:13:20.123Z'
+    assert 'created' not in document
+    assert 'args' not in document
+
+
+def test_emit_captures_fields(es_bulk):
+    """
+    Test the message and exception are rendered at emit time, the
+    document is sent by the flusher thread
+    """
+    threads = []
+    documents = []
+
+    def bulk(client, actions, **kwargs):
+        threads.append(threading.current_thread())
+        documents.extend(action['_source'] for action in actions)
+
+    handler = EsHandler()
+    # The formatter is not used on the logging thread
+    handler.format = None
+    logger = logging.getLogger('test_elk')
+    logger.addHandler(handler)
+    items = ['a']
+    try:
+        with patch('msa_sdk.elk.eshelpers.bulk', side_effect=bulk):
+            try:
+                raise ValueError('bad value')
+            except ValueError:
+                logger.exception('items %s', items)
+            items.append('b')
+            handler.flush()
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert documents[0]['message'] == "items ['a']"
+    assert 'ValueError: bad value' in documents[0]['exc_text']
+    assert documents[0]['levelname'] == 'ERROR'
+    assert threads[0] is not threading.current_thread()
+
+
+def test_raise_errors(es_bulk, caplog):
+    """
+    Test indexing errors are logged once, raised only by raise_errors
+    """
+    with patch('msa_sdk.elk.eshelpers.bulk', side_effect=ValueError('down')):
+        handler = EsHandler(raise_on_indexing_exceptions=True)
+        for _ in range(3):
+            handler.emit(_record())
+            handler.flush()
+        handler.close()
+    with pytest.raises(ValueError, match='down'):
+        handler.raise_errors()
+    handler.raise_errors()
+    assert handler.failed == 3
+    assert [record.getMessage() for record in caplog.records
+            if record.name == 'msa_sdk.elk'] == \
+        ['Cannot index log records: down']
+
+
+def test_datetime_cache():
+    """
+    Test timestamps are formatted like datetime does
+    """
+    handler = EsHandler()
+    format_time = handler._EsHandler__get_es_datetime_str
+    for timestamp in (1700000000.5, 1700000000.999, 1700000001.0,
+                      1700000000.25):
+        date = datetime.datetime.fromtimestamp(timestamp,
+                                               datetime.timezone.utc)
+        assert format_time(timestamp) == '{}.{:03d}Z'.format(
+            date.strftime('%Y-%m-%dT%H:%M:%S'), date.microsecond // 1000)
+
+
+def test_batch_by_size(es_bulk):
+    """
+    Test records are sent in batches of buffer_size
+    """
+    mock_client, batches = es_bulk
+    handler = EsHandler(buffer_size=3, flush_frequency_in_sec=60,
+                        context={'PROCESSINSTANCEID': 12})
+    for index in range(7):
+        handler.emit(_record(str(index)))
+    handler.flush()
+
+    assert batches == [['0', '1', '2'], ['3', '4', '5'], ['6']]
+    # A single client is reused across flushes
+    assert mock_client.call_count == 1
+    handler.close()
+
+
+def test_batch_by_time(es_bulk):
+    """
+    Test a partial batch is sent after flush_frequency_in_sec
+    """
+    _, batches = es_bulk
+    handler = EsHandler(buffer_size=100, flush_frequency_in_sec=0.05)
+    handler.emit(_record())
+    for _ in range(100):
+        if batches:
+            break
+        time.sleep(0.01)
+
+    assert batches == [['hello']]
+    handler.close()
+
+
+def test_drop_when_full(es_bulk):
+    """
+    Test records are dropped when the queue is full
+    """
+    release = threading.Event()
+    with patch('msa_sdk.elk.eshelpers.bulk',
+               side_effect=lambda *args, **kwargs: release.wait()):
+        handler = EsHandler(buffer_size=1, queue_size=2)
+        handler.emit(_record())
+        # Wait for the flusher to block on the first record
+        for _ in range(100):
+            if handler._queue.empty():
+                break
+            time.sleep(0.01)
+        for _ in range(5):
+            handler.emit(_record())
+        release.set()
+        handler.close()
+
+    assert handler.dropped == 3
+
+
+def test_send_failure_counted(es_bulk):
+    """
+    Test indexing errors are counted, not raised
+    """
+    with patch('msa_sdk.elk.eshelpers.bulk', side_effect=Exception('down')):
+        handler = EsHandler(buffer_size=2)
+        for _ in range(3):
+            handler.emit(_record())
+        handler.close()
+
+    assert handler.failed == 3
+
+
+def test_close_flushes_and_stops(es_bulk):
+    """
+    Test close sends pending records and stops the flusher
+    """
+    _, batches = es_bulk
+    handler = EsHandler(buffer_size=100, flush_frequency_in_sec=60)
+    handler.flush()
+    handler.emit(_record())
+    thread = handler._thread
+    handler.close()
+
+    assert batches == [['hello']]
+    assert not thread.is_alive()
+    # Closing twice is harmless
+    handler.close()
+
+
+def test_es_source(es_bulk):
+    """
+    Test ping uses the shared client
+    """
+    mock_client, _ = es_bulk
+    mock_client.return_value.ping.return_value = True
+    handler = EsHandler()
+
+    assert handler.test_es_source()
+    assert handler.test_es_source()
+    assert mock_client.call_count == 1
+
+
+@pytest.fixture
+def es_outage():
+    """Patch the bulk helper with a cluster that can be down."""
+    state = {'down': True, 'batches': []}
+
+    def bulk(client, actions, **kwargs):
+        if state['down']:
+            raise EsConnectionError('N/A', 'down', Exception())
+        state['batches'].append([action['_source']['message']
+                                 for action in actions])
+
+    with patch('msa_sdk.elk.OpenSearch'), \
+            patch('msa_sdk.elk.eshelpers.bulk', side_effect=bulk):
+        yield state
+
+
+def test_spool_and_replay(es_outage, tmp_path):
+    """
+    Test batches are spooled during an outage and replayed in order
+    """
+    handler = EsHandler(buffer_size=2, spool_dir=str(tmp_path))
+    for index in range(3):
+        handler.emit(_record(str(index)))
+    handler.flush()
+
+    assert handler.spooled == 3
+    assert handler.failed == 0
+    assert es_outage['batches'] == []
+    assert len(EsSpool(str(tmp_path)).segments()) == 1
+
+    es_outage['down'] = False
+    handler.emit(_record('3'))
+    handler.close()
+
+    assert es_outage['batches'] == [['0', '1', '2'], ['3']]
+    assert os.listdir(tmp_path) == []
+
+
+def test_spool_replayed_by_next_process(es_outage, tmp_path):
+    """
+    Test a spool left by a previous handler is replayed
+    """
+    handler = EsHandler(spool_dir=str(tmp_path))
+    handler.emit(_record('0'))
+    handler.close()
+
+    es_outage['down'] = False
+    with patch.dict('os.environ', {'MSA_SDK_ES_SPOOL_DIR': str(tmp_path)}):
+        handler = EsHandler()
+    handler.emit(_record('1'))
+    handler.close()
+
+    assert es_outage['batches'] == [['0'], ['1']]
+
+
+def test_spool_size_cap(tmp_path):
+    """
+    Test the oldest segments are dropped above the size cap
+    """
+    spool = EsSpool(str(tmp_path), max_bytes=250, segment_bytes=100)
+    for index in range(10):
+        spool.append([{'_index': 'test', '_source': {'msg': 'x' * 40,
+                                                     'index': index}}])
+
+    sent = []
+    assert spool.replay(lambda actions: sent.extend(actions))
+    assert spool.dropped == 10 - len(sent)
+    assert 0 < len(sent) < 10
+    assert sent[-1]['_source']['index'] == 9
+
+
+def test_spool_drops_rejected_segment(tmp_path):
+    """
+    Test a segment rejected for another reason than an outage
+    """
+    spool = EsSpool(str(tmp_path))
+    spool.append([{'_source': {'exc_info': ValueError('bad')}},
+                  {'_source': {}}])
+
+    def send(actions):
+        list(actions)
+        raise TransportError(400, 'mapper_parsing_exception')
+
+    assert spool.replay(send)
+    assert spool.failed == 2
+    assert spool.segments() == []
+
+
+def test_no_spool_on_rejection(tmp_path):
+    """
+    Test records rejected by ES are not spooled
+    """
+    with patch('msa_sdk.elk.OpenSearch'), \
+            patch('msa_sdk.elk.eshelpers.bulk',
+                  side_effect=TransportError(400, 'bad')):
+        handler = EsHandler(spool_dir=str(tmp_path))
+        handler.emit(_record())
+        handler.close()
+
+    assert handler.failed == 1
+    assert handler.spooled == 0
+    assert os.listdir(tmp_path) == []
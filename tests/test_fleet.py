@@ -0,0 +1,151 @@
+"""
+Test fleet synchronization
+"""
+
+import threading
+import time
+
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.fleet import FleetSynchronizer
+
+
+class FakeClock():
+    """Clock advanced by sleep."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_run(stub_server):
+    """
+    Test every device is synchronized with a bounded window
+    """
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'peak': 0}
+    status = stub_server._synchronize_status
+
+    def start(*_):
+        with lock:
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+        return 200, None
+
+    def synchronize_status(match, query):
+        code, response = status(match, query)
+        if response['status'] == 'ENDED':
+            with lock:
+                state['in_flight'] -= 1
+        return code, response
+
+    stub_server.process_polls = 2
+    stub_server.add_route('POST', r'/ordercommand/synchronize/\d+', start)
+    stub_server.add_route('GET', r'/ordercommand/synchronize/status',
+                          synchronize_status)
+    synchronizer = FleetSynchronizer(max_in_flight=5, interval=0.05)
+    events = list(synchronizer.run(list(range(1, 31)) + [1, 2]))
+
+    assert sorted(event.device_id for event in events) == \
+        list(range(1, 31))
+    assert all(event.ok and event.attempts == 1 for event in events)
+    assert events[0].response == {"deviceId": events[0].device_id,
+                                  "status": "ENDED"}
+    assert events[0].to_dict()['status'] == 'OK'
+    assert 1 < state['peak'] <= 5
+    assert stub_server.request_count(
+        'POST', r'/ordercommand/synchronize/') == 30
+    assert stub_server.request_count(
+        'GET', r'/ordercommand/synchronize/status') == 60
+
+
+def test_retries(stub_server):
+    """
+    Test failed starts and synchronizations are started again
+    """
+    starts = {}
+
+    def start(match, _):
+        device_id = int(match.group(1))
+        starts[device_id] = starts.get(device_id, 0) + 1
+        if device_id == 3 and starts[device_id] == 1:
+            return 500, {"message": "Device busy"}
+        return 200, None
+
+    def synchronize_status(_, query):
+        status = 'FAIL' if query['deviceId'] == '4' else 'ENDED'
+        return 200, {"status": status, "message": "Connection refused"
+                     if status == 'FAIL' else ""}
+
+    stub_server.add_route('POST', r'/ordercommand/synchronize/(\d+)', start)
+    stub_server.add_route('GET', r'/ordercommand/synchronize/status',
+                          synchronize_status)
+    events = {event.device_id: event for event in FleetSynchronizer(
+        retries=2, retry_delay=0.01, interval=0.05).run([2, 3, 4])}
+
+    assert (events[2].status, events[2].attempts) == ('OK', 1)
+    assert (events[3].status, events[3].attempts) == ('OK', 2)
+    assert (events[4].status, events[4].attempts) == ('FAIL', 3)
+    assert events[4].error == 'Connection refused'
+    assert starts == {2: 1, 3: 2, 4: 3}
+
+
+def test_start_error_and_timeout(stub_server):
+    """
+    Test synchronizations failing to start or to end
+    """
+    stub_server.process_polls = 1000
+    stub_server.add_route(
+        'POST', r'/ordercommand/synchronize/1',
+        lambda *_: (404, {"message": "Device not found"}))
+    events = {event.device_id: event for event in FleetSynchronizer(
+        timeout=0.2, retries=1, retry_delay=0, interval=0.05,
+        max_rate=1000).run([1, 2])}
+
+    assert (events[1].status, events[1].attempts) == ('FAIL', 2)
+    assert events[1].error == 'Device not found'
+    assert not events[1].ok
+    # Still running after its timeout, so never started again
+    assert (events[2].status, events[2].attempts) == ('TIMEOUT', 1)
+    assert events[2].error == 'Synchronization timed out'
+    assert events[2].response['status'] == 'RUNNING'
+    assert events[2].elapsed >= 0.4
+    assert stub_server.request_count(
+        'POST', r'/ordercommand/synchronize/2') == 1
+
+
+def test_timed_out_sync_ends_first(stub_server):
+    """
+    Test a timed out synchronization is started again only once it ended
+    """
+    clock = FakeClock()
+    starts = []
+
+    def start(*_):
+        starts.append(clock())
+        return 200, None
+
+    def synchronize_status(*_):
+        if len(starts) == 2:
+            return 200, {"status": "ENDED"}
+        if clock() < starts[0] + 90:
+            return 200, {"status": "RUNNING"}
+        return 200, {"status": "FAIL", "message": "Device unreachable"}
+
+    stub_server.add_route('POST', r'/ordercommand/synchronize/\d+', start)
+    stub_server.add_route('GET', r'/ordercommand/synchronize/status',
+                          synchronize_status)
+    begin = time.monotonic()
+    events = list(FleetSynchronizer(
+        timeout=60, interval=10, retries=1, retry_delay=30, clock=clock,
+        sleep=clock.sleep).run([1]))
+
+    assert time.monotonic() - begin < 2
+    assert (events[0].status, events[0].attempts) == ('OK', 2)
+    assert len(starts) == 2
+    assert starts[1] - starts[0] >= 90 + 30
@@ -0,0 +1,126 @@
+"""
+Test package import
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+import msa_sdk
+
+# Seconds allowed for import msa_sdk.order in a fresh interpreter
+IMPORT_BUDGET = float(os.environ.get('MSA_SDK_IMPORT_BUDGET', '0.1'))
+
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+import msa_sdk.order
+elapsed = time.perf_counter() - start
+import msa_sdk
+print(json.dumps({
+    'elapsed': elapsed,
+    'modules': [name for name in ('requests', 'opensearchpy', 'orjson',
+                                  'sqlite3', 'msa_sdk.elk',
+                                  'msa_sdk.instrumentation',
+                                  'msa_sdk.tracing')
+                if name in sys.modules],
+    'context': 'context' in vars(msa_sdk),
+}))
+"""
+
+
+def _run_import(env=None):
+    result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT],
+                            stdin=subprocess.DEVNULL, capture_output=True,
+                            check=True, env=dict(os.environ, **(env or {})))
+    return json.loads(result.stdout)
+
+
+def test_import_budget():
+    """
+    Test importing a task module is fast and loads nothing heavy
+    """
+    result = _run_import()
+
+    assert result['modules'] == []
+    assert not result['context']
+    assert result['elapsed'] < IMPORT_BUDGET
+
+
+def test_import_with_es_servers():
+    """
+    Test the ES handler is not built at import
+    """
+    result = _run_import({'ES_SERVERS': 'msa-es:9200'})
+
+    assert result['modules'] == []
+    assert not result['context']
+
+
+def test_context():
+    """
+    Test the context is loaded on first access
+    """
+    assert msa_sdk.context['TOKEN'] == '12345qwert'
+    assert msa_sdk.context is msa_sdk.context
+    with pytest.raises(AttributeError):
+        msa_sdk.missing
+
+
+def test_deferred_es_handler():
+    """
+    Test the ES handler is built on the first record
+    """
+    batches = []
+
+    def bulk(client, actions, **kwargs):
+        batches.append([action['_source']['message'] for action in actions])
+
+    logger = logging.getLogger('test_import')
+    with patch('msa_sdk.elk.OpenSearch'), \
+            patch('msa_sdk.elk.eshelpers.bulk', side_effect=bulk), \
+            patch.dict('os.environ', {'ES_SERVERS': 'es1:9200 es2:9200'}):
+        msa_sdk.add_es_handler(logger)
+        handler = logger.handlers[-1]
+        try:
+            handler.flush()
+            assert handler._handler is None
+            logger.warning('hello')
+            handler.flush()
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+    assert handler._handler.hosts == ['es1:9200', 'es2:9200']
+    assert handler._handler.es_additional_fields['process_id'] == 'empty'
+    assert batches == [['hello']]
+
+
+def test_deferred_es_handler_errors():
+    """
+    Test the installed handler never raises indexing errors on its own
+    """
+    logger = logging.getLogger('test_import')
+    with patch('msa_sdk.elk.OpenSearch'), \
+            patch('msa_sdk.elk.eshelpers.bulk',
+                  side_effect=ConnectionError('unreachable')), \
+            patch.dict('os.environ', {'ES_SERVERS': 'es1:9200'}):
+        msa_sdk.add_es_handler(logger)
+        handler = logger.handlers[-1]
+        try:
+            logger.warning('hello')
+            handler.flush()
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+    assert handler._handler.failed == 1
+    with pytest.raises(ConnectionError, match='unreachable'):
+        handler.raise_errors()
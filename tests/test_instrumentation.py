@@ -0,0 +1,191 @@
+"""
+Test request instrumentation
+"""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import codec
+from msa_sdk import instrumentation
+from msa_sdk import msa_api
+from msa_sdk import transport
+from msa_sdk.device import Device
+from msa_sdk.msa_api import MSA_API
+from msa_sdk.order import Order
+from msa_sdk.stub_server import device
+
+
+@pytest.fixture
+def aggregator():
+    """Aggregator installed for one test."""
+    aggregator = instrumentation.Aggregator().install()
+    yield aggregator
+    aggregator.uninstall()
+
+
+def test_hooks(stub_server):
+    """
+    Test hooks see the request before and after it is sent
+    """
+    seen = []
+
+    def before(record):
+        assert record.elapsed is None
+        record.headers['X-Test'] = 'before'
+        seen.append(('before', record.method, record.path))
+
+    def after(record):
+        seen.append(('after', record.status_code, record.action))
+
+    stub_server.add_route('GET', r'/echo', lambda match, data: (200, {}))
+    instrumentation.add_hooks(before, after)
+    try:
+        api = MSA_API()
+        api.action = 'Echo'
+        api.path = '/echo?x=1'
+        api._call_get()
+    finally:
+        instrumentation.remove_hooks(before, after)
+    api._call_get()
+
+    assert seen == [('before', 'GET', '/echo?x=1'), ('after', 200, 'Echo')]
+
+
+def test_record(stub_server, aggregator):
+    """
+    Test the record of a request
+    """
+    order = Order(1234)
+    order.command_execute('CREATE', {"simple_firewall": {"1": {}}})
+
+    record = aggregator.records[-1]
+    assert record.endpoint == 'POST /ordercommand/execute/{id}/CREATE'
+    assert record.action == 'Command execute'
+    assert record.status_code == 200
+    assert record.ok
+    assert record.bytes_sent == len(codec.dumps(
+        {"simple_firewall": {"1": {}}}))
+    assert record.bytes_received == 0
+    assert record.retries == 0
+    assert record.elapsed > 0
+    assert len(record.trace_id) == 32
+
+    read = aggregator.records[0]
+    assert read.endpoint == 'GET /device/v3/{id}'
+    assert read.bytes_received == len(json.dumps(device(1234)))
+
+
+def test_retries_and_errors(stub_server, aggregator):
+    """
+    Test retries and failed requests are counted
+    """
+    stub_server.error_rate = 1.0
+    transport.configure(retries=2, backoff_factor=0)
+    try:
+        Device(device_id=None, lazy=True).read(by_ref='MSA1')
+    finally:
+        transport.configure()
+
+    with patch('requests.Session.delete', side_effect=ConnectionError):
+        api = MSA_API()
+        api.path = '/device/12'
+        with pytest.raises(ConnectionError):
+            api._call_delete()
+
+    summary = aggregator.summary()
+    assert summary['GET /device/reference/MSA1']['retries'] == 2
+    assert summary['GET /device/reference/MSA1']['errors'] == 1
+    assert summary['DELETE /device/{id}']['errors'] == 1
+    assert isinstance(aggregator.records[-1].error, ConnectionError)
+
+
+def test_summary(stub_server, aggregator):
+    """
+    Test the per endpoint summary and histogram
+    """
+    for device_id in range(1, 6):
+        Device(device_id=device_id)
+    stub_server.latency = 0.03
+    Device(device_id=6)
+
+    stats = aggregator.summary()['GET /device/v3/{id}']
+    assert stats['count'] == 6
+    assert stats['errors'] == 0
+    assert stats['max'] >= 0.03
+    assert stats['p50'] < 0.03
+    assert stats['p95'] == stats['max']
+    assert sum(count for _, count in stats['histogram']) == 6
+    assert stats['histogram'][-1][0] is None
+
+    output = io.StringIO()
+    aggregator.print_summary(output)
+    text = output.getvalue()
+    assert text.startswith('GET /device/v3/{id} count=6 errors=0')
+    assert '<= 50ms      1 #' in text
+
+    with patch.object(instrumentation.logger, 'info') as mock_info:
+        aggregator.log_summary()
+        assert mock_info.call_args[0][1] == text.rstrip('\n')
+
+
+def test_spans(stub_server, aggregator):
+    """
+    Test requests exported as spans matching the traceparent header
+    """
+    Device(device_id=7)
+
+    span = aggregator.spans()[-1]
+    headers = aggregator.records[-1].headers
+    assert headers['traceparent'] == '00-{}-{}-01'.format(span['traceId'],
+                                                          span['spanId'])
+    assert span['parentSpanId'] == headers['X-B3-ParentSpanId']
+    assert span['name'] == 'Read device'
+    assert span['endTimeUnixNano'] > span['startTimeUnixNano']
+    assert span['attributes']['http.route'] == '/device/v3/{id}'
+    assert span['status']['code'] == 'STATUS_CODE_OK'
+    json.dumps(span)
+
+
+def test_broken_hook(stub_server):
+    """
+    Test a failing hook does not break the call
+    """
+    def broken(record):
+        raise ValueError('broken')
+
+    instrumentation.add_hooks(before=broken)
+    try:
+        assert Device(device_id=3).name == 'Stub device 3'
+    finally:
+        instrumentation.remove_hooks(before=broken)
+
+
+def test_install_from_env():
+    """
+    Test MSA_SDK_INSTRUMENTATION installs a summary logged at exit
+    """
+    with patch.dict('os.environ', {'MSA_SDK_INSTRUMENTATION': '0'}):
+        assert instrumentation.install_from_env() is None
+    with patch.dict('os.environ', {'MSA_SDK_INSTRUMENTATION': '1'}), \
+            patch('atexit.register') as mock_register:
+        aggregator = instrumentation.install_from_env()
+        aggregator.uninstall()
+    mock_register.assert_called_once_with(aggregator.log_summary)
+    assert not aggregator.keep_records
+
+
+def test_installed_by_first_request(stub_server, monkeypatch):
+    """
+    Test the hooks of the environment are installed by the first request
+    """
+    monkeypatch.setattr(msa_api, '_hooks_installed', False)
+    with patch('msa_sdk.instrumentation.install_from_env') as mock_install, \
+            patch('msa_sdk.tracing.install_from_env') as mock_tracing:
+        for _ in range(2):
+            assert Device(device_id=3).name == 'Stub device 3'
+    mock_install.assert_called_once_with()
+    mock_tracing.assert_called_once_with()
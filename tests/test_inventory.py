@@ -0,0 +1,153 @@
+"""
+Test device inventory snapshot
+"""
+
+from unittest.mock import patch
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.device import Device
+from msa_sdk.inventory import Inventory
+from msa_sdk.stub_server import device
+
+
+def _labels(_, query):
+    device_id = int(query['id'])
+    if device_id == 5:
+        return 404, {"message": "Labels not found"}
+    labels = ['even' if device_id % 2 == 0 else 'odd']
+    if device_id < 3:
+        labels.append({"value": "core"})
+    return 200, labels
+
+
+@pytest.fixture
+def inventory(stub_server):
+    """Inventory of the devices 1 to 6."""
+    stub_server.add_route('GET', r'/device/v2/labels', _labels)
+    snapshot = Inventory()
+    snapshot.load(range(1, 7), customer_id=6, tags=True)
+    return snapshot
+
+
+def test_load_and_find(stub_server, inventory):
+    """
+    Test devices are read once then found in the indexes
+    """
+    assert len(inventory) == 6
+    assert 3 in inventory
+    record = inventory.get(3)
+    assert record['external_reference'] == 'MSA3'
+    assert record['management_address'] == '10.0.0.3'
+    assert record['tags'] == ['odd']
+    assert 'password' not in record
+
+    for _ in range(100):
+        assert [r['id'] for r in inventory.find(tags='odd')] == [1, 3]
+    assert inventory.find(management_address='10.0.0.4')[0]['id'] == 4
+    assert inventory.find(external_reference='MSA6', customer_id=6)
+    assert [r['id'] for r in inventory.find(tags='core')] == [1, 2]
+    assert inventory.find(tags='core', hostname='other') == []
+    assert len(inventory.find(manufacturer_id=14020601,
+                              model_id=14020601)) == 6
+    assert len(inventory.find()) == 6
+    assert inventory.values('tags') == {'odd': 2, 'even': 3, 'core': 2}
+    assert stub_server.request_count('GET', r'/device/v3/') == 6
+    with pytest.raises(ValueError, match='Unknown index'):
+        inventory.find(password='stub')
+
+
+def test_errors(stub_server, inventory):
+    """
+    Test failed reads are reported and keep the previous record
+    """
+    assert inventory.get(5)['tags'] == []
+    stub_server.error_rate = 1.0
+    stub_server.error_status = 404
+    errors = inventory.refresh([4, 7])
+    assert sorted(errors) == [4, 7]
+    assert isinstance(errors[4], RuntimeError)
+    assert inventory.get(4)['tags'] == ['even']
+    assert 7 not in inventory
+
+
+def test_refresh(stub_server, inventory):
+    """
+    Test a refreshed device replaces its index entries
+    """
+    moved = device(2)
+    moved.update(managementAddress='192.168.0.2', manufacturerId=1)
+    stub_server.add_route('GET', r'/device/v3/2', lambda *_: (200, moved))
+    assert inventory.refresh([2]) == {}
+    assert inventory.find(management_address='10.0.0.2') == []
+    assert inventory.find(management_address='192.168.0.2')[0]['id'] == 2
+    assert inventory.get(2)['customer_id'] == 6
+    assert inventory.get(2)['tags'] == ['even', 'core']
+    assert inventory.values('manufacturer_id') == {14020601: 5, 1: 1}
+
+    assert inventory.refresh() == {}
+    assert stub_server.request_count('GET', r'/device/v3/') == 13
+
+
+def test_sync_customer(stub_server):
+    """
+    Test only new devices are read and removed ones are dropped
+    """
+    stub_server.payload_size = 4
+    inventory = Inventory()
+    assert inventory.sync_customer(6) == {}
+    assert [r['id'] for r in inventory.find(customer_id=6)] == [1, 2, 3, 4]
+
+    stub_server.payload_size = 2
+    inventory.sync_customer(6)
+    stub_server.payload_size = 3
+    inventory.sync_customer(6)
+    assert [r['id'] for r in inventory] == [1, 2, 3]
+    assert stub_server.request_count('GET', r'/device/v3/') == 5
+    assert inventory.values('management_address') == {
+        '10.0.0.1': 1, '10.0.0.2': 1, '10.0.0.3': 1}
+
+    # A failed list call keeps the devices of the customer
+    stub_server.error_rate = 1.0
+    stub_server.error_status = 500
+    with pytest.raises(RuntimeError, match='customer 6: Stub error'):
+        inventory.sync_customer(6)
+    assert len(inventory.find(customer_id=6)) == 3
+
+
+def test_tags_error(stub_server):
+    """
+    Test a failed tag read is reported for its device only
+    """
+    get_tags = Device.get_tags
+
+    def flaky_get_tags(device):
+        if device.device_id == 2:
+            raise ConnectionError('Connection reset')
+        return get_tags(device)
+
+    stub_server.add_route('GET', r'/device/v2/labels',
+                          lambda *_: (200, ['tag']))
+    inventory = Inventory()
+    with patch('msa_sdk.device.Device.get_tags', flaky_get_tags):
+        errors = inventory.load([1, 2, 3], tags=True)
+    assert list(errors) == [2]
+    assert isinstance(errors[2], ConnectionError)
+    assert inventory.get(1)['tags'] == ['tag']
+    assert inventory.get(3)['tags'] == ['tag']
+    assert inventory.get(2)['tags'] == []
+
+
+def test_save(inventory, tmp_path):
+    """
+    Test the snapshot is saved and opened with its indexes
+    """
+    path = str(tmp_path / 'inventory.json')
+    inventory.save(path)
+    copy = Inventory.from_file(path)
+    assert list(copy) == list(inventory)
+    assert [r['id'] for r in copy.find(tags='even')] == [2, 4, 6]
+    assert copy.remove(2)['id'] == 2
+    assert copy.remove(2) is None
+    assert [r['id'] for r in copy.find(tags='core')] == [1]
@@ -15,7 +15,7 @@ def lookup_fixture():
     """
     Lookup fixture
     """
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -24,7 +24,7 @@ def lookup_fixture():
     return lookup
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_device_ids(mock_post, lookup_fixture):
     """Test a list of devices"""
 
@@ -46,7 +46,7 @@ def test_device_ids(mock_post, lookup_fixture):
 
     devices = [first_dev, second_dev]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(devices)
 
         lookup = lookup_fixture
@@ -59,7 +59,7 @@ def test_device_ids(mock_post, lookup_fixture):
         assert json.loads(lookup.content)[1] == second_dev
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_device_ids_fail(mock_post, lookup_fixture):
     """Test fail device ids"""
 
@@ -76,7 +76,7 @@ def test_device_ids_fail(mock_post, lookup_fixture):
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
 
@@ -87,7 +87,7 @@ def test_device_ids_fail(mock_post, lookup_fixture):
         assert lookup.content == json.dumps(fail_response)
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_customer_ids(mock_post, lookup_fixture):
     """Test a list of customers"""
 
@@ -119,7 +119,7 @@ def test_customer_ids(mock_post, lookup_fixture):
 
     customers = [first_costu, second_costu]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(customers)
 
         lookup = lookup_fixture
@@ -132,7 +132,7 @@ def test_customer_ids(mock_post, lookup_fixture):
         assert json.loads(lookup.content)[1] == second_costu
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_manager_ids(mock_post, lookup_fixture):
     """Test a list of managers"""
 
@@ -164,7 +164,7 @@ def test_manager_ids(mock_post, lookup_fixture):
 
     managers = [first_manager, second_manager]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(managers)
 
         lookup = lookup_fixture
@@ -176,7 +176,7 @@ def test_manager_ids(mock_post, lookup_fixture):
         assert json.loads(lookup.content) == managers
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_manager_ids_fail(mock_post, lookup_fixture):
     """Test fail manager ids """
 
@@ -193,7 +193,7 @@ def test_manager_ids_fail(mock_post, lookup_fixture):
         'wo_newparams': "Not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
 
@@ -205,7 +205,7 @@ def test_manager_ids_fail(mock_post, lookup_fixture):
         assert lookup.content == json.dumps(fail_response)
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_operator_ids(mock_post, lookup_fixture):
     """Test a list of operator"""
 
@@ -237,7 +237,7 @@ def test_operator_ids(mock_post, lookup_fixture):
 
     operators = [first_operator, second_operator]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(operators)
 
         lookup = lookup_fixture
@@ -249,7 +249,7 @@ def test_operator_ids(mock_post, lookup_fixture):
         assert json.loads(lookup.content) == operators
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_operator_ids_fail(mock_post, lookup_fixture):
     """Test fail operator ids """
 
@@ -266,7 +266,7 @@ def test_operator_ids_fail(mock_post, lookup_fixture):
         'wo_newparams': "Operator id not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
 
@@ -278,7 +278,7 @@ def test_operator_ids_fail(mock_post, lookup_fixture):
         assert lookup.content == json.dumps(fail_response)
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_sec_nodes(mock_post, lookup_fixture):
     """Test a list of sec nodes"""
 
@@ -297,7 +297,7 @@ def test_sec_nodes(mock_post, lookup_fixture):
 
     sec_nodes = [first_sec_node]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(sec_nodes)
 
         lookup = lookup_fixture
@@ -309,7 +309,7 @@ def test_sec_nodes(mock_post, lookup_fixture):
         assert json.loads(lookup.content)[0] == first_sec_node
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_sec_nodes_fail(mock_post, lookup_fixture):
     """Test fail sec nodes """
 
@@ -326,7 +326,7 @@ def test_sec_nodes_fail(mock_post, lookup_fixture):
         'wo_newparams': "Sec nodes not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False)
         mock_call_get.return_value.json.return_value = fail_return
 
@@ -338,7 +338,7 @@ def test_sec_nodes_fail(mock_post, lookup_fixture):
         assert lookup.content == json.dumps(fail_response)
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_device_by_customer(mock_post, lookup_fixture):
     """Test list of device by customer ref"""
 
@@ -360,7 +360,7 @@ def test_device_by_customer(mock_post, lookup_fixture):
 
     devices = [first_dev, second_dev]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(devices)
 
         lookup = lookup_fixture
@@ -372,7 +372,7 @@ def test_device_by_customer(mock_post, lookup_fixture):
         assert json.loads(lookup.content) == devices
 
 
-@patch('requests.post')
+@patch('requests.Session.post')
 def test_device_by_customer_fail(mock_post, lookup_fixture):
     """Test fail list of device by customer ref"""
 
@@ -388,7 +388,7 @@ def test_device_by_customer_fail(mock_post, lookup_fixture):
         'wo_newparams': "Customer not found"
     }
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value = MagicMock(ok=False, reason='Not found')
         mock_call_get.return_value.json.return_value = fail_return
 
@@ -400,7 +400,7 @@ def test_device_by_customer_fail(mock_post, lookup_fixture):
 
 
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_look_list_customer_by_operator_prefix(mock_post, lookup_fixture):
     """Test look_list_customer_by_operator_prefix"""
 
@@ -418,7 +418,7 @@ def test_look_list_customer_by_operator_prefix(mock_post, lookup_fixture):
 
     devices = [first_dev]
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = json.dumps(devices)
 
         lookup = lookup_fixture
@@ -29,7 +29,7 @@ def api_fixture(tmpdir):
     with open(f_name, 'w+') as t_file:
         t_file.write(api_info)
 
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.constants.VARS_CTX_FILE', f_name):
             api = MSA_API()
@@ -45,7 +45,7 @@ def environment_variable_fixture():
     os.environ['MSA_SDK_API_HOSTNAME'] = "environ_hostname"
     os.environ['MSA_SDK_API_PORT'] = "2222"
 
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         api = MSA_API()
     return api
@@ -56,7 +56,7 @@ def default_hostname_fixture():
     """
     Fixure to use default hostname and port for API endpoint
     """
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         api = MSA_API()
     return api
@@ -2,6 +2,7 @@
 Test Orchestration
 """
 import json
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from util import _is_valid_json
@@ -26,7 +27,7 @@ def test_list_service_instances(orchestration_fixture):
         '{"name":"Process/Reference/Device_Management/Device_Management_List",'
         '"id":1536,"serviceExternalReference":"MSASID1536","state":"ACTIVE"}]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info
         orch = orchestration_fixture
         orch.list_service_instances()
@@ -48,7 +49,7 @@ def test_list_service_instances_with_servicename(orchestration_fixture):
         '{"name":"Process/Reference/Device_Management/Device_Management_List",'
         '"id":1536,"serviceExternalReference":"MSASID1536","state":"ACTIVE"}]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info
         orch = orchestration_fixture
         orch.list_service_instances("serviceName")
@@ -64,7 +65,7 @@ def test_get_service_variables_by_service_id(orchestration_fixture):
                    '{"comment":"","name":"service_id",'
                    '"value":"205710"}]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info
         orch = orchestration_fixture
         orch.get_service_variables('1234')
@@ -87,7 +88,7 @@ def test_get_service_status_by_id(orchestration_fixture):
         '"startingDate":"2021-01-2911:33:23.878261","endingDate":"2021-01-2911:33:29.19334",'
         '"newParameters":[]}]},"executorUsername":"ncroot"}]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = response
         orch = orchestration_fixture
         assert orch.get_service_status_by_id(398) == 'ENDED'
@@ -95,7 +96,7 @@ def test_get_service_status_by_id(orchestration_fixture):
 
     response_fail = ('[]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = response_fail
         orch = orchestration_fixture
         assert orch.get_service_status_by_id(398) is None
@@ -117,7 +118,7 @@ def test_get_process_status_by_id(orchestration_fixture):
         '"scriptName": "test1", "details": "Task OK", "startingDate": "2021-06-21 11:42:34.795359", '
         '"endingDate": "2021-06-21 11:42:35.108229", "newParameters": [] } ] }, "executorUsername": null }')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = response
         orch = orchestration_fixture
         assert orch.get_process_status_by_id(189406) == 'ENDED'
@@ -125,7 +126,7 @@ def test_get_process_status_by_id(orchestration_fixture):
 
     response_fail = ('[]')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = response_fail
         orch = orchestration_fixture
         assert orch.get_process_status_by_id(189406) is None
@@ -139,7 +140,7 @@ def test_get_service_variable_by_name(orchestration_fixture):
 
     device_info = ('{"TASKINSTANCEID":"353763"}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info
         orch = orchestration_fixture
         orch.get_service_variable_by_name('1234', 'TASKINSTANCEID')
@@ -256,7 +257,7 @@ def test_execute_service_process(orchestration_fixture):
               '"submissionType": "RUN"'
               '}}')
 
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         orch = orchestration_fixture
 
         mock_post.return_value.text = result
@@ -283,7 +284,7 @@ def test_execute_service_process_no_service_id(orchestration_fixture):
               '"submissionType": "RUN"'
               '}}')
 
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         orch = orchestration_fixture
 
         mock_post.return_value.text = result
@@ -310,7 +311,7 @@ def test_execute_service_process_no_process_id(orchestration_fixture):
               '"state": null'
               '}}')
 
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         orch = orchestration_fixture
 
         mock_post.return_value.text = result
@@ -370,7 +371,7 @@ def test_execute_service_by_reference_already_running(orchestration_fixture):
     #the first should failed
     response_fail = ('[]')
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.post') as mock_call_post:
+      with patch('requests.Session.post') as mock_call_post:
         context = {
             "PROCESSINSTANCEID": 285,
             "TASKID": 1,
@@ -380,7 +381,7 @@ def test_execute_service_by_reference_already_running(orchestration_fixture):
         mock_task_call.return_value.text = context
         
         #overwrite method update_asynchronous_task_details   
-        with patch.object(orch, 'update_asynchronous_task_details', return_value=None):
+        with patch.object(orch, 'update_asynchronous_task_details', return_value=None) as mock_update:
         
           with patch('msa_sdk.msa_api.MSA_API.task_error') as mock_api_task_error:
 
@@ -393,6 +394,9 @@ def test_execute_service_by_reference_already_running(orchestration_fixture):
               orch.execute_service_by_reference('external_ref', 'servReference',
                                                 '/test/servName', 'procName',
                                                 {"var1": 1, "var23": 2}, 2, 5)
+              # Polled every second at first, the status every 5 seconds
+              assert mock_call_post.call_count > 1
+              mock_update.assert_called_once()
               #mock_call_post.assert_called_once_with('http://api_hostname:8080/ubi-api-rest/orchestration/service/execute/external_ref/servReference?serviceName=/test/servName&processName=procName', data='{"var1": 1, "var23": 2}', headers={'Content-Type': 'application/json', 'Accept': 'application/json', 'Authorization': 'Bearer 12345qwert'}, timeout=60)
               
               
@@ -410,7 +414,7 @@ def test_wait_and_run_execute_service_by_reference(orchestration_fixture):
     result = ('[{"TASKINSTANCEID":"353763", "status": { "status": "ENDED"} }]')
         
     with patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
-      with patch('requests.get') as mock_call_get:
+      with patch('requests.Session.get') as mock_call_get:
         orch = orchestration_fixture
         mock_call_get.return_value.text = result
         orch = orchestration_fixture
@@ -430,14 +434,14 @@ def test_wait_and_run_execute_service_by_reference(orchestration_fixture):
         '"newParameters":[]}]},"executorUsername":"ncroot"}]')
 
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.get') as mock_call_get:
+      with patch('requests.Session.get') as mock_call_get:
         context = {
             "PROCESSINSTANCEID": 448,
             "TASKID": 1,
             "EXECNUMBER": 1
         }
         mock_task_call.return_value = context
-        with patch('requests.get') as mock_call_get:
+        with patch('requests.Session.get') as mock_call_get:
           mock_call_get.return_value.text = response
           orch = orchestration_fixture
           # assert orch.wait_and_run_execute_service_by_reference('NTTA14', 'NTTSID2867','Process/workflows/test_wait_and_run_execute_service_by_reference/test_wait_and_run_execute_service_by_reference', 'Process/workflows/test_wait_and_run_execute_service_by_reference/Process_very_long_task',{"var1": 1, "var2": 2}, 20, 5) == 'RUNNING'
@@ -455,7 +459,7 @@ def test_wait_and_run_execute_service_by_reference_running(orchestration_fixture
   
   
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.put') as mock_call_put:
+      with patch('requests.Session.put') as mock_call_put:
         context = {
             "PROCESSINSTANCEID": "285",
             "TASKID": "1",
@@ -471,7 +475,7 @@ def test_wait_and_run_execute_service_by_reference_running(orchestration_fixture
             #overwrite method update_asynchronous_task_details   
             with patch.object(orch, 'update_asynchronous_task_details', return_value=None):
               with patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
-                with patch('requests.get') as mock_call_get:
+                with patch('requests.Session.get') as mock_call_get:
                   mock_call_get.return_value.text = result
                   orch.wait_and_run_execute_service_by_reference('NTTA14', 'NTTSID2867','Process/workflows/test_wait_and_run_execute_service_by_reference/test_wait_and_run_execute_service_by_reference', 'Process/workflows/test_wait_and_run_execute_service_by_reference/Process_very_long_task',{"var1": 1, "var2": 2}, 20, 5)
 
@@ -488,7 +492,7 @@ def test_wait_and_run_execute_service_by_reference_timeout(orchestration_fixture
 
     with patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
       with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-        with patch('requests.put') as mock_call_put:
+        with patch('requests.Session.put') as mock_call_put:
           context = {
               "PROCESSINSTANCEID": "285",
               "TASKID": "1",
@@ -513,7 +517,7 @@ def test_wait_end_get_process_instance(orchestration_fixture):
     result = ('{"TASKINSTANCEID":"353763", "status": { "status": "RUNNING"} }')
 
     with patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
-      with patch('requests.get') as mock_call_get:
+      with patch('requests.Session.get') as mock_call_get:
         orch = orchestration_fixture
         mock_call_get.return_value.text = result
         orch.wait_end_get_process_instance(1124, 20, 5)
@@ -528,7 +532,7 @@ def test_wait_end_get_process_instance_ended(orchestration_fixture):
     result = ('{"TASKINSTANCEID":"353763", "status": { "status": "ENDED"} }')
 
     with patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
-      with patch('requests.get') as mock_call_get:
+      with patch('requests.Session.get') as mock_call_get:
         orch = orchestration_fixture
         mock_call_get.return_value.text = result
         orch.wait_end_get_process_instance(1124, 20, 5)
@@ -647,7 +651,7 @@ def test_read_service_instance(orchestration_fixture):
         '{"name":"Process/Reference/Customer/Kibana/kibana_dashboard",'
         '"id":2231,"serviceExternalReference":"MSASID2231","state":"ACTIVE"}')
 
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = device_info
         orch = orchestration_fixture
         orch.read_service_instance('2231')
@@ -666,7 +670,7 @@ def test_update_asynchronous_task_details(orchestration_fixture):
         'exec_number': '4242',
         'data': 'Lorem ipsum dolor sit amet'}
 
-    with patch('requests.put') as mock_call_put:
+    with patch('requests.Session.put') as mock_call_put:
         assert not orchestration_fixture.update_asynchronous_task_details(
             **argument_dict)
 
@@ -766,3 +770,74 @@ def test_get_workflow_details(orchestration_fixture):
         )
         assert orch.path == expected_path
         mock_call_get.assert_called_once_with()
+
+
+def test_wait_end_get_process_instance_backoff(orchestration_fixture):
+    """
+    Test wait_end_get_process_instance polls with growing intervals
+
+    """
+    running = '{"status": { "status": "RUNNING"} }'
+    ended = '{"status": { "status": "ENDED"} }'
+
+    with patch('requests.Session.get') as mock_call_get, \
+            patch('msa_sdk.polling.time.sleep') as mock_sleep, \
+            patch('msa_sdk.polling.random.uniform', return_value=0):
+        mock_call_get.side_effect = [MagicMock(text=running),
+                                     MagicMock(text=running),
+                                     MagicMock(text=running),
+                                     MagicMock(text=ended)]
+        orch = orchestration_fixture
+        response = orch.wait_end_get_process_instance(1124, 600, 2)
+
+        assert response['status']['status'] == 'ENDED'
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 1.5, 2]
+
+
+def test_wait_end_get_process_instances(orchestration_fixture):
+    """
+    Test waiting on many processes at once
+
+    """
+    polls = {}
+
+    def get(url, **kwargs):
+        process_id = int(url.rsplit('/', 1)[1])
+        polls[process_id] = polls.get(process_id, 0) + 1
+        if process_id == 3:
+            raise ConnectionError('Lost')
+        status = 'RUNNING' if polls[process_id] < process_id else 'ENDED'
+        return MagicMock(ok=True, text=json.dumps(
+            {"processId": process_id, "status": {"status": status}}))
+
+    with patch('requests.Session.get', side_effect=get), \
+            patch('msa_sdk.polling.Backoff.delays',
+                  side_effect=lambda: iter(lambda: 0.01, None)):
+        orch = orchestration_fixture
+        results = list(orch.wait_end_get_process_instances([2, 1, 3],
+                                                           timeout=0.5,
+                                                           max_rate=1000))
+
+    assert [process_id for process_id, _ in results] == [1, 2, 3]
+    assert results[0][1]['status']['status'] == 'ENDED'
+    assert results[1][1]['status']['status'] == 'ENDED'
+    assert results[2][1] == {}
+
+
+def test_wait_end_get_process_instances_fail_fast(orchestration_fixture):
+    """
+    Test waiting on many processes stops on the first failure
+
+    """
+    def get(url, **kwargs):
+        process_id = int(url.rsplit('/', 1)[1])
+        status = 'FAIL' if process_id == 1 else 'RUNNING'
+        return MagicMock(ok=True, text=json.dumps(
+            {"processId": process_id, "status": {"status": status}}))
+
+    with patch('requests.Session.get', side_effect=get):
+        orch = orchestration_fixture
+        results = list(orch.wait_end_get_process_instances(
+            [1, 2], timeout=60, fail_fast=True))
+
+    assert [process_id for process_id, _ in results] == [1]
@@ -6,6 +6,9 @@ from unittest.mock import patch
 
 import pytest
 from util import order_fixture  # pylint: disable=unused-import
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.order import Order
 
 
 @patch('msa_sdk.device.Device.read')
@@ -119,7 +122,7 @@ def test_command_objects_all(_, order_fixture):
         'addressObject',
         'address_holder'
     ]
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = return_body
         order = order_fixture
         order.command_objects_all()
@@ -139,7 +142,7 @@ def test_command_objects_instances(_, order_fixture):
         '2000 line 2',
         'FROM-inside line 1'
     ])
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = return_body
         order = order_fixture
         order.command_objects_instances('accesslist')
@@ -169,7 +172,7 @@ def test_command_objects_instances_by_id(_, order_fixture):
             }
         }
     })
-    with patch('requests.get') as mock_call_get:
+    with patch('requests.Session.get') as mock_call_get:
         mock_call_get.return_value.text = return_body
         order = order_fixture
         order.command_objects_instances_by_id('accesslist', '2000')
@@ -190,3 +193,133 @@ def test_command_get_deployment_settings_id(order_fixture):
         assert order.command_get_deployment_settings_id() == 276
 
         mock_call_get.assert_called_once_with()
+
+
+def test_order_lazy():
+    """
+    Test lazy order sends commands without reading the device
+    """
+    with patch('requests.Session.get') as mock_call_get, \
+            patch('msa_sdk.msa_api.MSA_API._call_post') as mock_call_post:
+        order = Order(1234, lazy=True)
+        order.command_execute('UPDATE', {"subnet": "mySubnet"}, 50)
+
+        assert order.path == '/ordercommand/execute/1234/UPDATE'
+        mock_call_post.assert_called_once_with({"subnet": "mySubnet"}, 50)
+        mock_call_get.assert_not_called()
+
+
+def test_order_lazy_read(stub_server):
+    """
+    Test the lazy attributes of an order are read from the device API
+    """
+    order = Order(1234, lazy=True)
+    assert order.management_address == '10.0.4.210'
+    assert stub_server.request_count('GET', r'^/device/v3/1234$') == 1
+    assert stub_server.request_count('GET', r'^/ordercommand/') == 0
+    assert order.api_path == '/ordercommand'
+
+
+def test_command_execute_json(stub_server):
+    """
+    Test command execute returns the decoded response without decoding
+    the text
+    """
+    objects = {"simple_firewall": {str(index): {"object_id": str(index)}
+                                   for index in range(1000)}}
+    stub_server.add_route('POST', r'/ordercommand/execute/\d+/\w+',
+                          lambda _, data: (200, data))
+    order = Order(1234, lazy=True)
+    assert order.command_execute_json('CREATE', objects) == objects
+    assert order._content is None
+    assert json.loads(order.content) == objects
+
+
+def test_command_call_json(stub_server):
+    """
+    Test command call returns the decoded response, and the process
+    content on an error
+    """
+    stub_server.add_route('POST', r'/ordercommand/call/\d+/\w+/\d',
+                          lambda _, data: (200, {"params": data}))
+    order = Order(1234, lazy=True)
+    assert order.command_call_json('CREATE', 0, {"ms": {1: {"a": "b"}}}) \
+        == {"params": {"ms": {"1": {"a": "b"}}}}
+    assert order.path == '/ordercommand/call/1234/CREATE/0'
+
+    stub_server.error_rate = 1.0
+    result = order.command_call_json('CREATE', 0, {})
+    assert result['wo_status'] == Order.FAILED
+    assert result['wo_newparams'] == 'Stub error'
+
+
+def test_command_call_check_duplicate(stub_server):
+    """
+    Test the CREATE duplicate check reads each microservice once
+    """
+    instances = {"accesslist": ["1", "2"], "firewall": []}
+    stub_server.add_route(
+        'GET', r'/ordercommand/objects/\d+/(\w+)',
+        lambda match, _: (200, instances[match.group(1)]))
+    order = Order(1234, lazy=True)
+    params = {"accesslist": {str(index): {"object_id": str(index)}
+                             for index in range(3, 200)},
+              "firewall": {"1": {"object_id": "1"}}}
+    order.command_call_check_duplicate('CREATE', 0, params)
+
+    assert order.path == '/ordercommand/call/1234/CREATE/0'
+    assert order.action == 'Call command'
+    assert stub_server.request_count('GET', r'/ordercommand/objects') == 2
+    assert stub_server.request_count('POST', r'/ordercommand/call') == 1
+
+    params["accesslist"]["2"] = {"object_id": "2"}
+    params["accesslist"][1] = {"object_id": "1"}
+    with pytest.raises(ValueError) as error:
+        order.command_call_check_duplicate('create', 0, params)
+    assert str(error.value) == (
+        "Microservice instance 'accesslist' with ID '2', "
+        "'accesslist' with ID '1' already exists")
+    assert stub_server.request_count('POST', r'/ordercommand/call') == 1
+
+    order.command_call_check_duplicate('UPDATE', 0, params)
+    assert stub_server.request_count('GET', r'/ordercommand/objects') == 4
+    assert stub_server.request_count('POST', r'/ordercommand/call') == 2
+
+
+def test_command_call_check_duplicate_errors(stub_server):
+    """
+    Test bad parameters and failed instance reads
+    """
+    order = Order(1234, lazy=True)
+    for params in ({}, {"accesslist": {}}, {"accesslist": "1"}):
+        with pytest.raises(ValueError):
+            order.command_call_check_duplicate('CREATE', 0, params)
+
+    stub_server.add_route('GET', r'/ordercommand/objects/\d+/\w+',
+                          lambda *_: (404, {"message": "Not found"}))
+    order.command_call_check_duplicate('CREATE', 0, {"ms": {"1": {}}})
+    assert order.path == '/ordercommand/call/1234/CREATE/0'
+
+    stub_server.add_route('GET', r'/ordercommand/objects/\d+/\w+',
+                          lambda *_: (500, {"message": "Server error"}))
+    with pytest.raises(RuntimeError, match='Server error'):
+        order.command_call_check_duplicate('CREATE', 0, {"ms": {"1": {}}})
+
+    with patch('msa_sdk.order.Order.command_objects_instances',
+               side_effect=ConnectionError('refused')):
+        with pytest.raises(RuntimeError, match='refused'):
+            order.command_call_check_duplicate('CREATE', 0,
+                                               {"ms": {"1": {}}})
+
+
+def test_command_call_check_duplicate_not_json():
+    """
+    Test an instance list which is not JSON means no instance
+    """
+    with patch('requests.Session.get') as mock_get, \
+            patch('requests.Session.post') as mock_post, \
+            patch('msa_sdk.auth.token_cache.get', return_value='token'):
+        mock_get.return_value.text = 'Not found'
+        order = Order(1234, lazy=True)
+        order.command_call_check_duplicate('CREATE', 0, {"ms": {"1": {}}})
+        mock_post.assert_called_once()
@@ -6,6 +6,9 @@ from unittest.mock import patch
 
 import pytest
 from util import orderstack_fixture  # pylint: disable=unused-import
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.order_stack import OrderStack
 
 
 @patch('msa_sdk.device.Device.read')
@@ -40,3 +43,13 @@ def test_apply_command_stacked(_, orderstack_fixture):
         assert orderstack.path == local_path_apply
 
         mock_call_post.assert_called_once_with(timeout=50)
+
+
+def test_order_stack_lazy_read(stub_server):
+    """
+    Test the lazy attributes of an order stack are read from the device API
+    """
+    order_stack = OrderStack(1234, lazy=True)
+    assert order_stack.hostname == 'stub'
+    assert stub_server.request_count('GET', r'^/device/v3/1234$') == 1
+    assert stub_server.request_count(None, r'^/orderstack/') == 0
@@ -0,0 +1,140 @@
+"""
+Test pagination
+"""
+
+import threading
+import time
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.orchestration import Orchestration
+from msa_sdk.pagination import Paginator
+
+
+def _pages(total, calls=None, delay=0.0):
+    def fetch(page, page_size):
+        if calls is not None:
+            calls.append(page)
+        time.sleep(delay)
+        first = (page - 1) * page_size
+        return list(range(first, min(first + page_size, total)))
+    return fetch
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_short_last_page(prefetch):
+    """
+    Test pages are read until a short page
+    """
+    calls = []
+    paginator = Paginator(_pages(25, calls), page_size=10, prefetch=prefetch)
+    assert list(paginator) == list(range(25))
+    assert calls == [1, 2, 3]
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_empty_last_page(prefetch):
+    """
+    Test an exact multiple of the page size ends on an empty page
+    """
+    calls = []
+    paginator = Paginator(_pages(20, calls), page_size=10, prefetch=prefetch)
+    assert [len(page) for page in paginator.pages()] == [10, 10]
+    assert calls == [1, 2, 3]
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_max_pages(prefetch):
+    """
+    Test max_pages and first_page
+    """
+    calls = []
+    paginator = Paginator(_pages(100, calls), page_size=10, first_page=2,
+                          prefetch=prefetch, max_pages=2)
+    assert list(paginator) == list(range(10, 30))
+    assert calls == [2, 3]
+
+
+def test_prefetch_overlaps():
+    """
+    Test the next page is read while the current one is processed
+    """
+    fetch = _pages(40, delay=0.05)
+    start = time.monotonic()
+    for _ in Paginator(fetch, page_size=10, prefetch=True).pages():
+        time.sleep(0.05)
+    prefetched = time.monotonic() - start
+    start = time.monotonic()
+    for _ in Paginator(fetch, page_size=10).pages():
+        time.sleep(0.05)
+    sequential = time.monotonic() - start
+    assert prefetched < sequential - 0.1
+
+
+def test_prefetch_early_break():
+    """
+    Test stopping early reads at most one page ahead
+    """
+    calls = []
+    threads = threading.active_count()
+    items = iter(Paginator(_pages(1000, calls), page_size=10,
+                           prefetch=True))
+    assert next(items) == 0
+    items.close()
+    time.sleep(0.05)
+    # The prefetch of page 2 may be cancelled before it starts
+    assert calls in ([1], [1, 2])
+    assert threading.active_count() == threads
+
+
+def test_prefetch_error():
+    """
+    Test an error reading a page is raised to the caller
+    """
+    def fetch(page, _):
+        if page == 2:
+            raise RuntimeError('page 2')
+        return [page] * 10
+
+    items = iter(Paginator(fetch, page_size=10, prefetch=True))
+    assert [next(items) for _ in range(10)] == [1] * 10
+    with pytest.raises(RuntimeError, match='page 2'):
+        next(items)
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_iter_workflow_details(stub_server, prefetch):
+    """
+    Test workflow details of all pages
+    """
+    stub_server.payload_size = 25
+    orch = Orchestration('MSAA19224')
+    details = list(orch.iter_workflow_details('Process/Stub', True,
+                                              page_size=10,
+                                              prefetch=prefetch))
+    assert [detail['serviceId']['id'] for detail in details] == \
+        list(range(1, 26))
+    assert stub_server.request_count(
+        'GET', r'/orchestration/v2/MSAA19224/workflow/details') == 3
+
+
+def test_iter_workflow_details_page(stub_server):
+    """
+    Test a Spring page response and an error
+    """
+    stub_server.add_route(
+        'GET', r'/orchestration/v2/\w+/workflow/details',
+        lambda _, query: (200, {"content": [query['page']] if
+                                query['page'] == '1' else [],
+                                "totalElements": 1}))
+    orch = Orchestration('MSAA19224')
+    assert list(orch.iter_workflow_details('Process/Stub', True,
+                                           page_size=1, prefetch=False)) \
+        == ['1']
+
+    stub_server.add_route(
+        'GET', r'/orchestration/v2/\w+/workflow/details',
+        lambda *_: (404, {"message": "Not found"}))
+    with pytest.raises(RuntimeError, match='Not found'):
+        list(orch.iter_workflow_details('Process/Stub', True))
@@ -0,0 +1,148 @@
+"""
+Test microservice payload builder
+"""
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.order import Order
+from msa_sdk.payload import PayloadBuilder
+from msa_sdk.payload import PayloadValidationError
+
+
+def _variables():
+    return {"variable": [
+        {"name": "params.object_id", "type": "String", "mandatory": True},
+        {"name": "params.src_ip", "type": "IpAddress", "mandatory": True},
+        {"name": "params.src_mask", "type": "IpMask"},
+        {"name": "params.dst_port", "type": "Integer",
+         "defaultValue": "443"},
+        {"name": "params.enabled", "type": "Boolean"},
+        {"name": "params.action", "type": "String", "editable": False,
+         "values": [{"actualValue": "accept", "displayValue": "Accept"},
+                    {"actualValue": "drop", "displayValue": "Drop"}]},
+        {"name": "params.comment", "type": "String", "editable": True,
+         "values": [{"actualValue": "none"}]},
+        {"name": "params.members.0.ip", "type": "IpAddress",
+         "mandatory": True},
+        {"name": "params.members.0.port", "type": "Integer"},
+    ]}
+
+
+@pytest.fixture
+def builder():
+    """Builder of the test microservice."""
+    return PayloadBuilder('simple_firewall', _variables())
+
+
+def test_build(builder):
+    """
+    Test values are converted and nested under the object name
+    """
+    params = builder.build([
+        {"object_id": 12, "src_ip": "10.0.0.1", "src_mask": "24",
+         "dst_port": 80, "enabled": True, "action": "drop",
+         "comment": "free text",
+         "members": [{"ip": "10.0.0.2", "port": "22"}, {"ip": "::1"}]},
+        {"object_id": "13", "src_ip": " 10.0.0.3 "},
+    ])
+    assert params == {"simple_firewall": {
+        "12": {"object_id": "12", "src_ip": "10.0.0.1",
+               "src_mask": "255.255.255.0", "dst_port": "80",
+               "enabled": "true", "action": "drop", "comment": "free text",
+               "members": {"0": {"ip": "10.0.0.2", "port": "22"},
+                           "1": {"ip": "::1"}}},
+        "13": {"object_id": "13", "src_ip": "10.0.0.3"},
+    }}
+
+
+def test_build_dict_and_defaults(builder):
+    """
+    Test objects keyed by object_id and default values
+    """
+    params = builder.build({"12": {"src_ip": "10.0.0.1",
+                                   "members": {"1": {"ip": "10.0.0.3"},
+                                               "0": {"ip": "10.0.0.2"}}}},
+                           defaults=True)
+    assert params["simple_firewall"]["12"] == {
+        "object_id": "12", "src_ip": "10.0.0.1", "dst_port": "443",
+        "members": {"0": {"ip": "10.0.0.2"}, "1": {"ip": "10.0.0.3"}}}
+
+
+def test_build_errors(builder):
+    """
+    Test every error of the batch is reported
+    """
+    with pytest.raises(PayloadValidationError) as error:
+        builder.build([
+            {"object_id": "1", "src_ip": "10.0.0.300", "dst_port": "http",
+             "enabled": "maybe", "action": "reject", "src_mask": "33",
+             "typo": "x", "members": [{"port": 1}, "x"]},
+            {"src_ip": "10.0.0.1"},
+            {"object_id": "2", "src_ip": "10.0.0.1", "members": "x"},
+            {"object_id": "2", "src_ip": "10.0.0.1"},
+            {"object_id": "2", "src_ip": "10.0.0.2"},
+            "not an object",
+        ])
+    assert isinstance(error.value, ValueError)
+    assert error.value.object_name == 'simple_firewall'
+    assert error.value.errors == [
+        "1 typo: unknown variable",
+        "1 src_ip: '10.0.0.300' is not an IP address",
+        "1 src_mask: '33' is not a netmask",
+        "1 dst_port: 'http' is not an integer",
+        "1 enabled: 'maybe' is not a boolean",
+        "1 action: 'reject' is not one of accept, drop",
+        "1 members.0.ip: is mandatory",
+        "1 members.1: is not an object",
+        "#1 object_id: is mandatory",
+        "2 members: is not an array",
+        "2 object_id: duplicate",
+        "#5 object: is not an object",
+    ]
+
+
+def test_validate_partial(builder):
+    """
+    Test partial objects for UPDATE and DELETE
+    """
+    assert builder.validate({"object_id": "1"}) == ['src_ip: is mandatory']
+    assert builder.validate({"object_id": "1"}, partial=True) == []
+    assert builder.validate({}, partial=True) == ['object_id: is mandatory']
+    assert builder.build([{"object_id": "1", "action": "accept"}],
+                         partial=True) == \
+        {"simple_firewall": {"1": {"object_id": "1", "action": "accept"}}}
+
+
+def test_not_strict():
+    """
+    Test unknown fields are kept when not strict
+    """
+    builder = PayloadBuilder('ms', [{"name": "params.port",
+                                     "type": "Integer"}], strict=False)
+    assert builder.build([{"object_id": "1", "port": 2, "extra": "x"}]) == \
+        {"ms": {"1": {"object_id": "1", "port": "2"}}}
+    with pytest.raises(PayloadValidationError):
+        builder.build([{"object_id": "1", "port": [1]}])
+    with pytest.raises(PayloadValidationError, match='is not a scalar'):
+        builder.build([{"object_id": {"a": 1}}])
+
+
+def test_from_repository(stub_server):
+    """
+    Test the variables are read once from the repository
+    """
+    stub_server.add_route('GET', r'/repository/v2/resource/variables',
+                          lambda *_: (200, _variables()))
+    builder = PayloadBuilder.from_repository(
+        'simple_firewall', 'CommandDefinition/LINUX/simple_firewall.xml')
+    objects = [{"object_id": str(index), "src_ip": "10.0.0.1"}
+               for index in range(100)]
+    params = builder.build(objects)
+    Order(1234, lazy=True).command_execute('CREATE', params)
+
+    assert len(params['simple_firewall']) == 100
+    assert stub_server.request_count(
+        'GET', r'/repository/v2/resource/variables') == 1
+    assert stub_server.request_count(
+        'POST', r'/ordercommand/execute/1234/CREATE') == 1
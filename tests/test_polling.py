@@ -0,0 +1,213 @@
+"""
+Test polling
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from msa_sdk.polling import Backoff
+from msa_sdk.polling import PollScheduler
+from msa_sdk.polling import RateLimiter
+from msa_sdk.polling import wait_until
+
+
+class FakeClock():
+    """Clock advanced by sleep."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def test_backoff_delays():
+    """
+    Test backoff grows up to max interval
+    """
+    delays = Backoff(initial=1, factor=2, max_interval=5, jitter=0).delays()
+    assert [next(delays) for _ in range(5)] == [1, 2, 4, 5, 5]
+
+
+def test_backoff_jitter():
+    """
+    Test jitter spreads the delays
+    """
+    with patch('msa_sdk.polling.random.uniform', return_value=0.1):
+        delays = Backoff(initial=2, jitter=0.1).delays()
+        assert next(delays) == 2.2
+
+
+def test_backoff_initial_capped():
+    """
+    Test initial interval never exceeds max interval
+    """
+    assert Backoff(initial=3, max_interval=1).initial == 1
+
+
+def test_wait_until_done():
+    """
+    Test wait until returns as soon as the result is final
+    """
+    clock = FakeClock()
+    results = iter(['RUNNING', 'RUNNING', 'ENDED'])
+    pending = []
+    result, final = wait_until(lambda: next(results),
+                               lambda status: status != 'RUNNING', 60,
+                               Backoff(initial=1, factor=2, jitter=0),
+                               pending.append, clock, clock.sleep)
+    assert (result, final) == ('ENDED', True)
+    assert clock.sleeps == [1, 2]
+    assert pending == ['RUNNING', 'RUNNING']
+
+
+def test_wait_until_pending_interval():
+    """
+    Test on_pending is called at most once per pending interval
+    """
+    clock = FakeClock()
+    pending = []
+    wait_until(lambda: 'RUNNING', lambda _: False, 30,
+               Backoff(initial=1, factor=2, max_interval=8, jitter=0),
+               lambda _: pending.append(clock() - 1000), clock, clock.sleep,
+               pending_interval=10)
+    assert clock.sleeps == [1, 2, 4, 8, 8, 7]
+    assert pending == [0, 15]
+
+
+def test_wait_until_deadline():
+    """
+    Test wait until stops at the deadline
+    """
+    clock = FakeClock()
+    result, final = wait_until(lambda: 'RUNNING', lambda _: False, 10,
+                               Backoff(initial=4, factor=1, jitter=0),
+                               clock=clock, sleep=clock.sleep)
+    assert (result, final) == ('RUNNING', False)
+    assert clock.sleeps == [4, 4, 2]
+
+
+def test_wait_until_no_time():
+    """
+    Test wait until with an elapsed timeout does not poll
+    """
+    assert wait_until(lambda: 1 / 0, bool, -1) == (None, False)
+
+
+def test_scheduler_many_keys():
+    """
+    Test scheduler yields keys in completion order
+    """
+    clock = FakeClock()
+    durations = {'a': 10, 'b': 2, 'c': 1000}
+    start = clock()
+    polls = []
+
+    def poll(key):
+        polls.append(key)
+        return clock() - start >= durations[key]
+
+    scheduler = PollScheduler(poll, bool, timeout=30,
+                              backoff=Backoff(initial=1, factor=2,
+                                              max_interval=8, jitter=0),
+                              clock=clock, sleep=clock.sleep)
+    for key in durations:
+        scheduler.add(key)
+    assert len(scheduler) == 3
+
+    results = [(key, final) for key, _, final in scheduler.run()]
+
+    assert results == [('b', True), ('a', True), ('c', False)]
+    assert len(scheduler) == 0
+    assert clock() - start == 30
+    # a is polled at 0, 1, 3, 7 and 15
+    assert polls.count('a') == 5
+
+
+def test_scheduler_discard():
+    """
+    Test discarded keys are not polled any more
+    """
+    clock = FakeClock()
+    polls = []
+
+    def poll(key):
+        polls.append(key)
+        return False
+
+    scheduler = PollScheduler(poll, bool, timeout=5,
+                              backoff=Backoff(jitter=0),
+                              clock=clock, sleep=clock.sleep)
+    scheduler.add('a')
+    scheduler.add('b', timeout=1)
+    scheduler.discard('a')
+    assert list(scheduler.run()) == [('b', False, False)]
+    assert polls == ['b', 'b']
+
+
+def test_rate_limiter():
+    """
+    Test rate limiter spaces acquisitions once the burst is used
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_scheduler_concurrent():
+    """
+    Test concurrent polls, total wait is the longest one
+    """
+    start = time.monotonic()
+    durations = {key: 0.3 for key in range(6)}
+    durations['slow'] = 0.6
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def poll(key):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        return time.monotonic() - start >= durations[key]
+
+    scheduler = PollScheduler(poll, bool, timeout=5,
+                              backoff=Backoff(initial=0.05, max_interval=0.1),
+                              max_workers=4,
+                              rate_limiter=RateLimiter(1000))
+    for key in durations:
+        scheduler.add(key)
+    results = list(scheduler.run())
+
+    assert time.monotonic() - start < 1.5
+    assert results[-1][0] == 'slow'
+    assert all(final for _, _, final in results)
+    assert len(results) == 7
+    assert 1 < state['peak'] <= 4
+
+
+def test_scheduler_concurrent_discard():
+    """
+    Test a key discarded while its poll runs is dropped
+    """
+    scheduler = None
+
+    def poll(key):
+        if key == 'a':
+            scheduler.discard('a')
+        return True
+
+    scheduler = PollScheduler(poll, bool, max_workers=2)
+    scheduler.add('a')
+    scheduler.add('b')
+    assert [key for key, _, _ in scheduler.run()] == ['b']
@@ -21,7 +21,7 @@ def test_remove_pop_removes_correct_pop(pops_fixture):
     vendor = "vendor1"
     name = "pop1"
 
-    with patch('requests.delete') as mock_call_delete:
+    with patch('requests.Session.delete') as mock_call_delete:
         mock_call_delete.return_value.status_code = 200
         pops.remove_pop(entity_type, vendor, name)
         assert pops.path == '/sase/pops?entityType={}&vendor={}&name={}'.format(entity_type, vendor, name)
@@ -75,7 +75,7 @@ def test_remove_tunnel_removes_correct_tunnel(pops_fixture):
     pop_vendor = "vendor1"
     pop_identifier = "identifier1"
 
-    with patch('requests.delete') as mock_call_delete:
+    with patch('requests.Session.delete') as mock_call_delete:
         mock_call_delete.return_value.status_code = 200
         pops.remove_tunnel(cpe_device_id, pop_vendor, pop_identifier)
         assert pops.path == '/sase/pops/tunnel?cpeDeviceId={}&popVendor={}&popIdentifier={}'.format(cpe_device_id,
@@ -0,0 +1,166 @@
+"""
+Test bulk device provisioning pipeline
+"""
+
+import threading
+import time
+
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk.provisioning import ProvisioningPipeline
+from msa_sdk.provisioning import summarize
+
+
+def _specs(count, prefix='cpe'):
+    for index in range(count):
+        yield {'customer_id': 6, 'name': '{}-{}'.format(prefix, index),
+               'manufacturer_id': 14020601, 'model_id': 14020601,
+               'login': 'root', 'password': 'secret',
+               'management_address': '10.1.0.{}'.format(index)}
+
+
+def test_run(stub_server):
+    """
+    Test every device goes through all the stages
+    """
+    stub_server.process_polls = 3
+    pipeline = ProvisioningPipeline(interval=0.05)
+    results = list(pipeline.run(_specs(20)))
+
+    assert len(results) == 20
+    assert all(result.ok for result in results)
+    assert sorted(result.name for result in results) == \
+        sorted('cpe-{}'.format(index) for index in range(20))
+    assert len({result.device_id for result in results}) == 20
+    report = results[0].to_dict()
+    assert report['stage'] == 'wait'
+    assert 'password' not in str(report)
+    assert set(report['timings']) == {'create', 'activate', 'provision',
+                                      'wait', 'total'}
+    assert results[0].provision_status['status'] == 'OK'
+    for pattern, count in ((r'/device/v2/6', 20), (r'/device/activate/', 20),
+                           (r'/device/provisioning/\d', 20),
+                           (r'/device/provisioning/status/', 60)):
+        assert stub_server.request_count(None, pattern) == count
+
+
+def test_stage_concurrency(stub_server):
+    """
+    Test each stage keeps to its own worker pool and the input is read
+    as room frees up
+    """
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0, 'provisioned': 0, 'staged': 0}
+    create = stub_server._create_device
+
+    def counted_create(match, data):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        return create(match, data)
+
+    def provision(*_):
+        with lock:
+            state['provisioned'] += 1
+        return 200, None
+
+    def specs():
+        for index, spec in enumerate(_specs(12)):
+            with lock:
+                state['staged'] = max(state['staged'],
+                                      index + 1 - state['provisioned'])
+            yield spec
+
+    stub_server.add_route('POST', r'/device/v2/\d+', counted_create)
+    stub_server.add_route('POST', r'/device/provisioning/\d+', provision)
+    pipeline = ProvisioningPipeline(create_workers=2, activate_workers=1,
+                                    provision_workers=1, interval=0.05)
+    results = list(pipeline.run(specs()))
+    assert len(results) == 12
+    assert state['peak'] == 2
+    assert state['staged'] == 4
+
+
+def test_failures(stub_server):
+    """
+    Test failed stages are reported per device
+    """
+    create = stub_server._create_device
+    status = stub_server._provision_status
+
+    def create_device(match, data):
+        if data['name'] == 'cpe-0':
+            return 400, {"message": "Duplicate name"}
+        return create(match, data)
+
+    def provision_status(match, query):
+        if match.group(1) == str(failing['provision']):
+            return 200, {"status": "FAIL", "errorMsg": "Unreachable"}
+        return status(match, query)
+
+    failing = {}
+
+    def activate(match, _):
+        if match.group(1) == str(failing.setdefault('activate',
+                                                    int(match.group(1)))):
+            return 500, {"message": "Activation failed"}
+        failing.setdefault('provision', int(match.group(1)))
+        return 200, None
+
+    stub_server.add_route('POST', r'/device/v2/\d+', create_device)
+    stub_server.add_route('POST', r'/device/activate/(\d+)', activate)
+    stub_server.add_route('GET', r'/device/provisioning/status/(\d+)',
+                          provision_status)
+    results = list(ProvisioningPipeline(
+        create_workers=1, activate_workers=1, interval=0.05).run(_specs(5)))
+
+    by_stage = {result.stage: result for result in results
+                if not result.ok}
+    assert by_stage['create'].error == 'Duplicate name'
+    assert by_stage['create'].device_id is None
+    assert by_stage['activate'].error == 'Activation failed'
+    assert by_stage['activate'].device_id == failing['activate']
+    assert by_stage['wait'].error == 'Unreachable'
+    assert by_stage['wait'].device_id == failing['provision']
+
+    summary = summarize(results)
+    assert summary['count'] == 5
+    assert summary['status'] == {'OK': 2, 'FAIL': 3}
+    assert summary['failed_stage'] == {'create': 1, 'activate': 1,
+                                       'wait': 1}
+    assert summary['timings']['total']['max'] >= \
+        summary['timings']['total']['mean']
+
+
+def test_timeout(stub_server):
+    """
+    Test devices still provisioning at the timeout
+    """
+    stub_server.process_polls = 1000
+    start = time.monotonic()
+    results = list(ProvisioningPipeline(
+        timeout=0.3, interval=0.05, max_rate=1000).run(_specs(3)))
+    assert time.monotonic() - start < 2
+    assert [result.status for result in results] == ['TIMEOUT'] * 3
+    assert results[0].provision_status['status'] == 'RUNNING'
+    assert summarize([]) == {'count': 0, 'status': {}, 'failed_stage': {},
+                             'timings': {}}
+
+
+def test_status_error(stub_server):
+    """
+    Test an error reading the provisioning status fails the device at once
+    """
+    stub_server.add_route(
+        'GET', r'/device/provisioning/status/\d+',
+        lambda *_: (404, {"message": "Device not found"}))
+    results = list(ProvisioningPipeline(
+        timeout=30, interval=0.05).run(_specs(1)))
+    assert (results[0].status, results[0].stage) == ('FAIL', 'wait')
+    assert results[0].error == 'Device not found'
+    assert results[0].timings['wait'] < 1
+    assert stub_server.request_count(
+        'GET', r'/device/provisioning/status/') == 1
@@ -0,0 +1,195 @@
+"""
+Test shared lookup cache
+"""
+
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import shared_cache
+from msa_sdk.device import Device
+from msa_sdk.lookup import Lookup
+from msa_sdk.shared_cache import SharedCache
+
+
+class Clock():
+    """Settable clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fetcher(bodies, delay=0.0):
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        time.sleep(delay)
+        return bodies[min(len(calls), len(bodies)) - 1]
+    return fetch, calls
+
+
+def test_get_or_fetch(tmp_path):
+    """
+    Test bodies are kept for the time to live of their table
+    """
+    clock = Clock()
+    cache = SharedCache(str(tmp_path), clock=clock)
+    fetch, calls = _fetcher(['v1', 'v2'])
+    assert cache.get_or_fetch('k', 'customers', fetch) == 'v1'
+    assert cache.get_or_fetch('k', 'customers', fetch) == 'v1'
+    assert len(calls) == 1
+
+    # Another process sees the same entry
+    other = SharedCache(str(tmp_path), clock=clock)
+    assert other.get_or_fetch('k', 'customers', fetch) == 'v1'
+
+    clock.now += 300
+    assert other.get_or_fetch('k', 'customers', fetch) == 'v2'
+    assert cache.get_or_fetch('k', 'customers', fetch) == 'v2'
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    cache.invalidate('k')
+    assert cache.get_or_fetch('k', 'customers', fetch) == 'v2'
+    assert len(calls) == 3
+    cache.invalidate()
+    cache.close()
+    cache.close()
+    assert cache.get_or_fetch('k', 'unknown', fetch) == 'v2'
+    assert cache.get_or_fetch('k', 'unknown', fetch) == 'v2'
+    assert len(calls) == 5
+
+
+def test_ttls(tmp_path, monkeypatch):
+    """
+    Test times to live from the defaults, environment and arguments
+    """
+    monkeypatch.setenv('MSA_SDK_SHARED_CACHE_TTL_CUSTOMERS', '60')
+    cache = SharedCache(str(tmp_path), ttls={'managers': 5})
+    assert cache.ttl('customers') == 60
+    assert cache.ttl('managers') == 5
+    assert cache.ttl('manufacturers') == 3600
+    assert cache.ttl('unknown') == 0
+
+
+def test_failed_refresh(tmp_path):
+    """
+    Test a failed refresh keeps the previous body and frees the lease
+    """
+    clock = Clock()
+    cache = SharedCache(str(tmp_path), clock=clock)
+    cache.get_or_fetch('k', 'customers', lambda: 'v1')
+    clock.now += 300
+    assert cache.get_or_fetch('k', 'customers', lambda: None) is None
+    assert cache.get_or_fetch('k', 'customers', lambda: 'v2') == 'v2'
+
+    clock.now += 300
+
+    def broken():
+        raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_fetch('k', 'customers', broken)
+    assert cache.get_or_fetch('k', 'customers', lambda: 'v3') == 'v3'
+
+
+def test_single_refresh(tmp_path):
+    """
+    Test one process refreshes a stale entry while the others serve the
+    previous copy
+    """
+    clock = Clock()
+    cache = SharedCache(str(tmp_path), clock=clock)
+    cache.get_or_fetch('k', 'customers', lambda: 'old')
+    clock.now += 300
+    fetch, calls = _fetcher(['new'], delay=0.2)
+    results = []
+
+    def read():
+        results.append(cache.get_or_fetch('k', 'customers', fetch))
+
+    refresher = threading.Thread(target=read)
+    refresher.start()
+    time.sleep(0.05)
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    for thread in readers:
+        thread.start()
+    for thread in readers + [refresher]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == ['new'] + ['old'] * 8
+    assert cache.get_or_fetch('k', 'customers', fetch) == 'new'
+
+
+def test_lookup_shared(stub_server, tmp_path, monkeypatch):
+    """
+    Test lookup tables are fetched once by all the API objects
+    """
+    assert shared_cache.get_shared_cache() is None
+    monkeypatch.setenv('MSA_SDK_SHARED_CACHE_DIR', str(tmp_path))
+    stub_server.add_route('GET', r'/lookup/customers',
+                          lambda *_: (200, [{"id": 1}]))
+    for _ in range(3):
+        lookup = Lookup()
+        lookup.look_list_customer_ids()
+        assert lookup.response.ok
+        assert lookup.content == '[{"id": 1}]'
+        lookup.look_list_manager_ids()
+        lookup.look_list_sec_nodes()
+        assert Device(device_id=None, lazy=True).get_all_manufacturers() == {}
+    for path in ('customers', 'managers', 'sec_nodes'):
+        assert stub_server.request_count('GET', '/lookup/' + path) == 1
+    assert stub_server.request_count('GET', '/device/v1/manufacturers') == 1
+
+    # Failed requests are not shared
+    stub_server.error_rate = 1.0
+    stub_server.error_status = 404
+    shared_cache.get_shared_cache().invalidate()
+    lookup.look_list_customer_ids()
+    assert not lookup.response.ok
+    lookup.look_list_customer_ids()
+    assert stub_server.request_count('GET', '/lookup/customers') == 3
+
+
+def test_unusable_cache(stub_server, tmp_path, monkeypatch, caplog):
+    """
+    Test lookups are sent without cache when the cache cannot be used
+    """
+    monkeypatch.setattr(shared_cache, '_error_logged', False)
+    # Not a directory, and root may write anywhere
+    (tmp_path / 'file').write_text('')
+    monkeypatch.setenv('MSA_SDK_SHARED_CACHE_DIR',
+                       str(tmp_path / 'file' / 'cache'))
+    stub_server.add_route('GET', r'/lookup/customers',
+                          lambda *_: (200, [{"id": 1}]))
+    for _ in range(2):
+        lookup = Lookup()
+        lookup.look_list_customer_ids()
+        assert lookup.content == '[{"id": 1}]'
+        assert Device(device_id=None, lazy=True).get_all_manufacturers() == {}
+
+    monkeypatch.setenv('MSA_SDK_SHARED_CACHE_DIR', str(tmp_path / 'cache'))
+    with patch.object(SharedCache, '_claim',
+                      side_effect=sqlite3.OperationalError('locked')):
+        lookup.look_list_customer_ids()
+    assert lookup.content == '[{"id": 1}]'
+    assert stub_server.request_count('GET', '/lookup/customers') == 3
+    assert stub_server.request_count('GET', '/device/v1/manufacturers') == 2
+    assert len([record for record in caplog.records
+                if record.name == 'msa_sdk.shared_cache']) == 1
+
+    # Errors of the request itself are raised
+    with patch('requests.Session.get',
+               side_effect=requests.ConnectionError('refused')), \
+            pytest.raises(requests.ConnectionError):
+        Lookup().look_list_manager_ids()
@@ -0,0 +1,200 @@
+"""
+Test streaming JSON parsing
+"""
+
+import json
+import tracemalloc
+from unittest.mock import MagicMock
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import instrumentation
+from msa_sdk.customer import Customer
+from msa_sdk.lookup import Lookup
+from msa_sdk.orchestration import Orchestration
+from msa_sdk.order import Order
+from msa_sdk.streaming import iter_json_items
+from msa_sdk.streaming import iter_response_items
+
+
+def _chunks(text, size):
+    data = text.encode()
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 4096])
+@pytest.mark.parametrize('document', [
+    [],
+    {},
+    [1, 2.5e3, -3, 12345678901234567890, "aé\"b", None, True,
+     {"x": [1, {"y": "z"}]}, []],
+    {"a": 1, "b": [1, 2], "ü": "ö"},
+    42,
+    "text",
+])
+def test_iter_json_items(document, size):
+    """
+    Test items are parsed whatever the chunk boundaries
+    """
+    items = list(iter_json_items(_chunks(json.dumps(document,
+                                                    ensure_ascii=False),
+                                         size)))
+
+    if isinstance(document, list):
+        assert items == document
+    elif isinstance(document, dict):
+        assert items == list(document.items())
+    else:
+        assert items == [document]
+
+
+def test_iter_json_items_text():
+    """
+    Test str chunks, blanks and empty bodies
+    """
+    assert list(iter_json_items([' [ 1 ', ', 2 ]\n'])) == [1, 2]
+    assert list(iter_json_items([])) == []
+    assert list(iter_json_items([b'', b'  '])) == []
+
+
+@pytest.mark.parametrize('text', ['[1 2]', '[1,', '{"a" 1}', '[1}'])
+def test_iter_json_items_invalid(text):
+    """
+    Test invalid JSON raises
+    """
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_items(_chunks(text, 2)))
+
+
+def test_iter_json_items_lazy():
+    """
+    Test items are yielded before the body is fully received
+    """
+    received = []
+
+    def chunks():
+        for chunk in ('[{"id": 1}', ', {"id": 2}', ']'):
+            received.append(chunk)
+            yield chunk
+
+    items = iter_json_items(chunks())
+    assert next(items) == {"id": 1}
+    assert len(received) == 2
+
+
+def test_response_closed():
+    """
+    Test the response is closed when iteration stops early
+    """
+    response = MagicMock()
+    response.iter_content.return_value = iter([b'[1, 2, 3]'])
+    items = iter_response_items(response, chunk_size=10)
+    assert next(items) == 1
+    items.close()
+
+    response.iter_content.assert_called_once_with(10)
+    response.close.assert_called_once_with()
+
+
+def test_bounded_memory():
+    """
+    Test peak memory does not grow with the number of items
+    """
+    item = json.dumps({"id": 1, "name": "x" * 100})
+
+    def chunks(count):
+        yield '['
+        for index in range(count):
+            yield (',' if index else '') + item
+        yield ']'
+
+    def peak(count):
+        tracemalloc.start()
+        for _ in iter_json_items(chunks(count)):
+            pass
+        _, peak_size = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_size
+
+    assert peak(20000) < 2 * peak(200) + 10000
+
+
+def test_lookup_iter_device_ids(stub_server):
+    """
+    Test streamed lookup of device ids
+    """
+    stub_server.payload_size = 1000
+    lookup = Lookup()
+    devices = list(lookup.iter_device_ids())
+
+    assert len(devices) == 1000
+    assert devices[-1] == {"id": 1000, "name": "Stub device 1000"}
+    assert lookup.content == '{}'
+
+
+def test_customer_iter_device_list(stub_server):
+    """
+    Test streamed device list of a customer
+    """
+    stub_server.payload_size = 3
+    assert list(Customer().iter_device_list_by_id(5)) == [1, 2, 3]
+
+
+def test_orchestration_iter_service_instances(stub_server):
+    """
+    Test streamed service instances
+    """
+    stub_server.payload_size = 2
+    orchestration = Orchestration(12)
+    instances = list(orchestration.iter_service_instances('Process/Stub'))
+
+    assert [instance['id'] for instance in instances] == [1, 2]
+    assert orchestration.path == \
+        '/orchestration/12/service/instance?serviceName=Process/Stub'
+
+
+def test_order_iter_objects_all(stub_server):
+    """
+    Test streamed microservices of a device
+    """
+    stub_server.payload_size = 2
+    objects = list(Order(1234).iter_objects_all())
+
+    assert objects == [('stub_ms_1', {}), ('stub_ms_2', {})]
+
+
+def test_streamed_error(stub_server):
+    """
+    Test an error response raises and sets the content
+    """
+    stub_server.error_rate = 1.0
+    stub_server.error_status = 500
+    lookup = Lookup()
+
+    with pytest.raises(RuntimeError, match='Stub error'):
+        list(lookup.iter_device_ids())
+    assert json.loads(lookup.content)['wo_status'] == 'FAIL'
+    with pytest.raises(RuntimeError, match='Stub error'):
+        list(Orchestration(12).iter_service_instances('Process/Stub'))
+    customer = Customer()
+    with pytest.raises(RuntimeError, match='Stub error'):
+        list(customer.iter_device_list_by_id(5))
+    assert json.loads(customer.content)['wo_comment'] == \
+        'Get device list by customer id'
+
+
+def test_streamed_instrumentation(stub_server):
+    """
+    Test the size of a streamed body comes from its headers
+    """
+    aggregator = instrumentation.Aggregator().install()
+    try:
+        stub_server.payload_size = 10
+        list(Lookup().iter_device_ids())
+    finally:
+        aggregator.uninstall()
+
+    record = aggregator.records[-1]
+    assert record.bytes_received == len(json.dumps(
+        stub_server._device_list()[1]))
@@ -0,0 +1,139 @@
+"""
+Test stub MSA REST server
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+import requests
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import transport
+from msa_sdk.customer import Customer
+from msa_sdk.device import Device
+from msa_sdk.lookup import Lookup
+from msa_sdk.orchestration import Orchestration
+from msa_sdk.order import Order
+from msa_sdk.stub_server import StubServer
+
+
+def test_device_read(stub_server):
+    """
+    Test the SDK reads devices from the stub
+    """
+    device = Device(device_id=1234)
+
+    assert device.name == 'Stub device 1234'
+    assert device.management_address == '10.0.4.210'
+    device = Device(device_id=None, lazy=True)
+    device.read(by_ref='MSA42')
+    assert device.device_id == 42
+    assert stub_server.request_count('GET', '/device/') == 2
+    assert stub_server.request_count('POST', '/auth/token') == 1
+
+
+def test_lists(stub_server):
+    """
+    Test list endpoints honour payload_size
+    """
+    stub_server.payload_size = 3
+
+    assert Customer().get_device_list_by_id(5) == [1, 2, 3]
+    assert Customer().get_ip_address_list(5) == ['10.0.0.1', '10.0.0.2',
+                                                 '10.0.0.3']
+    lookup = Lookup()
+    lookup.look_list_device_ids()
+    assert len(json.loads(lookup.content)) == 3
+
+
+def test_execute_and_wait(stub_server):
+    """
+    Test a process is RUNNING until process_polls reads
+    """
+    stub_server.process_polls = 3
+    orchestration = Orchestration(1)
+    _, process_id = orchestration.execute_service_process('Process/Test',
+                                                          'Create', {})
+
+    results = dict(orchestration.wait_end_get_process_instances(
+        [process_id], timeout=10, interval=0.01))
+
+    assert results[process_id]['status']['status'] == 'ENDED'
+    assert stub_server.request_count(
+        'GET', '/orchestration/process/instance/') == 3
+
+
+def test_order_command_execute(stub_server):
+    """
+    Test order command execute
+    """
+    order = Order(1234)
+    order.command_execute('CREATE', {"simple_firewall": {"1": {}}})
+
+    assert order.response.status_code == 200
+    assert stub_server.request_count(
+        'POST', '/ordercommand/execute/1234/CREATE') == 1
+
+
+def test_latency_and_errors():
+    """
+    Test latency, error rate and custom routes
+    """
+    with StubServer(latency=0.05, error_rate=1.0, error_status=500) as server:
+        start = time.monotonic()
+        response = requests.get(server.url + '/device/v3/1', timeout=5)
+        assert time.monotonic() - start >= 0.05
+        assert response.status_code == 500
+        assert response.json() == {"message": "Stub error"}
+
+    with StubServer() as server:
+        server.add_route('GET', r'/custom/(\w+)',
+                         lambda match, data: (201, {"name": match.group(1)}))
+        response = requests.put(server.url + '/anything', data='not json',
+                                timeout=5)
+        assert response.json() == {}
+        response = requests.get(server.url + '/custom/abc', timeout=5)
+        assert response.status_code == 201
+        assert response.json() == {"name": "abc"}
+        assert server.request_count() == 2
+
+
+def test_retries_measured(stub_server):
+    """
+    Test idempotent calls are retried by the shared transport
+    """
+    stub_server.error_rate = 1.0
+    transport.configure(retries=2, backoff_factor=0)
+    try:
+        device = Device(device_id=None, lazy=True)
+        assert device.read(by_ref='MSA1') is False
+    finally:
+        transport.configure()
+
+    assert device.response.status_code == 503
+    assert stub_server.request_count('GET', '/device/reference/') == 3
+
+
+def test_standalone():
+    """
+    Test the stub runs with python -m
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'msa_sdk.stub_server', '--port', '0'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, text=True)
+    try:
+        exports = [process.stdout.readline().split(' ', 1)[1].strip()
+                   for _ in range(3)]
+        env = dict(export.split('=', 1) for export in exports)
+        port = int(env['UBIQUBE_MSA_PORT'])
+        assert env['UBIQUBE_MSA_HOST'] == '127.0.0.1'
+        assert env['API_TOKEN_URL'].endswith('/auth/token')
+        response = requests.get(
+            'http://127.0.0.1:{}/ubi-api-rest/device/v3/7'.format(port),
+            timeout=5)
+        assert response.json()['id'] == 7
+    finally:
+        process.terminate()
+        process.wait()
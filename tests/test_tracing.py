@@ -0,0 +1,160 @@
+"""
+Test span propagation and export
+"""
+
+import json
+import logging
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from util import stub_server  # pylint: disable=unused-import
+
+import msa_sdk
+from msa_sdk import instrumentation
+from msa_sdk import tracing
+from msa_sdk.device import Device
+from msa_sdk.msa_api import MSA_API
+
+
+class FakeClock():
+    """Clock moved by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _span(name):
+    return {'name': name, 'startTimeUnixNano': 1000000,
+            'endTimeUnixNano': 3500000,
+            'attributes': {'http.method': 'GET', 'http.route': '/x'}}
+
+
+def test_child_span_per_request():
+    """
+    Test each request gets its own span under the task span
+    """
+    api = MSA_API()
+    first, second = {}, {}
+    api.add_trace_headers(first)
+    api.add_trace_headers(second)
+
+    context = msa_sdk.context
+    trace_id, first_span = first['traceparent'].split('-')[1:3]
+    assert trace_id == context['TRACEID']
+    assert first['X-B3-TraceId'] == context['TRACEID']
+    assert first['X-B3-SpanId'] == first_span
+    assert first['X-B3-ParentSpanId'] == context['SPANID']
+    assert first_span != context['SPANID']
+    assert second['X-B3-SpanId'] not in (first_span, context['SPANID'])
+    assert len(second['X-B3-SpanId']) == 16
+
+
+def test_export_requests(stub_server, tmp_path):
+    """
+    Test spans of requests are exported to a file
+    """
+    path = tmp_path / 'spans.ndjson'
+    exporter = tracing.SpanExporter(tracing.FileSink(str(path))).install()
+    try:
+        Device(device_id=1)
+        Device(device_id=2)
+        assert not path.exists()
+    finally:
+        exporter.uninstall()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span['attributes']['http.target'] for span in spans] == [
+        '/device/v3/1', '/device/v3/2']
+    assert spans[0]['traceId'] == spans[1]['traceId']
+    assert spans[0]['parentSpanId'] == spans[1]['parentSpanId'] == \
+        msa_sdk.context['SPANID']
+    assert spans[0]['spanId'] != spans[1]['spanId']
+    assert exporter.exported == 2
+
+
+def test_batching():
+    """
+    Test batches are sent by size and by age
+    """
+    batches = []
+    clock = FakeClock()
+    exporter = tracing.SpanExporter(batches.append, max_batch=3,
+                                    flush_interval=5, clock=clock)
+    for name in 'abcd':
+        exporter.export(_span(name))
+    assert [[span['name'] for span in batch] for batch in batches] == [
+        ['a', 'b', 'c']]
+
+    clock.now = 10
+    exporter.export(_span('e'))
+    assert [span['name'] for span in batches[-1]] == ['d', 'e']
+
+    exporter.flush()
+    assert len(batches) == 2
+
+
+def test_logger_sink():
+    """
+    Test spans are logged with the span attached to the record
+    """
+    logger = MagicMock()
+    exporter = tracing.SpanExporter(tracing.LoggerSink(logger), max_batch=1)
+    exporter.export(_span('Read device'))
+
+    args, kwargs = logger.info.call_args
+    assert args[0] % args[1:] == 'span Read device GET /x 2.5ms'
+    assert kwargs['extra']['span']['name'] == 'Read device'
+    assert tracing.LoggerSink().logger.name == 'msa-sdk.spans'
+
+
+def test_sink_failure():
+    """
+    Test a failing sink is counted and does not raise
+    """
+    exporter = tracing.SpanExporter(MagicMock(side_effect=OSError),
+                                    max_batch=1)
+    with patch.object(instrumentation.logger, 'exception'):
+        exporter.export(_span('a'))
+    assert exporter.failed == 1
+    assert exporter.exported == 0
+
+
+@pytest.mark.parametrize('env, sink', [
+    ({'MSA_SDK_TRACE_FILE': '/tmp/spans.ndjson'}, tracing.FileSink),
+    ({'MSA_SDK_TRACE_LOG': '1'}, tracing.LoggerSink),
+    ({'MSA_SDK_TRACE_LOG': '0'}, None),
+])
+def test_install_from_env(env, sink):
+    """
+    Test the exporter installed from the environment
+    """
+    with patch.dict('os.environ', env), patch('atexit.register'):
+        exporter = tracing.install_from_env()
+    if sink is None:
+        assert exporter is None
+    else:
+        exporter.uninstall()
+        assert isinstance(exporter.sink, sink)
+
+
+def test_logged_spans_reach_handlers():
+    """
+    Test logged spans reach handlers of the root logger
+    """
+    records = []
+
+    class Handler(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    handler = Handler()
+    logging.getLogger().addHandler(handler)
+    try:
+        tracing.LoggerSink()([_span('a')])
+    finally:
+        logging.getLogger().removeHandler(handler)
+    assert records[0].span['name'] == 'a'
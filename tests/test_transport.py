@@ -0,0 +1,136 @@
+"""
+Test transport
+"""
+
+import os
+from unittest.mock import patch
+
+from util import stub_server  # pylint: disable=unused-import
+
+from msa_sdk import transport
+from msa_sdk.lookup import Lookup
+from msa_sdk.msa_api import MSA_API
+from msa_sdk.transport import Transport
+
+
+def test_session_is_shared():
+    """
+    Test the session is created once and reused
+    """
+    trans = Transport()
+    assert trans.session is trans.session
+
+
+def test_session_pool_and_retry():
+    """
+    Test pool sizes and retry policy of the mounted adapter
+    """
+    trans = Transport(pool_connections=4, pool_maxsize=50, retries=5,
+                      backoff_factor=0.1)
+    adapter = trans.session.get_adapter('http://localhost:8480')
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 50
+    assert adapter.max_retries.total == 5
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert 'GET' in adapter.max_retries.allowed_methods
+    assert 'POST' not in adapter.max_retries.allowed_methods
+    assert 'PUT' not in adapter.max_retries.allowed_methods
+    idempotent = trans.get_session(transport.IDEMPOTENT).get_adapter(
+        'http://localhost:8480')
+    assert 'PUT' in idempotent.max_retries.allowed_methods
+    assert 'DELETE' in idempotent.max_retries.allowed_methods
+    no_retry = trans.get_session(transport.NO_RETRY).get_adapter(
+        'http://localhost:8480')
+    assert no_retry.max_retries.total == 0
+    assert trans.session.headers['Connection'] == 'keep-alive'
+
+
+def test_session_no_keep_alive():
+    """
+    Test keep alive can be disabled
+    """
+    trans = Transport(keep_alive=False)
+    assert trans.session.headers['Connection'] == 'close'
+
+
+def test_transport_from_environment():
+    """
+    Test transport settings read from environment
+    """
+    env = {'MSA_SDK_POOL_SIZE': '7',
+           'MSA_SDK_POOL_CONNECTIONS': '3',
+           'MSA_SDK_HTTP_RETRIES': '0',
+           'MSA_SDK_HTTP_BACKOFF': '2',
+           'MSA_SDK_KEEP_ALIVE': 'false'}
+    with patch.dict(os.environ, env):
+        trans = Transport()
+    assert trans.pool_maxsize == 7
+    assert trans.pool_connections == 3
+    assert trans.retries == 0
+    assert trans.backoff_factor == 2.0
+    assert not trans.keep_alive
+
+
+def test_configure_replaces_transport():
+    """
+    Test configure installs a new shared transport
+    """
+    old = transport.get_transport()
+    session = old.session
+    try:
+        new = transport.configure(pool_maxsize=5)
+        assert transport.get_transport() is new
+        assert transport.session() is not session
+        assert new.pool_maxsize == 5
+    finally:
+        transport._transport = old
+
+
+def test_close():
+    """
+    Test close drops the session
+    """
+    trans = Transport()
+    session = trans.session
+    trans.close()
+    assert trans.session is not session
+
+
+def test_api_calls_use_shared_session():
+    """
+    Test API instances share the pooled session
+    """
+    with patch('requests.Session.get') as mock_call_get:
+        mock_call_get.return_value.ok = True
+        Lookup().look_list_device_ids()
+        Lookup().look_list_customer_ids()
+        assert mock_call_get.call_count == 2
+
+
+def test_status_retries_opt_in(stub_server):
+    """
+    Test PUT and DELETE are only retried on gateway errors on request
+    """
+    old = transport.get_transport()
+    transport.configure(retries=2, backoff_factor=0)
+    stub_server.error_rate = 1.0
+    try:
+        with patch('msa_sdk.auth.token_cache.get', return_value='token'):
+            api = MSA_API()
+            api.action = 'Test retries'
+            api.path = '/device/1'
+            api._call_get()
+            api._call_put({})
+            api._call_delete()
+            assert stub_server.request_count('GET', r'^/device/1$') == 3
+            assert stub_server.request_count('PUT', r'^/device/1$') == 1
+            assert stub_server.request_count('DELETE', r'^/device/1$') == 1
+
+            api._call_put({}, retry=True)
+            api._call_delete(retry=True)
+            assert stub_server.request_count('PUT', r'^/device/1$') == 4
+            assert stub_server.request_count('DELETE', r'^/device/1$') == 4
+            assert not api.response.ok
+    finally:
+        transport.get_transport().close()
+        transport._transport = old
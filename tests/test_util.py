@@ -292,7 +292,7 @@ def test_obtain_file_lock_exclusif_no_previous_file(tmpdir):
 
     result = 'Lock obtained on the file lockfile, full_path='+f_path
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.put') as mock_call_put:
+      with patch('requests.Session.put') as mock_call_put:
         context = {
             "PROCESSINSTANCEID": 12,
             "SERVICEINSTANCEID": 21,
@@ -365,7 +365,7 @@ def test_obtain_file_lock_exclusif_previous_file_failed(tmpdir):
     result = 'After waiting 10 secondes, lock could not be obtained on the file lockfile'
 
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.put') as mock_call_put:
+      with patch('requests.Session.put') as mock_call_put:
         context = {
             "PROCESSINSTANCEID": 12,
             "SERVICEINSTANCEID": 21,
@@ -448,7 +448,7 @@ def test_release_file_lock_exclusif(tmpdir):
     result = 'Lock released on the file lockfile, full_path='
 
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-      with patch('requests.put') as mock_call_put:
+      with patch('requests.Session.put') as mock_call_put:
         context = {
             "PROCESSINSTANCEID": 12,
             "SERVICEINSTANCEID": 21,
@@ -640,7 +640,7 @@ def test_update_asynchronous_task_details():
     """Test update asyncronous task"""
 
     with patch('msa_sdk.variables.Variables.task_call') as mock_task_call:
-        with patch('requests.put') as mock_call_put:
+        with patch('requests.Session.put') as mock_call_put:
             context = {
                 "PROCESSINSTANCEID": 12,
                 "TASKID": 13,
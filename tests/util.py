@@ -4,6 +4,7 @@ from unittest.mock import patch
 
 import pytest
 
+from msa_sdk import cache
 from msa_sdk.admin import Admin
 from msa_sdk.conf_backup import ConfBackup
 from msa_sdk.conf_profile import ConfProfile
@@ -15,6 +16,7 @@ from msa_sdk.order_stack import OrderStack
 from msa_sdk.pops import Pops
 from msa_sdk.profile import Profile
 from msa_sdk.repository import Repository
+from msa_sdk.stub_server import StubServer
 
 
 def _is_valid_json(msg_json):
@@ -155,10 +157,21 @@ def conf_profile_info():
         '"lastUpdate":"2021-03-15 07:59:04.977353","operatorId":3,"customerIds":[9]}')
 
 
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Stub MSA REST server, the SDK is pointed at it."""
+    # Do not serve responses cached from another server
+    cache.repository_cache.clear()
+    with StubServer() as server:
+        for name, value in server.env().items():
+            monkeypatch.setenv(name, value)
+        yield server
+
+
 @pytest.fixture
 def device_fixture():
     """Device fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -181,7 +194,7 @@ def device_fixture():
 @pytest.fixture
 def repository_fixture():
     """Repository fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -192,7 +205,7 @@ def repository_fixture():
 @pytest.fixture
 def admin_fixture():
     """Admin fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -203,7 +216,7 @@ def admin_fixture():
 @pytest.fixture
 def orchestration_fixture():
     """Orchestration fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -214,10 +227,10 @@ def orchestration_fixture():
 @pytest.fixture
 def order_fixture():
     """Order fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-        with patch('requests.get') as mock_call_get:
+        with patch('requests.Session.get') as mock_call_get:
             mock_call_get.return_value.text = device_info()
 
             with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -229,10 +242,10 @@ def order_fixture():
 @pytest.fixture
 def orderstack_fixture():
     """Orderstack fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-        with patch('requests.get') as mock_call_get:
+        with patch('requests.Session.get') as mock_call_get:
             mock_call_get.return_value.text = device_info()
 
             with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -244,7 +257,7 @@ def orderstack_fixture():
 @pytest.fixture
 def customer_fixture():
     """Create Customer fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
             mock_host_port.return_value = ('api_hostname', '8080')
@@ -255,10 +268,10 @@ def customer_fixture():
 @pytest.fixture
 def conf_profile_fixture():
     """Confprofile fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
-        with patch('requests.get') as mock_call_get:
+        with patch('requests.Session.get') as mock_call_get:
             mock_call_get.return_value.text = conf_profile_info()
 
             with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -269,7 +282,7 @@ def conf_profile_fixture():
 @pytest.fixture
 def profile_fixture():
     """Profile fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -281,7 +294,7 @@ def profile_fixture():
 @pytest.fixture
 def conf_backup_fixture():
     """Confbackup fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
         with patch('msa_sdk.msa_api.host_port') as mock_host_port:
@@ -292,7 +305,7 @@ def conf_backup_fixture():
 @pytest.fixture
 def pops_fixture():
     """Pops fixture."""
-    with patch('requests.post') as mock_post:
+    with patch('requests.Session.post') as mock_post:
         mock_post.return_value.json.return_value = {'token': '12345qwert'}
 
         with patch('msa_sdk.msa_api.host_port') as mock_host_port: